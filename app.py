@@ -1,20 +1,87 @@
+import math
+import os
 import streamlit as st
 import pandas as pd
-import numpy as np
-from sklearn.impute import SimpleImputer
+
+from churn.agrupador import MAX_ESPERA_MS, MAX_LOTE, AgrupadorPontuacao
+from churn.compilado import ModeloCompilado
+from churn.dados import CAMINHO_PLANILHA
+from churn.indice import SEGMENTOS
+from churn.instrumentacao import gravar_trace, intervalo
+from churn.regras import ACOES
+from churn.simulacao import SimuladorMemo
+from churn.tabela import ORDENACOES, TabelaRisco, ids_da_busca
 
 #streamlit run app.py
+# Trace dos passos do app (carga, pontuação, tabela, simulação):
+#   CHURN_TRACE=trace.jsonl streamlit run app.py   (ver churn/instrumentacao.py)
+# Micro-lotes do simulador (ver churn/agrupador.py):
+#   CHURN_MAX_LOTE=512 CHURN_MAX_ESPERA_MS=1 streamlit run app.py
+
+# Artefato leve do modelo (medianas, limites dos bins e coeficientes em
+# JSON), gerado no treino ao lado do modelchurn.pkl. Carregá-lo não
+# importa sklearn nem feature_engine.
+CAMINHO_MODELO = "modelchurn.json"
+CAMINHO_DATASET = CAMINHO_PLANILHA
+
+
+# ------------------------------------------------------------
+# Cache entre execuções do Streamlit
+# ------------------------------------------------------------
+# Cada interação com os widgets reexecuta o script inteiro. Modelo,
+# dataset e tabela pontuada ficam em cache e só são recalculados
+# quando o arquivo de origem muda (mtime + tamanho).
+
+def versao_arquivo(caminho):
+    """Versão do arquivo usada como chave de cache (mtime em ns + tamanho)."""
+    stat = os.stat(caminho)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def carregar_modelo(caminho, versao):
+    """Carrega o modelo uma única vez por processo (e por versão do arquivo)."""
+    with intervalo("app:carregar_modelo", categoria="app"):
+        return ModeloCompilado.carregar(caminho)
+
+
+@st.cache_data(max_entries=1, show_spinner=False)
+def carregar_clientes(caminho, versao):
+    """Leitura do dataset de clientes ativos, refeita apenas se o arquivo mudar."""
+    from churn.dados import carregar_dataset
+
+    with intervalo("app:carregar_clientes", categoria="app") as passo:
+        df = carregar_dataset(caminho)
+        passo.linhas = len(df)
+    #selecionando apenas clientes ativos
+    return df[df['Churn'] == 0]
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def simulador_memo(caminho, versao):
+    """Simulador compartilhado pelas sessões do processo.
+
+    A probabilidade fica memoizada pela chave de bins do cliente (ver
+    churn/simulacao.py). Cada sessão do Streamlit roda em uma thread:
+    chaves novas de simulações simultâneas são pontuadas juntas pelo
+    agrupador de micro-lotes.
+    """
+    compilado = carregar_modelo(caminho, versao)
+    agrupador = AgrupadorPontuacao(
+        compilado.pontuar_chaves,
+        max_lote=int(os.environ.get("CHURN_MAX_LOTE", MAX_LOTE)),
+        max_espera_ms=float(os.environ.get("CHURN_MAX_ESPERA_MS", MAX_ESPERA_MS)),
+        nome="app:simulador",
+    )
+    return SimuladorMemo(compilado, agrupador.pontuar)
 
-# Importanto modelo de regressão logistica
-model_df = pd.read_pickle("modelchurn.pkl")
-model = model_df['model']
-features = model_df['features']
 
+# Importanto modelo de regressão logistica
+versao_modelo = versao_arquivo(CAMINHO_MODELO)
+# Pipeline completo compilado em arrays (searchsorted + soma de coeficientes):
+# pontua um cliente em microssegundos no simulador
+simulador = simulador_memo(CAMINHO_MODELO, versao_modelo)
 
-##Leitura dataset de clientes
-df_lista_clientes = pd.read_excel("dataset/E Commerce Dataset.xlsx", sheet_name="E Comm")
-#selecionando apenas clientes ativos
-df_lista_clientes = df_lista_clientes[df_lista_clientes['Churn'] == 0]
 
 ##Criando colunas igual no modelo 
 pedido_preferido_opp= ['Laptop & Accessory','Mobile','Mobile Phone','Others','Fashion','Grocery']
@@ -22,37 +89,58 @@ metodo_pagamento_opp = ['Debit Card','UPI','CC','Cash on Delivery','E wallet','C
 disp_login_opp= ['Computer','Phone','Mobile Phone']
 Nível_da_Cidade_opp= ['1','2','3']
 
+# Faixas dos campos numéricos do simulador (também a grade da curva de sensibilidade)
+FAIXAS_SIMULADOR = {
+    'Armazém até a Casa': (0, 200),
+    'Número de Dispositivos Registrados': (1, 6),
+    'Número de Endereços': (1, 22),
+    'Tempo de Relacionamento': (0, 60),
+    'Horas no App': (0, 6),
+    'Quantidade de Pedidos': (0, 16),
+    'Aumento do Valor de Pedido vs Ano Anterior': (0, 100),
+    'Pontuação de Satisfação': (1, 5),
+    'Valor de Cashback': (0, 400),
+    'Dias Desde Último Pedido': (0, 200),
+}
+NIVEIS_SIMULADOR = {
+    'Categoria de Pedido Preferida': pedido_preferido_opp,
+    'Método de Pagamento Preferido': metodo_pagamento_opp,
+    'Dispositivo de Login Preferido': disp_login_opp,
+    'Nível da Cidade': [int(nivel) for nivel in Nível_da_Cidade_opp],
+}
+
+
+# ------------------------------------------------------------
+# Pontuação dos clientes ativos
+# ------------------------------------------------------------
+# Resultado em cache por versão do dataset + versão do modelo: só é
+# recalculado quando um dos dois arquivos muda.
+
+@st.cache_data(max_entries=1, show_spinner="Calculando probabilidades de churn...")
+def pontuar_clientes(versao_dados, versao_modelo):
+    """Tabela de clientes ativos com probabilidade de churn e ação recomendada."""
+    from churn.lote import pontuar_base
+
+    compilado = carregar_modelo(CAMINHO_MODELO, versao_modelo)
+    df_lista_clientes = carregar_clientes(CAMINHO_DATASET, versao_dados)
+
+    # Pontuação em blocos pelo modelo compilado (mesmas transformações do
+    # treino: features derivadas, imputação pelas medianas do treino, bins e
+    # dummies). A ação recomendada segue a regra de negócio em churn/regras.py.
+    with intervalo("app:pontuar_clientes", linhas=len(df_lista_clientes), categoria="app"):
+        df_final_clientes, _ = pontuar_base(compilado, df_lista_clientes,
+                                            colunas_extras=list(SEGMENTOS.values()))
+
+    return df_final_clientes
+
+
+@st.cache_resource(max_entries=1, show_spinner=False)
+def tabela_risco(versao_dados, versao_modelo):
+    """Índice de pontuação dos clientes (risco e segmentos), uma vez por versão."""
+    df_clientes_pontuados = pontuar_clientes(versao_dados, versao_modelo)
+    with intervalo("app:indexar_clientes", linhas=len(df_clientes_pontuados), categoria="app"):
+        return TabelaRisco.de_pontuados(df_clientes_pontuados, SEGMENTOS.values())
 
-#Variaveis dummy do modelo
-dummy_vars=['Dispositivo de Login Preferido', 'Nível da Cidade',
-        'Método de Pagamento Preferido',
-        'Categoria de Pedido Preferida',]
-
-#features do modelo
-df_template =pd.DataFrame(columns=[
-        'Armazém até a Casa',
-        'Número de Endereços',
-        'Tempo de Relacionamento',
-        'Aumento do Valor de Pedido vs Ano Anterior',
-        'distancia_por_pedido',
-        'dispositivos_por_pedido',
-        'pedidos_por_ano_rel',
-        'Pontuação de Satisfação',
-        'insatisfacao_recente',
-        'Valor de Cashback',
-        'Categoria de Pedido Preferida_Laptop & Accessory',
-        'Dias Desde Último Pedido',
-        'rf_score',
-        'Categoria de Pedido Preferida_Mobile',
-        'Método de Pagamento Preferido_Cash on Delivery',
-        'Quantidade de Pedidos',
-        'Dispositivo de Login Preferido_Mobile Phone',
-        'intensidade_uso',
-        'Nível da Cidade_3',
-        'Horas no App',
-        'Dispositivo de Login Preferido_Phone'
-    ])
-##
 
 #Definindo titulo e icone da pagina
 st.set_page_config(page_title='Predição Churn', page_icon='🔍')
@@ -78,82 +166,68 @@ Com base no nivel de risco, aplicamos **regras de negócio** para sugerir açõe
 #Exibição simulador de churn 
 exp2 = st.expander("Clientes e Probabilidade de Churn")
 with exp2:
-    # --- COPIAR AS TRANSFORMAÇÕES EXATAS DO TREINO ---
-    # Alteração de tipo de variável — 
-    df_lista_clientes['Reclamação'] = df_lista_clientes['Reclamação'].astype(bool)
-    df_lista_clientes['Nível da Cidade'] = df_lista_clientes['Nível da Cidade'].astype('category')
-    numericas = df_lista_clientes.select_dtypes(include=['int64', 'float64']).columns
-    categoricas = df_lista_clientes.select_dtypes(include=['object','category','bool']).columns
-
-    # Imputação de valores ausentes (missing) em colunas numéricas
-
-    colunas_numericas_com_missing = df_lista_clientes[numericas].columns[df_lista_clientes[numericas].isna().sum() > 0].tolist()
-    #Substituindo por média
-
-    imputer = SimpleImputer(strategy='median')
-
-    # Substituição dos valores missing 
-    df_lista_clientes[colunas_numericas_com_missing] = imputer.fit_transform(df_lista_clientes[colunas_numericas_com_missing])
-
-    #  Criar features novas igual no treino
-    df_lista_clientes["distancia_por_pedido"] = df_lista_clientes["Armazém até a Casa"] / (df_lista_clientes["Quantidade de Pedidos"] + 0.1)
-    df_lista_clientes["dispositivos_por_pedido"] = df_lista_clientes["Número de Dispositivos Registrados"] / (df_lista_clientes["Quantidade de Pedidos"] + 0.1)
-    df_lista_clientes["pedidos_por_ano_rel"] = df_lista_clientes["Quantidade de Pedidos"] / (df_lista_clientes["Tempo de Relacionamento"] + 0.1)
-    df_lista_clientes["insatisfacao_recente"] = df_lista_clientes['Reclamação'] * (6 - df_lista_clientes['Pontuação de Satisfação'])
-    df_lista_clientes["intensidade_uso"] = df_lista_clientes["Horas no App"] / (df_lista_clientes["Quantidade de Pedidos"] + 0.1)
-    df_lista_clientes['rf_score'] = df_lista_clientes['Quantidade de Pedidos'] / (df_lista_clientes['Dias Desde Último Pedido'] + 0.1)
-    #Dummy variaveis categoricas
-    df_lista_clientes_numericos = df_lista_clientes.drop(columns=dummy_vars)
-    df_dummy_lista_cliente =pd.get_dummies(df_lista_clientes[dummy_vars], drop_first=False).astype(int)
-    df_final_clientes = pd.concat([df_lista_clientes_numericos, df_dummy_lista_cliente], axis=1)
-    # garante que todas as colunas do template existam
-    df_final_clientes = df_final_clientes.reindex(columns=df_template.columns, fill_value=0)
-
-    # Fazer predição de probabilidade para cada cliente
-
-    predicao = model.predict_proba(df_final_clientes)[:, 1]
-    #Novas colunas
-    df_final_clientes["Probabilidade Churn (%)"] = (predicao * 100).round(0).astype(int)
-    df_final_clientes["ID do Cliente"] = df_lista_clientes["ID do Cliente"]
-    proba_churn= df_final_clientes["Probabilidade Churn (%)"]
-    conditions = [
-        proba_churn >= 85,                      # muito alto
-        (proba_churn >= 70) & (proba_churn < 85),     # alto
-        (proba_churn >= 30) & (proba_churn < 70),     # moderado
-        proba_churn < 30                        # baixo
-    ]
-    #Definição das ações pra cada % de probabiliadade de churn ( regra de negocio)
-    actions = [
-        "Enviar cupom agressivo",
-        "Oferecer cashback+",
-        "Sugerir produtos relacionados",
-        "Monitorar"
-    ]
-    #Coluna de ação recomendada
-
-    df_final_clientes["Ação Recomendada"] = np.select(conditions, actions, default="Monitorar")
+    tabela = tabela_risco(versao_arquivo(CAMINHO_DATASET), versao_modelo)
+
+    # Filtros, ordenação e paginação no servidor: só a página visível é
+    # enviada ao navegador
+    col_f1, col_f2, col_f3 = st.columns(3)
+    with col_f1:
+        faixa = st.slider("Probabilidade de churn (%):", 0, 100, (0, 100))
+    with col_f2:
+        acoes = st.multiselect("Ação recomendada:", ACOES, placeholder="Todas")
+    with col_f3:
+        busca_id = st.text_input("Buscar ID do Cliente:", help="Um ou mais IDs separados por vírgula")
+
+    filtros_segmento = {}
+    for coluna_segmento, coluna in zip(st.columns(len(SEGMENTOS)), SEGMENTOS.values()):
+        with coluna_segmento:
+            filtros_segmento[coluna] = st.multiselect(
+                f"{coluna}:", tabela.indice.niveis(coluna), placeholder="Todos"
+            )
 
+    col_o1, col_o2, col_o3 = st.columns(3)
+    with col_o1:
+        top_n = st.number_input("Top N de maior risco (0 = todos):", 0, len(tabela), 0)
+    with col_o2:
+        ordenacao = st.selectbox("Ordenar por:", list(ORDENACOES), disabled=top_n > 0)
+    with col_o3:
+        tamanho_pagina = st.selectbox("Linhas por página:", [25, 50, 100, 250], index=1)
+
+    ids_buscados, ids_invalidos = ids_da_busca(busca_id)
+    if ids_invalidos:
+        st.warning(f"IDs inválidos ignorados na busca: {', '.join(ids_invalidos)}")
+    with intervalo("app:filtrar", linhas=len(tabela), categoria="app"):
+        filtradas = tabela.filtrar(faixa, acoes or None, ids_buscados, filtros_segmento)
+        posicoes = tabela.selecionar(filtradas, ORDENACOES[ordenacao], top_n)
+
+    n_paginas = max(1, math.ceil(len(posicoes) / tamanho_pagina))
+    # Filtro mais restrito que a página atual: volta para a primeira
+    if st.session_state.get("pagina", 1) > n_paginas:
+        st.session_state["pagina"] = 1
+    pagina = st.number_input(f"Página (de {n_paginas}):", 1, n_paginas, key="pagina")
 
     #exibir tabela:
-    colunas_exibir = [
-        "ID do Cliente",
-        "Probabilidade Churn (%)",
-        "Ação Recomendada"
-    ]
-
-    st.dataframe(
-        df_final_clientes[colunas_exibir],
-        use_container_width=True,
-        column_config={
-            "Probabilidade Churn (%)": st.column_config.ProgressColumn(
-                "Probabilidade Churn (%)",
-                help="Probabilidade prevista pelo modelo",
-                format="%d%%",
-                min_value=0,
-                max_value=100
-            )
-        }
-    )
+    with intervalo("app:tabela", linhas=min(tamanho_pagina, len(posicoes)), categoria="app"):
+        st.dataframe(
+            tabela.pagina(posicoes, pagina, tamanho_pagina),
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "Probabilidade Churn (%)": st.column_config.ProgressColumn(
+                    "Probabilidade Churn (%)",
+                    help="Probabilidade prevista pelo modelo",
+                    format="%d%%",
+                    min_value=0,
+                    max_value=100
+                )
+            }
+        )
+    inicio_pagina = (pagina - 1) * tamanho_pagina
+    if len(posicoes):
+        st.caption(f"{inicio_pagina + 1}-{min(inicio_pagina + tamanho_pagina, len(posicoes))} "
+                   f"de {len(posicoes)} clientes filtrados ({len(tabela)} clientes ativos)")
+    else:
+        st.caption(f"Nenhum cliente com esses filtros ({len(tabela)} clientes ativos)")
 
 
 #Exibição da lista de clientes no app 
@@ -163,17 +237,17 @@ with exp1:
     #Criação dos inputs de acordo com as features do modelo
 
     with col1:
-        distancia =  st.number_input("Distancia em Km do armazém até a casa:",0,200)
-        Número_dispositivo =  st.number_input("Número de Dispositivos Registrados:",1,6)
-        Número_endereços =  st.number_input("Número de Endereços Registrados:",1,22)
-        Tempo_Relacionamento =  st.number_input("Tempo Relacionamento do Cliente (anos):",0,60)
-        horas_app =  st.number_input("Média semanal horas gastas no app:",0,6)
+        distancia =  st.number_input("Distancia em Km do armazém até a casa:",*FAIXAS_SIMULADOR['Armazém até a Casa'])
+        Número_dispositivo =  st.number_input("Número de Dispositivos Registrados:",*FAIXAS_SIMULADOR['Número de Dispositivos Registrados'])
+        Número_endereços =  st.number_input("Número de Endereços Registrados:",*FAIXAS_SIMULADOR['Número de Endereços'])
+        Tempo_Relacionamento =  st.number_input("Tempo Relacionamento do Cliente (anos):",*FAIXAS_SIMULADOR['Tempo de Relacionamento'])
+        horas_app =  st.number_input("Média semanal horas gastas no app:",*FAIXAS_SIMULADOR['Horas no App'])
     with col2:
-        Qtd_Pedido =  st.number_input("Quantidade de pedidos realizados no último mês:",0,16)
-        Aumento_pedido =  st.number_input("% De aumento pedido vs ano anterior:",0,100)
-        Satisfação =  st.number_input("Pontuação de Satisfação com serviço:",1,5)
-        Cashback =  st.number_input("Valor médio (R$) de cashback no último mês:",0,400)
-        dias =  st.number_input("Dias desde o último pedido:",0,200)
+        Qtd_Pedido =  st.number_input("Quantidade de pedidos realizados no último mês:",*FAIXAS_SIMULADOR['Quantidade de Pedidos'])
+        Aumento_pedido =  st.number_input("% De aumento pedido vs ano anterior:",*FAIXAS_SIMULADOR['Aumento do Valor de Pedido vs Ano Anterior'])
+        Satisfação =  st.number_input("Pontuação de Satisfação com serviço:",*FAIXAS_SIMULADOR['Pontuação de Satisfação'])
+        Cashback =  st.number_input("Valor médio (R$) de cashback no último mês:",*FAIXAS_SIMULADOR['Valor de Cashback'])
+        dias =  st.number_input("Dias desde o último pedido:",*FAIXAS_SIMULADOR['Dias Desde Último Pedido'])
     with col3:
         pedido_preferido =  st.selectbox("Categoria de pedido preferida do cliente no último mês:",pedido_preferido_opp)
         meio_pagamento= st.selectbox("Método de pagamento preferido :",metodo_pagamento_opp)
@@ -199,31 +273,15 @@ with exp1:
         'Método de Pagamento Preferido':meio_pagamento,
         'Quantidade de Pedidos':Qtd_Pedido,
         'Dispositivo de Login Preferido':login_preferido,
-        'Nível da Cidade':nivel_cidade,
+        'Nível da Cidade':int(nivel_cidade),
         'Horas no App':horas_app,
-        'distancia_por_pedido':distancia/(Qtd_Pedido+ 0.1),
-        'dispositivos_por_pedido':Número_dispositivo/(Qtd_Pedido+ 0.1),
-        'pedidos_por_ano_rel':Qtd_Pedido/(Tempo_Relacionamento+ 0.1),
-        'insatisfacao_recente':reclamacao_num * ( 6-Satisfação ),
-        'rf_score': Qtd_Pedido/(dias+ 0.1),
-        'intensidade_uso':horas_app/(Qtd_Pedido+ 0.1),
+        'Reclamação':reclamacao_num,
     }
-    df = pd.DataFrame([data]).replace({"Sim":1, "Não":0})
-
-    #Dummy variaveis categoricas
-
-    df_numericos = df.drop(columns=dummy_vars)
-
-    df_dummy =pd.get_dummies(df[dummy_vars], drop_first=False).astype(int)
-    df_final = pd.concat([df_numericos, df_dummy], axis=1)
-    # garante que todas as colunas do template existam
-    df_final = df_final.reindex(columns=df_template.columns, fill_value=0)
 
-    #probabilidade
-    proba = model.predict_proba(df_final[features])[:, 1]
-
-
-    proba_value = float(proba[0])
+    #probabilidade (modelo compilado: mesmas features derivadas, bins e dummies do pipeline;
+    #memoizada pela chave de bins do cliente)
+    with intervalo("app:simulacao", linhas=1, categoria="app"):
+        proba_value = simulador.pontuar_linha(data)
 
     if proba_value < 0.20:
         cor = "#2ecc71"  # verde
@@ -250,3 +308,29 @@ with exp1:
         """,
         unsafe_allow_html=True
     )
+
+    # Modo varredura: uma entrada percorre a faixa inteira com as demais
+    # fixas nos valores acima (curva de dependência parcial do cliente)
+    if st.toggle("Modo varredura (curva de sensibilidade)"):
+        variavel = st.selectbox("Variável a variar:", list(FAIXAS_SIMULADOR) + list(NIVEIS_SIMULADOR))
+        if variavel in FAIXAS_SIMULADOR:
+            minimo, maximo = FAIXAS_SIMULADOR[variavel]
+            valores = list(range(minimo, maximo + 1))
+        else:
+            valores = NIVEIS_SIMULADOR[variavel]
+        with intervalo("app:varredura", linhas=len(valores), categoria="app"):
+            proba_curva, distintas = simulador.curva(data, variavel, valores)
+        curva = pd.DataFrame({
+            variavel: valores if variavel in FAIXAS_SIMULADOR else [str(v) for v in valores],
+            "Probabilidade Churn (%)": proba_curva * 100,
+        })
+        if variavel in FAIXAS_SIMULADOR:
+            st.line_chart(curva, x=variavel, y="Probabilidade Churn (%)")
+        else:
+            st.bar_chart(curva, x=variavel, y="Probabilidade Churn (%)")
+        st.caption(f"{len(valores)} valores de '{variavel}' em {distintas} combinações "
+                   f"de bins distintas do modelo")
+
+
+# Grava os intervalos desta execução do script (só com CHURN_TRACE)
+gravar_trace()
@@ -0,0 +1,219 @@
+# ============================================================
+# Teste de carga do serviço de pontuação (python -m churn serve)
+# ============================================================
+# Sobe o serviço em um processo separado (ou usa --url), confere as
+# respostas contra o modelo compilado local e abre `--conexoes` conexões
+# keep-alive simultâneas que enviam clientes da planilha durante
+# `--segundos`. Relata:
+#   requisições/s e clientes/s atendidos
+#   latência p50/p99 medida no cliente (inclui a fila do socket)
+#   as métricas do próprio serviço (GET /metrics): latência p50/p99 no
+#   servidor e linhas por micro-lote
+# Cliente e servidor dividem a mesma máquina: em poucas CPUs o gerador
+# de carga consome parte do tempo que o serviço teria.
+#
+# Uso:
+#   python benchmarks/carga.py                      # POST /score, 64 conexões, 10 s
+#   python benchmarks/carga.py --lote 100           # POST /score/batch com 100 clientes
+#   python benchmarks/carga.py --max-espera-ms 0 --max-lote 64
+#   python benchmarks/carga.py --url http://127.0.0.1:8000
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from urllib.parse import urlsplit
+
+import numpy as np
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+CAMINHO_MODELO = os.path.join(RAIZ, "modelchurn.json")
+
+
+def clientes_da_planilha(compilado):
+    """Clientes ativos da planilha como dicionários JSON (NaN -> null).
+
+    Só o ID e as colunas do modelo: o serviço recusa colunas que não usa.
+    """
+    from churn.dados import carregar_dataset
+    from churn.lote import COLUNA_ID
+
+    df = carregar_dataset()
+    df = df.loc[df["Churn"] == 0, [COLUNA_ID, *compilado.entradas, *compilado.categorias]]
+    return df.astype(object).where(df.notna(), None).to_dict("records")
+
+
+def requisicao(metodo, caminho, conteudo=None):
+    corpo = b"" if conteudo is None else json.dumps(conteudo).encode()
+    return (f"{metodo} {caminho} HTTP/1.1\r\nHost: carga\r\n"
+            "Content-Type: application/json\r\n"
+            f"Content-Length: {len(corpo)}\r\n\r\n").encode() + corpo
+
+
+async def ler_resposta(reader):
+    """(status, corpo) de uma resposta HTTP com Content-Length."""
+    cabecalho = await reader.readuntil(b"\r\n\r\n")
+    linhas = cabecalho.decode("latin-1").split("\r\n")
+    status = int(linhas[0].split(" ", 2)[1])
+    tamanho = next(int(linha.split(":", 1)[1]) for linha in linhas
+                   if linha.lower().startswith("content-length:"))
+    return status, await reader.readexactly(tamanho)
+
+
+async def pedir(host, porta, metodo, caminho, conteudo=None):
+    reader, writer = await asyncio.open_connection(host, porta)
+    writer.write(requisicao(metodo, caminho, conteudo))
+    status, corpo = await ler_resposta(reader)
+    writer.close()
+    return status, json.loads(corpo)
+
+
+# ------------------------------------------------------------
+# Carga
+# ------------------------------------------------------------
+
+async def conexao(host, porta, pedidos, inicio_medicao, fim, latencias, contagem):
+    reader, writer = await asyncio.open_connection(host, porta)
+    i = 0
+    while time.perf_counter() < fim:
+        inicio = time.perf_counter()
+        writer.write(pedidos[i % len(pedidos)])
+        status, _ = await ler_resposta(reader)
+        agora = time.perf_counter()
+        if inicio >= inicio_medicao:
+            latencias.append(agora - inicio)
+            contagem["erros" if status != 200 else "ok"] += 1
+        i += 1
+    writer.close()
+
+
+async def gerar_carga(host, porta, pedidos, conexoes, segundos, aquecimento):
+    latencias = []
+    contagem = {"ok": 0, "erros": 0}
+    inicio_medicao = time.perf_counter() + aquecimento
+    fim = inicio_medicao + segundos
+    await asyncio.gather(*(
+        conexao(host, porta, pedidos[k::conexoes] or pedidos, inicio_medicao, fim,
+                latencias, contagem)
+        for k in range(conexoes)
+    ))
+    return np.array(latencias), contagem
+
+
+async def executar(args, host, porta):
+    import pandas as pd
+
+    from churn.compilado import carregar_modelo
+
+    # Conferência: o serviço devolve as probabilidades do modelo local
+    compilado = carregar_modelo(CAMINHO_MODELO)
+    clientes = clientes_da_planilha(compilado)
+    esperado = compilado.pontuar(pd.DataFrame(clientes))
+    status, resposta = await pedir(host, porta, "POST", "/score/batch", clientes)
+    obtido = np.array([r["Probabilidade Churn"] for r in resposta["resultados"]])
+    assert status == 200 and np.array_equal(obtido, esperado), "serviço diverge do modelo local"
+    status, unico = await pedir(host, porta, "POST", "/score", clientes[0])
+    assert status == 200 and unico["Probabilidade Churn"] == esperado[0]
+    print(f"Conferência: {len(clientes)} clientes iguais ao modelo local")
+
+    if args.lote:
+        pedidos = [requisicao("POST", "/score/batch", clientes[i:i + args.lote])
+                   for i in range(0, len(clientes), args.lote)]
+    else:
+        pedidos = [requisicao("POST", "/score", cliente) for cliente in clientes]
+    _, antes = await pedir(host, porta, "GET", "/metrics")
+
+    latencias, contagem = await gerar_carga(host, porta, pedidos, args.conexoes,
+                                            args.segundos, args.aquecimento)
+    _, metricas = await pedir(host, porta, "GET", "/metrics")
+
+    por_requisicao = args.lote or 1
+    lotes = metricas["lotes"] - antes["lotes"]
+    resultado = {
+        "conexoes": args.conexoes,
+        "clientes_por_requisicao": por_requisicao,
+        "requisicoes": contagem["ok"],
+        "erros": contagem["erros"],
+        "requisicoes_por_segundo": contagem["ok"] / args.segundos,
+        "clientes_por_segundo": contagem["ok"] * por_requisicao / args.segundos,
+        "latencia_cliente_ms": {
+            "p50": float(np.percentile(latencias, 50)) * 1000,
+            "p99": float(np.percentile(latencias, 99)) * 1000,
+        },
+        "latencia_servidor_ms": metricas["latencia_ms"],
+        "linhas_por_lote": ((metricas["linhas_por_lote"] * metricas["lotes"]
+                             - antes["linhas_por_lote"] * antes["lotes"]) / lotes
+                            if lotes else 0.0),
+    }
+    print(f"{resultado['requisicoes']} requisições em {args.segundos:.0f}s "
+          f"({args.conexoes} conexões, {por_requisicao} cliente(s) por requisição), "
+          f"{resultado['erros']} erros")
+    print(f"  {resultado['requisicoes_por_segundo']:,.0f} requisições/s, "
+          f"{resultado['clientes_por_segundo']:,.0f} clientes/s")
+    print(f"  latência no cliente:  p50 {resultado['latencia_cliente_ms']['p50']:.2f} ms, "
+          f"p99 {resultado['latencia_cliente_ms']['p99']:.2f} ms")
+    servidor = resultado["latencia_servidor_ms"]
+    print(f"  latência no servidor: p50 {servidor.get('p50', 0):.2f} ms, "
+          f"p99 {servidor.get('p99', 0):.2f} ms (últimos {metricas['janela_segundos']:.0f}s)")
+    print(f"  {resultado['linhas_por_lote']:.1f} linhas por micro-lote")
+    return resultado
+
+
+def iniciar_servico(args):
+    """Sobe `python -m churn serve` em uma porta livre; devolve (processo, porta)."""
+    comando = [sys.executable, "-W", "ignore", "-m", "churn", "serve", "--port", "0",
+               "--modelo", CAMINHO_MODELO, "--max-lote", str(args.max_lote),
+               "--max-espera-ms", str(args.max_espera_ms)]
+    processo = subprocess.Popen(comando, cwd=RAIZ, stdout=subprocess.PIPE, text=True)
+    linha = processo.stdout.readline()
+    if not linha.startswith("Servindo em"):
+        processo.kill()
+        raise RuntimeError(f"serviço não iniciou: {linha!r}")
+    print(linha.strip())
+    return processo, urlsplit(linha.split()[2]).port
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/carga.py")
+    parser.add_argument("--url", default=None,
+                        help="Serviço já em execução (padrão: sobe um processo novo)")
+    parser.add_argument("--conexoes", type=int, default=64)
+    parser.add_argument("--segundos", type=float, default=10.0)
+    parser.add_argument("--aquecimento", type=float, default=1.0,
+                        help="Segundos iniciais fora da medição")
+    parser.add_argument("--lote", type=int, default=0,
+                        help="Clientes por requisição em /score/batch (0 = /score)")
+    parser.add_argument("--max-lote", type=int, default=512,
+                        help="Micro-lote do serviço iniciado pelo script")
+    parser.add_argument("--max-espera-ms", type=float, default=1.0,
+                        help="Espera do micro-lote do serviço iniciado pelo script")
+    parser.add_argument("--json", default=None, help="Grava o resultado em JSON")
+    args = parser.parse_args(argv)
+
+    processo = None
+    if args.url:
+        url = urlsplit(args.url)
+        host, porta = url.hostname, url.port
+    else:
+        processo, porta = iniciar_servico(args)
+        host = "127.0.0.1"
+    try:
+        resultado = asyncio.run(executar(args, host, porta))
+    finally:
+        if processo is not None:
+            processo.terminate()
+            processo.wait()
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
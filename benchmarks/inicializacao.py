@@ -0,0 +1,101 @@
+# ============================================================
+# Benchmark de inicialização: carga do modelo no app
+# ============================================================
+# Compara os dois caminhos de carga do modelo, cada medição em um
+# processo Python novo (imports a frio, como no início do app):
+#   pickle  -> pd.read_pickle("modelchurn.pkl")["compilado"]
+#              (desserializa pipeline + GridSearchCV: importa sklearn,
+#              feature_engine e scipy)
+#   json    -> ModeloCompilado.carregar("modelchurn.json")
+#              (artefato leve: só NumPy)
+# Cenário "app": os mesmos caminhos precedidos dos imports do app
+# (streamlit e pandas), que é o custo percebido na inicialização.
+#
+# Uso: python benchmarks/inicializacao.py [--repeticoes 7] [--json saida.json]
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CARGAS = {
+    "pickle": (
+        "import pandas as pd\n"
+        "modelo = pd.read_pickle('modelchurn.pkl')['compilado']\n"
+    ),
+    "json": (
+        "from churn.compilado import ModeloCompilado\n"
+        "modelo = ModeloCompilado.carregar('modelchurn.json')\n"
+    ),
+}
+
+PREFIXOS = {
+    "modelo": "",
+    "app": "import streamlit\nimport pandas\n",
+}
+
+# Executado no processo filho: mede a carga e o que foi importado
+MEDICAO = """
+import sys, time, json
+inicio = time.perf_counter()
+{codigo}
+segundos = time.perf_counter() - inicio
+pesados = sorted({{m.split('.')[0] for m in sys.modules}}
+                 & {{'sklearn', 'feature_engine', 'scipy'}})
+assert 0 < modelo.pontuar_linha({{}}) < 1
+print(json.dumps({{"segundos": segundos, "modulos": len(sys.modules), "pesados": pesados}}))
+"""
+
+
+def medir(codigo):
+    saida = subprocess.run(
+        [sys.executable, "-W", "ignore", "-c", MEDICAO.format(codigo=codigo)],
+        cwd=RAIZ, capture_output=True, text=True, check=True,
+    )
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def executar(repeticoes):
+    resultados = []
+    for cenario, prefixo in PREFIXOS.items():
+        for carga, codigo in CARGAS.items():
+            medicoes = [medir(prefixo + codigo) for _ in range(repeticoes)]
+            tempos = [m["segundos"] for m in medicoes]
+            resultados.append({
+                "cenario": cenario,
+                "carga": carga,
+                "mediana_s": statistics.median(tempos),
+                "minimo_s": min(tempos),
+                "modulos": medicoes[-1]["modulos"],
+                "pesados": medicoes[-1]["pesados"],
+            })
+    return resultados
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/inicializacao.py")
+    parser.add_argument("--repeticoes", type=int, default=7)
+    parser.add_argument("--json", default=None, help="Grava os resultados em JSON")
+    args = parser.parse_args(argv)
+
+    resultados = executar(args.repeticoes)
+    for cenario in PREFIXOS:
+        linhas = {r["carga"]: r for r in resultados if r["cenario"] == cenario}
+        for r in linhas.values():
+            print(f"{cenario:7} {r['carga']:7} {r['mediana_s'] * 1000:9.1f} ms "
+                  f"(mín {r['minimo_s'] * 1000:.1f} ms, {r['modulos']} módulos, "
+                  f"pesados: {', '.join(r['pesados']) or '-'})")
+        ganho = linhas["pickle"]["mediana_s"] / linhas["json"]["mediana_s"]
+        print(f"{cenario:7} json é {ganho:.1f}x mais rápido que pickle\n")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(resultados, f, indent=1)
+
+
+if __name__ == "__main__":
+    main()
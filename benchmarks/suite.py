@@ -0,0 +1,556 @@
+# ============================================================
+# Suíte de benchmarks: treino e pontuação
+# ============================================================
+# Cada caso roda em um processo Python novo (medições independentes e
+# pico de memória por caso). O processo prepara os dados fora da
+# medição, executa a operação `--repeticoes` vezes e registra:
+#   segundos        tempo de parede de cada repetição
+#   pico_rss_mb     pico de memória residente do processo (inclui preparo)
+#   rss_preparo_mb  pico de memória residente antes da medição
+#   pico_alocado_mb pico de memória alocada durante uma execução
+#                   (tracemalloc: arrays do NumPy/pandas; não inclui o Arrow)
+#
+# Os dados escalados são clientes sintéticos com o esquema da aba
+# "E Comm" (churn/sintetico.py), com semente fixa.
+#
+# Uso:
+#   python benchmarks/suite.py                         # todos os casos
+#   python benchmarks/suite.py --rapido                # tamanhos/grades menores
+#   python benchmarks/suite.py --casos predict_proba_1000 simulador_compilado
+#   python benchmarks/suite.py --comparar antes.json depois.json
+# Resultados: benchmarks/resultados/<commit>.json (ou --saida)
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import resource
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIRETORIO_RESULTADOS = os.path.join(RAIZ, "benchmarks", "resultados")
+
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+CAMINHO_MODELO = os.path.join(RAIZ, "modelchurn.pkl")
+
+# Linhas dos casos escalados (pré-processamento) e do predict_proba
+LINHAS = 1_000_000
+LINHAS_PREDICT = [1, 1_000, 100_000, 1_000_000]
+LINHAS_RAPIDO = 100_000
+
+# Grades reduzidas (padrão) e completas (--completo: as do treino)
+GRADE_RF_REDUZIDA = {"min_samples_leaf": [15, 30], "n_estimators": [100], "criterion": ["gini"]}
+GRADE_LR_REDUZIDA = {"l1_ratio": [1, 0], "C": [0.1, 1]}
+
+CASOS = {}
+
+
+def caso(nome, **opcoes):
+    """Registra a função de preparo de um caso.
+
+    O preparo recebe a configuração e devolve (operação, linhas): a
+    operação é a função medida, sem argumentos.
+    """
+    def registrar(preparo):
+        CASOS[nome] = (preparo, opcoes)
+        return preparo
+    return registrar
+
+
+# ------------------------------------------------------------
+# Dados e modelo compartilhados pelos casos
+# ------------------------------------------------------------
+
+def _base():
+    from churn.dados import carregar_dataset
+
+    return carregar_dataset(os.path.join(RAIZ, "dataset", "E Commerce Dataset.xlsx"))
+
+
+def _sinteticos(n):
+    from churn.sintetico import gerar_clientes
+
+    return gerar_clientes(n, base=_base(), random_state=42)
+
+
+def _modelo():
+    import pandas as pd
+
+    return pd.read_pickle(CAMINHO_MODELO)
+
+
+def _linhas(config):
+    return LINHAS_RAPIDO if config["rapido"] else LINHAS
+
+
+def _treino_real():
+    """Conjuntos de treino do pipeline em etapas (cache em .cache/treino)."""
+    from churn import treino
+
+    os.chdir(RAIZ)
+    etapas = treino.PipelineTreino()
+    return etapas["preparacao"], etapas["importancias"]
+
+
+def _silencioso(funcao):
+    # As buscas imprimem o progresso de cada ajuste (verbose=4)
+    def executar():
+        import contextlib
+        import io
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            return funcao()
+    return executar
+
+
+# ------------------------------------------------------------
+# Casos
+# ------------------------------------------------------------
+
+@caso("carga_excel", repeticoes=3)
+def _carga_excel(config):
+    from churn.dados import ler_planilha
+
+    caminho = os.path.join(RAIZ, "dataset", "E Commerce Dataset.xlsx")
+    return (lambda: ler_planilha(caminho)), 5630
+
+
+@caso("carga_parquet")
+def _carga_parquet(config):
+    from churn.dados import carregar_dataset
+
+    caminho = os.path.join(RAIZ, "dataset", "E Commerce Dataset.xlsx")
+    df = carregar_dataset(caminho)  # garante a conversão antes da medição
+    return (lambda: carregar_dataset(caminho)), len(df)
+
+
+@caso("carga_parquet_sintetico")
+def _carga_parquet_sintetico(config):
+    import pandas as pd
+
+    n = _linhas(config)
+    caminho = os.path.join(config["temporario"], f"sinteticos_{n}.parquet")
+    _sinteticos(n).to_parquet(caminho, index=False)
+    return (lambda: pd.read_parquet(caminho)), n
+
+
+@caso("features_derivadas")
+def _features_derivadas(config):
+    from churn.features import FeaturesDerivadas
+
+    n = _linhas(config)
+    df = _sinteticos(n)
+    features = FeaturesDerivadas().fit(df)
+    return (lambda: features.transform(df)), n
+
+
+@caso("imputacao")
+def _imputacao(config):
+    from churn.features import FeaturesDerivadas
+
+    n = _linhas(config)
+    df = FeaturesDerivadas().fit_transform(_sinteticos(n))
+    imputer = _modelo()["pipeline"].named_steps["Imputar"]
+    # A imputação é in place: cada repetição recebe uma cópia (incluída no tempo)
+    return (lambda: imputer.transform(df.copy())), n
+
+
+@caso("dummies_reindex")
+def _dummies_reindex(config):
+    import pandas as pd
+
+    from churn.features import FeaturesDerivadas
+
+    n = _linhas(config)
+    modelo = _modelo()
+    pipeline = modelo["pipeline"]
+    df = pipeline.named_steps["Imputar"].transform(
+        FeaturesDerivadas().fit_transform(_sinteticos(n)).drop(columns=["ID do Cliente", "Churn"])
+    )
+    categoricas = list(modelo["categorias"])
+    colunas_treino = pd.get_dummies(df.head(1000), columns=categoricas).columns
+
+    # Seção 15 do treino: get_dummies + alinhamento das colunas
+    def operacao():
+        return pd.get_dummies(df, columns=categoricas, drop_first=False).reindex(
+            columns=colunas_treino, fill_value=0
+        )
+    return operacao, n
+
+
+def _predict_proba(n):
+    def preparo(config):
+        if config["rapido"] and n > LINHAS_RAPIDO:
+            return None
+        modelo = _modelo()
+        pipeline = modelo["pipeline"]
+        # Entrada do log_pipeline: best_features já imputadas e codificadas
+        X = pipeline[:3].transform(_sinteticos(n))
+        log_pipeline = modelo["model"]
+        return (lambda: log_pipeline.predict_proba(X)), n
+    return preparo
+
+
+def _pontuar_compilado(n):
+    def preparo(config):
+        if config["rapido"] and n > LINHAS_RAPIDO:
+            return None
+        compilado = _modelo()["compilado"]
+        df = _sinteticos(n)
+        return (lambda: compilado.pontuar(df)), n
+    return preparo
+
+
+for _n in LINHAS_PREDICT:
+    caso(f"predict_proba_{_n}", repeticoes=3 if _n >= 100_000 else 5)(_predict_proba(_n))
+    caso(f"pontuar_compilado_{_n}", repeticoes=3 if _n >= 100_000 else 5)(_pontuar_compilado(_n))
+
+
+def _linha_simulador():
+    # Entradas do simulador do app (valores brutos de um cliente)
+    return {
+        'Tempo de Relacionamento': 4.0, 'Reclamação': 1, 'Quantidade de Pedidos': 2.0,
+        'Dias Desde Último Pedido': 7.0, 'Horas no App': 3.0, 'Armazém até a Casa': 15.0,
+        'Número de Dispositivos Registrados': 4.0, 'Pontuação de Satisfação': 3.0,
+        'Número de Endereços': 3.0, 'Valor de Cashback': 150.0,
+        'Aumento do Valor de Pedido vs Ano Anterior': 15.0,
+        'Dispositivo de Login Preferido': 'Mobile Phone', 'Nível da Cidade': 1,
+        'Método de Pagamento Preferido': 'Debit Card',
+        'Categoria de Pedido Preferida': 'Laptop & Accessory',
+    }
+
+
+@caso("simulador_compilado", repeticoes=2000)
+def _simulador_compilado(config):
+    compilado = _modelo()["compilado"]
+    linha = _linha_simulador()
+    return (lambda: compilado.pontuar_linha(linha)), 1
+
+
+@caso("simulador_memo_acerto", repeticoes=2000)
+def _simulador_memo_acerto(config):
+    # Rerun do app com as mesmas entradas: acerto no memo das entradas brutas
+    from churn.simulacao import SimuladorMemo
+
+    simulador = SimuladorMemo(_modelo()["compilado"])
+    linha = _linha_simulador()
+    simulador.pontuar_linha(linha)
+    return (lambda: simulador.pontuar_linha(linha)), 1
+
+
+@caso("simulador_pipeline", repeticoes=50)
+def _simulador_pipeline(config):
+    import pandas as pd
+
+    pipeline = _modelo()["pipeline"]
+    df = pd.DataFrame([_linha_simulador()])
+    return (lambda: pipeline.predict_proba(df)[:, 1]), 1
+
+
+# Simulações simultâneas (sessões do app): cada uma das THREADS_SIMULADOR
+# threads pontua clientes um a um, direto no modelo ou pelo agrupador de
+# micro-lotes (churn/agrupador.py)
+THREADS_SIMULADOR = 32
+PEDIDOS_POR_THREAD = 8
+
+
+def _simulacoes_simultaneas(pontuar_um):
+    from concurrent.futures import ThreadPoolExecutor
+
+    executor = ThreadPoolExecutor(THREADS_SIMULADOR)
+    n = THREADS_SIMULADOR * PEDIDOS_POR_THREAD
+    return (lambda: list(executor.map(lambda _: pontuar_um(), range(n)))), n
+
+
+@caso("simulador_concorrente_compilado", repeticoes=20)
+def _simulador_concorrente_compilado(config):
+    compilado = _modelo()["compilado"]
+    linha = _linha_simulador()
+    return _simulacoes_simultaneas(lambda: compilado.pontuar_linha(linha))
+
+
+@caso("simulador_agrupado_compilado", repeticoes=20)
+def _simulador_agrupado_compilado(config):
+    from churn.agrupador import AgrupadorPontuacao
+
+    compilado = _modelo()["compilado"]
+    agrupador = AgrupadorPontuacao(compilado.pontuar_matriz)
+    linha = _linha_simulador()
+    return _simulacoes_simultaneas(
+        lambda: agrupador.pontuar(compilado.codificar_linha(linha))[0]
+    )
+
+
+@caso("simulador_concorrente_pipeline", repeticoes=3)
+def _simulador_concorrente_pipeline(config):
+    import pandas as pd
+
+    pipeline = _modelo()["pipeline"]
+    df = pd.DataFrame([_linha_simulador()])
+    return _simulacoes_simultaneas(lambda: pipeline.predict_proba(df)[0, 1])
+
+
+@caso("simulador_agrupado_pipeline", repeticoes=3)
+def _simulador_agrupado_pipeline(config):
+    import pandas as pd
+
+    from churn.agrupador import AgrupadorPontuacao
+
+    pipeline = _modelo()["pipeline"]
+    agrupador = AgrupadorPontuacao(
+        lambda lote: pipeline.predict_proba(lote)[:, 1],
+        juntar=lambda partes: pd.concat(partes, ignore_index=True),
+    )
+    df = pd.DataFrame([_linha_simulador()])
+    return _simulacoes_simultaneas(lambda: agrupador.pontuar(df)[0])
+
+
+@caso("busca_rf", repeticoes=1)
+def _busca_rf(config):
+    from churn import treino
+
+    preparacao, importancias = _treino_real()
+    parametros = {
+        "params_rf": treino.CONFIG_PADRAO["params_rf"] if config["completo"] else GRADE_RF_REDUZIDA,
+        "modo_busca": config["modo_busca"], "max_ajustes": None, "orcamento_segundos": None,
+    }
+    operacao = _silencioso(lambda: treino.etapa_busca_rf(parametros, preparacao, importancias))
+    return operacao, len(preparacao["X_train"])
+
+
+@caso("busca_lr", repeticoes=3)
+def _busca_lr(config):
+    from churn import treino
+
+    preparacao, importancias = _treino_real()
+    parametros = {
+        "params_lr": treino.CONFIG_PADRAO["params_lr"] if config["completo"] else GRADE_LR_REDUZIDA,
+        "modo_busca": config["modo_busca"], "max_ajustes": None, "orcamento_segundos": None,
+        "max_bins_discretizacao": None, "cache_discretizacao": None,
+    }
+    operacao = _silencioso(lambda: treino.etapa_busca_lr(parametros, preparacao, importancias))
+    return operacao, len(preparacao["X_train"])
+
+
+@caso("discretizador_treino")
+def _discretizador_treino(config):
+    from feature_engine import discretisation
+
+    preparacao, importancias = _treino_real()
+    variaveis = [c for c in importancias["best_features"] if c in preparacao["numericas"]]
+    X = preparacao["X_train"][importancias["best_features"]]
+    y = preparacao["y_train"]
+
+    def operacao():
+        return discretisation.DecisionTreeDiscretiser(
+            variables=variaveis, regression=False, bin_output='bin_number', cv=3
+        ).fit(X, y)
+    return operacao, len(X)
+
+
+@caso("discretizador_sintetico", repeticoes=3)
+def _discretizador_sintetico(config):
+    from feature_engine import discretisation
+
+    n = _linhas(config)
+    modelo = _modelo()
+    pipeline = modelo["pipeline"]
+    discretizar = pipeline.named_steps["Discretizar"]
+    df = _sinteticos(n)
+    X = pipeline[:3].transform(df)
+    y = df["Churn"]
+
+    def operacao():
+        return discretisation.DecisionTreeDiscretiser(
+            variables=list(discretizar.variables_), regression=False,
+            bin_output='bin_number', cv=3
+        ).fit(X, y)
+    return operacao, n
+
+
+@caso("discretizador_histograma", repeticoes=3)
+def _discretizador_histograma(config):
+    from churn.discretizacao import DiscretizadorArvore
+
+    n = _linhas(config)
+    pipeline = _modelo()["pipeline"]
+    df = _sinteticos(n)
+    X = pipeline[:3].transform(df)
+    y = df["Churn"]
+
+    def operacao():
+        return DiscretizadorArvore(
+            variables=list(pipeline.named_steps["Discretizar"].variables_),
+            regression=False, bin_output='bin_number', cv=3, n_jobs=-1, max_bins=256
+        ).fit(X, y)
+    return operacao, n
+
+
+# ------------------------------------------------------------
+# Execução
+# ------------------------------------------------------------
+
+def _rss_mb():
+    # ru_maxrss: KB no Linux, bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+
+
+def medir_caso(nome, config):
+    """Executado no processo filho: prepara, mede e devolve o resultado."""
+    import gc
+
+    preparo, opcoes = CASOS[nome]
+    preparado = preparo(config)
+    if preparado is None:
+        return None
+    operacao, linhas = preparado
+    repeticoes = config["repeticoes"] or opcoes.get("repeticoes", 5)
+
+    operacao()  # aquecimento (imports tardios, caches do sklearn)
+    gc.collect()
+    rss_preparo = _rss_mb()
+
+    segundos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        operacao()
+        segundos.append(time.perf_counter() - inicio)
+
+    tracemalloc.start()
+    operacao()
+    _, pico_alocado = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    mediana = statistics.median(segundos)
+    return {
+        "linhas": linhas,
+        "repeticoes": repeticoes,
+        "segundos": segundos,
+        "mediana_s": mediana,
+        "min_s": min(segundos),
+        "linhas_por_s": linhas / mediana if mediana else None,
+        "rss_preparo_mb": rss_preparo,
+        "pico_rss_mb": _rss_mb(),
+        "pico_alocado_mb": pico_alocado / (1024 * 1024),
+    }
+
+
+def _executar_processo(nome, config):
+    comando = [sys.executable, "-W", "ignore", os.path.abspath(__file__),
+               "--_caso", nome, "--_config", json.dumps(config)]
+    saida = subprocess.run(comando, cwd=RAIZ, capture_output=True, text=True)
+    if saida.returncode != 0:
+        return {"erro": saida.stderr.strip().splitlines()[-1:]}
+    return json.loads(saida.stdout.strip().splitlines()[-1])
+
+
+def _ambiente():
+    import feature_engine
+    import numpy
+    import pandas
+    import sklearn
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ,
+                                capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "data": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+        "versoes": {
+            "numpy": numpy.__version__, "pandas": pandas.__version__,
+            "sklearn": sklearn.__version__, "feature_engine": feature_engine.__version__,
+        },
+    }
+
+
+def executar(casos, config):
+    import tempfile
+
+    resultados = {}
+    with tempfile.TemporaryDirectory() as temporario:
+        config = {**config, "temporario": temporario}
+        for nome in casos:
+            resultado = _executar_processo(nome, config)
+            if resultado is None:
+                continue
+            resultados[nome] = resultado
+            if "erro" in resultado:
+                print(f"{nome:28} ERRO {resultado['erro']}")
+            else:
+                print(f"{nome:28} {resultado['mediana_s'] * 1000:12.3f} ms "
+                      f"{resultado['linhas']:>10} linhas  pico RSS {resultado['pico_rss_mb']:7.0f} MB"
+                      f"  alocado {resultado['pico_alocado_mb']:7.1f} MB")
+    config.pop("temporario", None)
+    return {**_ambiente(), "config": config, "casos": resultados}
+
+
+def comparar(antes, depois):
+    """Razão de tempos (antes / depois) dos casos presentes nos dois arquivos."""
+    with open(antes, encoding="utf-8") as f:
+        a = json.load(f)
+    with open(depois, encoding="utf-8") as f:
+        b = json.load(f)
+    print(f"{'caso':28} {a.get('commit') or antes:>12} {b.get('commit') or depois:>12}  ganho")
+    for nome, ra in a["casos"].items():
+        rb = b["casos"].get(nome)
+        if rb is None or "erro" in ra or "erro" in rb:
+            continue
+        print(f"{nome:28} {ra['mediana_s'] * 1000:10.2f}ms {rb['mediana_s'] * 1000:10.2f}ms"
+              f"  {ra['mediana_s'] / rb['mediana_s']:5.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python benchmarks/suite.py")
+    parser.add_argument("--casos", nargs="+", default=None, choices=list(CASOS), metavar="CASO",
+                        help=f"Casos a executar (padrão: todos): {', '.join(CASOS)}")
+    parser.add_argument("--rapido", action="store_true",
+                        help=f"Até {LINHAS_RAPIDO} linhas por caso")
+    parser.add_argument("--completo", action="store_true",
+                        help="Buscas com as grades completas do treino (minutos)")
+    parser.add_argument("--modo-busca", default="grid")
+    parser.add_argument("--repeticoes", type=int, default=None,
+                        help="Repetições por caso (padrão: definido por caso)")
+    parser.add_argument("--saida", default=None,
+                        help="Arquivo JSON (padrão: benchmarks/resultados/<commit>.json)")
+    parser.add_argument("--comparar", nargs=2, metavar=("ANTES", "DEPOIS"))
+    parser.add_argument("--_caso", help=argparse.SUPPRESS)
+    parser.add_argument("--_config", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args._caso:
+        print(json.dumps(medir_caso(args._caso, json.loads(args._config))))
+        return
+    if args.comparar:
+        comparar(*args.comparar)
+        return
+
+    config = {
+        "rapido": args.rapido, "completo": args.completo,
+        "modo_busca": args.modo_busca, "repeticoes": args.repeticoes,
+    }
+    resultado = executar(args.casos or list(CASOS), config)
+
+    saida = args.saida
+    if saida is None:
+        os.makedirs(DIRETORIO_RESULTADOS, exist_ok=True)
+        saida = os.path.join(DIRETORIO_RESULTADOS, f"{resultado['commit'] or 'local'}.json")
+    with open(saida, "w", encoding="utf-8") as f:
+        json.dump(resultado, f, ensure_ascii=False, indent=1)
+    print(f"\nResultados em {saida}")
+
+
+if __name__ == "__main__":
+    main()
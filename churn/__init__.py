@@ -0,0 +1 @@
+"""Módulos compartilhados entre o treino (churn_ecommerce.py) e o app (app.py)."""
@@ -0,0 +1,284 @@
+# ------------------------------------------------------------
+# Linha de comando: python -m churn <comando>
+# ------------------------------------------------------------
+
+import argparse
+import os
+import time
+
+from churn import dados, treino
+
+
+def comando_ingest(args):
+    inicio = time.perf_counter()
+    df = dados.converter_planilha(args.planilha, args.destino)
+    destino = args.destino or dados.caminho_convertido(args.planilha)
+    print(f"{len(df)} linhas convertidas para {destino} "
+          f"em {time.perf_counter() - inicio:.2f}s")
+
+
+def comando_score(args):
+    from churn import lote
+    from churn.compilado import carregar_modelo
+
+    compilado = carregar_modelo(args.modelo)
+    estatisticas = lote.pontuar_arquivo(
+        compilado,
+        args.entrada,
+        args.saida,
+        tamanho_bloco=args.chunk_size,
+        apenas_ativos=not args.todos,
+        workers=args.workers,
+        colunas=args.colunas,
+        indice=args.indice,
+    )
+    print(f"{args.saida}: {estatisticas}")
+    if args.indice:
+        print(f"Índice de pontuação em {args.indice}")
+
+
+def comando_query(args):
+    from churn.indice import SEGMENTOS, IndicePontuacao
+    from churn.tabela import ids_da_busca
+
+    ids, invalidos = ids_da_busca(" ".join(args.ids)) if args.ids else (None, [])
+    if invalidos:
+        raise SystemExit(f"IDs inválidos em --ids: {', '.join(invalidos)}")
+    inicio = time.perf_counter()
+    indice = IndicePontuacao.carregar(args.indice)
+    segmentos = {
+        coluna: getattr(args, nome) for nome, coluna in SEGMENTOS.items()
+        if getattr(args, nome)
+    }
+    posicoes = indice.consultar(
+        minimo=args.min,
+        maximo=args.max,
+        acoes=args.acao,
+        segmentos=segmentos,
+        ids=ids,
+        limite=args.top,
+    )
+    resultado = indice.resultado(posicoes)
+    milissegundos = (time.perf_counter() - inicio) * 1000
+    if args.saida:
+        from churn.lote import EscritorSaida
+
+        with EscritorSaida(args.saida) as escritor:
+            escritor.escrever(resultado)
+        print(f"{args.saida}: {len(resultado)} clientes em {milissegundos:.1f} ms")
+    else:
+        print(resultado.head(args.mostrar).to_string(index=False))
+        print(f"{len(resultado)} clientes em {milissegundos:.1f} ms")
+
+
+def comando_incremental(args):
+    from churn import incremental
+    from churn.compilado import carregar_modelo
+
+    compilado = carregar_modelo(args.modelo)
+    estatisticas = incremental.atualizar_pontuacao(
+        compilado,
+        args.entrada,
+        args.delta,
+        caminho_loja=args.loja,
+        tamanho_bloco=args.chunk_size,
+        forcar=args.completo,
+    )
+    print(f"{args.delta}: {estatisticas}")
+
+
+def comando_serve(args):
+    from churn import servico
+    from churn.compilado import carregar_modelo
+
+    compilado = carregar_modelo(args.modelo)
+    servico.servir(
+        compilado,
+        host=args.host,
+        porta=args.port,
+        max_lote=args.max_lote,
+        max_espera_ms=args.max_espera_ms,
+    )
+
+
+def comando_synth(args):
+    from churn import sintetico
+
+    compilado = None
+    if not args.sem_modelo:
+        from churn.compilado import carregar_modelo
+
+        compilado = carregar_modelo(args.modelo)
+    base = dados.carregar_dataset(args.planilha)
+    estatisticas = sintetico.gravar_clientes(
+        args.destino,
+        args.n,
+        base=base,
+        tamanho_bloco=args.chunk_size,
+        random_state=args.seed,
+        compilado=compilado,
+    )
+    print(f"{args.destino}: {estatisticas}")
+
+
+def comando_scorecard(args):
+    from churn import scorecard
+    from churn.compilado import carregar_modelo
+
+    compilado = carregar_modelo(args.modelo)
+    tabela = scorecard.tabela_scorecard(compilado)
+    if args.csv:
+        tabela.to_csv(args.csv, index=False, encoding="utf-8")
+        print(f"{args.csv}: {len(tabela)} linhas")
+    else:
+        print(tabela.to_string(index=False))
+    if args.verificar:
+        import pandas as pd
+
+        inicio = time.perf_counter()
+        df = dados.carregar_dataset(args.planilha)
+        diferenca = scorecard.verificar_scorecard(compilado, pd.read_pickle(args.pickle), df)
+        print(f"Scorecard = log_pipeline.predict_proba em {len(df)} linhas "
+              f"(diferença máxima {diferenca:.3g}, {time.perf_counter() - inicio:.2f}s)")
+
+
+def comando_train(args):
+    treino.treinar(args)
+
+
+def criar_parser():
+    from churn.regras import ACOES
+
+    parser = argparse.ArgumentParser(prog="python -m churn")
+    sub = parser.add_subparsers(dest="comando", required=True)
+
+    p_ingest = sub.add_parser(
+        "ingest", help="Converte a planilha de clientes para Parquet tipado"
+    )
+    p_ingest.add_argument("--planilha", default=dados.CAMINHO_PLANILHA)
+    p_ingest.add_argument("--destino", default=None,
+                          help="Arquivo Parquet de saída (padrão: ao lado da planilha)")
+    p_ingest.set_defaults(func=comando_ingest)
+
+    p_score = sub.add_parser(
+        "score", help="Pontua uma base de clientes e grava ID, probabilidade e ação"
+    )
+    p_score.add_argument("entrada", help="Base de clientes (.xlsx, .csv ou .parquet)")
+    p_score.add_argument("saida", help="Arquivo de saída (.parquet ou .csv)")
+    p_score.add_argument("--modelo", default="modelchurn.json",
+                         help="Artefato leve (.json) ou modelchurn.pkl")
+    p_score.add_argument("--chunk-size", type=int, default=100_000,
+                         help="Linhas por bloco (limita o pico de memória)")
+    p_score.add_argument("--workers", type=int, default=1,
+                         help="Processos de pontuação (blocos via memória compartilhada)")
+    p_score.add_argument("--colunas", nargs="+", default=None,
+                         help="Subconjunto das colunas de saída "
+                              "(ID do Cliente, Probabilidade Churn (%%), Ação Recomendada)")
+    p_score.add_argument("--todos", action="store_true",
+                         help="Pontua também clientes com Churn == 1")
+    p_score.add_argument("--indice", default=None, metavar="DIR",
+                         help="Grava também o índice de pontuação (consultas com `query`)")
+    p_score.set_defaults(func=comando_score)
+
+    p_query = sub.add_parser(
+        "query", help="Consulta o índice de pontuação por faixa de risco e segmento"
+    )
+    p_query.add_argument("indice", help="Diretório gravado por `score --indice`")
+    p_query.add_argument("--min", type=int, default=0, help="Probabilidade mínima (%%)")
+    p_query.add_argument("--max", type=int, default=100, help="Probabilidade máxima (%%)")
+    p_query.add_argument("--acao", nargs="+", default=None, choices=ACOES,
+                         help="Ações recomendadas")
+    p_query.add_argument("--pagamento", nargs="+", help="Método de Pagamento Preferido")
+    p_query.add_argument("--cidade", nargs="+", help="Nível da Cidade")
+    p_query.add_argument("--login", nargs="+", help="Dispositivo de Login Preferido")
+    p_query.add_argument("--categoria", nargs="+", help="Categoria de Pedido Preferida")
+    p_query.add_argument("--ids", nargs="+", default=None, help="IDs de clientes")
+    p_query.add_argument("--top", type=int, default=None,
+                         help="Só os N de maior risco")
+    p_query.add_argument("--saida", default=None,
+                         help="Grava o resultado (.parquet ou .csv) em vez de exibir")
+    p_query.add_argument("--mostrar", type=int, default=20,
+                         help="Linhas exibidas sem --saida")
+    p_query.set_defaults(func=comando_query)
+
+    p_incremental = sub.add_parser(
+        "incremental",
+        help="Repontua só clientes novos ou alterados e grava o delta de probabilidade/ação",
+    )
+    p_incremental.add_argument("entrada", help="Base de clientes (.xlsx, .csv ou .parquet)")
+    p_incremental.add_argument("delta", help="Arquivo do delta (.parquet ou .csv)")
+    p_incremental.add_argument("--loja", default=os.path.join(".cache", "pontuacao.parquet"),
+                               help="Hash das entradas e última pontuação por cliente")
+    p_incremental.add_argument("--modelo", default="modelchurn.json",
+                               help="Artefato leve (.json) ou modelchurn.pkl")
+    p_incremental.add_argument("--chunk-size", type=int, default=100_000,
+                               help="Linhas por bloco (limita o pico de memória)")
+    p_incremental.add_argument("--completo", action="store_true",
+                               help="Repontua todos os clientes ativos")
+    p_incremental.set_defaults(func=comando_incremental)
+
+    p_serve = sub.add_parser(
+        "serve", help="Serviço HTTP de pontuação (JSON) com micro-lotes"
+    )
+    p_serve.add_argument("--host", default="127.0.0.1")
+    p_serve.add_argument("--port", type=int, default=8000,
+                         help="Porta (0 escolhe uma porta livre)")
+    p_serve.add_argument("--modelo", default="modelchurn.json",
+                         help="Artefato leve (.json) ou modelchurn.pkl")
+    p_serve.add_argument("--max-lote", type=int, default=512,
+                         help="Linhas por micro-lote de pontuação")
+    p_serve.add_argument("--max-espera-ms", type=float, default=1.0,
+                         help="Espera máxima por mais pedidos antes de pontuar o lote")
+    p_serve.set_defaults(func=comando_serve)
+
+    p_synth = sub.add_parser(
+        "synth", help="Gera clientes sintéticos com o esquema da planilha"
+    )
+    p_synth.add_argument("n", type=lambda valor: int(float(valor)),
+                         help="Número de clientes (aceita 1e7)")
+    p_synth.add_argument("destino", help="Arquivo de saída (.parquet ou .csv)")
+    p_synth.add_argument("--planilha", default=dados.CAMINHO_PLANILHA,
+                         help="Base em que as distribuições são ajustadas")
+    p_synth.add_argument("--modelo", default="modelchurn.json",
+                         help="Modelo que sorteia o rótulo Churn")
+    p_synth.add_argument("--sem-modelo", action="store_true",
+                         help="Sorteia o Churn pela taxa da planilha, sem o modelo")
+    p_synth.add_argument("--chunk-size", type=int, default=500_000,
+                         help="Linhas por bloco (limita o pico de memória)")
+    p_synth.add_argument("--seed", type=int, default=42)
+    p_synth.set_defaults(func=comando_synth)
+
+    p_scorecard = sub.add_parser(
+        "scorecard", help="Mostra o scorecard (peso por faixa/nível) e confere com o pipeline"
+    )
+    p_scorecard.add_argument("--modelo", default="modelchurn.json",
+                             help="Artefato leve (.json) ou modelchurn.pkl")
+    p_scorecard.add_argument("--csv", default=None, help="Grava a tabela em CSV")
+    p_scorecard.add_argument("--verificar", action="store_true",
+                             help="Confere contra log_pipeline.predict_proba na base inteira")
+    p_scorecard.add_argument("--pickle", default="modelchurn.pkl",
+                             help="Pipelines usados na conferência")
+    p_scorecard.add_argument("--planilha", default=dados.CAMINHO_PLANILHA,
+                             help="Base usada na conferência")
+    p_scorecard.set_defaults(func=comando_scorecard)
+
+    p_train = sub.add_parser(
+        "train", help="Treina os modelos em etapas, reaproveitando o cache de etapas"
+    )
+    treino.adicionar_argumentos(p_train)
+    p_train.set_defaults(func=comando_train)
+
+    return parser
+
+
+def main(argv=None):
+    from churn.instrumentacao import gravar_trace
+
+    args = criar_parser().parse_args(argv)
+    args.func(args)
+    # Intervalos medidos no comando (só com CHURN_TRACE)
+    gravar_trace()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,196 @@
+# ============================================================
+# Micro-lotes: pedidos simultâneos de pontuação em uma única chamada
+# ============================================================
+# Pontuar um cliente por vez paga o custo fixo de cada chamada (camadas
+# do pipeline no predict_proba; alocações e laços por variável no modelo
+# compilado) para uma única linha. O agrupador recebe pedidos de vários
+# chamadores, junta os que estão pendentes e pontua todos em uma
+# chamada; cada pedido recebe a sua fatia do resultado por um futuro.
+#
+# A política de lotes (FilaLotes) é uma só:
+#   - um pedido isolado é pontuado assim que chega (sem espera);
+#   - havendo outros pendentes, espera até `max_espera_ms` por mais
+#     pedidos, até juntar `max_lote` linhas;
+#   - enquanto um lote é pontuado, os pedidos que chegam formam o
+#     próximo lote.
+# Ela é usada por duas frentes:
+#   - AgrupadorPontuacao (este módulo): uma thread de trabalho atende
+#     pedidos de várias threads (sessões do Streamlit) com
+#     concurrent.futures.Future;
+#   - AgrupadorLotes (churn/servico.py): o lote é montado no loop de
+#     eventos do serviço HTTP, com asyncio.Future (sem trocar de thread
+#     a cada pedido).
+#
+# Uso:
+#   agrupador = AgrupadorPontuacao(compilado.pontuar_matriz)
+#   proba = agrupador.pontuar(compilado.codificar_linha(linha))[0]
+#
+#   # pipeline sklearn (DataFrames de uma linha)
+#   agrupador = AgrupadorPontuacao(lambda df: pipeline.predict_proba(df)[:, 1],
+#                                  juntar=lambda partes: pd.concat(partes, ignore_index=True))
+
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+import numpy as np
+
+from churn.instrumentacao import intervalo
+
+MAX_LOTE = 512
+MAX_ESPERA_MS = 1.0
+
+
+def _iniciar(futuro):
+    """Marca o futuro como em execução; False se o pedido foi cancelado.
+
+    concurrent.futures.Future passa a RUNNING; asyncio.Future não tem esse
+    estado (cancelado = conexão encerrada antes do lote).
+    """
+    iniciar = getattr(futuro, "set_running_or_notify_cancel", None)
+    return iniciar() if iniciar is not None else not futuro.done()
+
+
+class FilaLotes:
+    """Política de micro-lotes comum às frentes com thread e com asyncio.
+
+    Guarda os pedidos pendentes (entrada, futuro), monta cada lote (até
+    `max_lote` linhas, na ordem de chegada), decide se vale esperar por
+    mais pedidos, pontua o lote, entrega a fatia de cada pedido e conta
+    os lotes. Não sincroniza nada: quem a usa garante um chamador por vez
+    (a Condition da thread de trabalho ou o loop de eventos).
+    """
+
+    def __init__(self, pontuar, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS,
+                 juntar=np.concatenate, nome="agrupador", categoria="churn"):
+        # pontuar(lote) -> probabilidades, uma por linha do lote
+        self._funcao = pontuar
+        self._juntar = juntar
+        self.max_lote = max_lote
+        self.max_espera = max_espera_ms / 1000
+        self.nome = nome
+        self.categoria = categoria
+        self.pendentes = deque()
+        self.lotes = 0
+        self.linhas = 0
+        self.maior_lote = 0
+
+    def adicionar(self, entrada, futuro):
+        self.pendentes.append((entrada, futuro))
+
+    def drenar(self, pedidos, linhas=0):
+        """Move pendentes para `pedidos` até `max_lote` linhas; devolve o total de linhas."""
+        while linhas < self.max_lote and self.pendentes:
+            pedido = self.pendentes.popleft()
+            pedidos.append(pedido)
+            linhas += len(pedido[0])
+        return linhas
+
+    def esperar_mais(self, pedidos, linhas):
+        """Se vale esperar `max_espera` por mais pedidos antes de pontuar o lote.
+
+        Só há espera com pedidos simultâneos: um pedido isolado é pontuado
+        sem atraso.
+        """
+        return len(pedidos) > 1 and linhas < self.max_lote and self.max_espera > 0
+
+    def pontuar(self, pedidos):
+        """Pontua o lote e entrega a cada futuro a sua fatia (ou o erro)."""
+        # Pedidos cancelados antes de começar ficam fora do lote
+        pedidos = [(entrada, futuro) for entrada, futuro in pedidos if _iniciar(futuro)]
+        if not pedidos:
+            return
+        linhas = sum(len(entrada) for entrada, _ in pedidos)
+        try:
+            with intervalo(f"{self.nome}:lote", linhas=linhas, categoria=self.categoria,
+                           pedidos=len(pedidos)):
+                entradas = [entrada for entrada, _ in pedidos]
+                lote = entradas[0] if len(entradas) == 1 else self._juntar(entradas)
+                proba = np.asarray(self._funcao(lote))
+        except Exception as erro:
+            for _, futuro in pedidos:
+                if not futuro.done():
+                    futuro.set_exception(erro)
+            return
+        self.lotes += 1
+        self.linhas += linhas
+        self.maior_lote = max(self.maior_lote, linhas)
+        inicio = 0
+        for entrada, futuro in pedidos:
+            # asyncio: a conexão pode ter cancelado o futuro durante o lote
+            if not futuro.done():
+                futuro.set_result(proba[inicio:inicio + len(entrada)])
+            inicio += len(entrada)
+
+    def estatisticas(self):
+        return {
+            "lotes": self.lotes,
+            "linhas_por_lote": self.linhas / self.lotes if self.lotes else 0.0,
+            "maior_lote": self.maior_lote,
+        }
+
+
+class AgrupadorPontuacao:
+    """Fila de pedidos de pontuação atendida em micro-lotes por uma thread."""
+
+    def __init__(self, pontuar, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS,
+                 juntar=np.concatenate, nome="agrupador"):
+        self.fila = FilaLotes(pontuar, max_lote, max_espera_ms, juntar, nome)
+        self.nome = nome
+        self._condicao = threading.Condition()
+        self._thread = None
+        self._encerrado = False
+
+    def submeter(self, entrada):
+        """Future com as probabilidades das linhas de `entrada` (matriz ou DataFrame)."""
+        futuro = Future()
+        with self._condicao:
+            if self._encerrado:
+                raise RuntimeError(f"{self.nome} encerrado")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._executar, name=self.nome, daemon=True)
+                self._thread.start()
+            self.fila.adicionar(entrada, futuro)
+            self._condicao.notify()
+        return futuro
+
+    def pontuar(self, entrada, timeout=None):
+        """Probabilidades das linhas de `entrada` (bloqueia até o lote ser pontuado)."""
+        return self.submeter(entrada).result(timeout)
+
+    def encerrar(self):
+        """Pontua o que está pendente e para a thread de trabalho."""
+        with self._condicao:
+            self._encerrado = True
+            self._condicao.notify()
+        if self._thread is not None:
+            self._thread.join()
+
+    def estatisticas(self):
+        # Contadores escritos só pela thread de trabalho
+        return self.fila.estatisticas()
+
+    # --------------------------------------------------------
+    # Thread de trabalho
+    # --------------------------------------------------------
+
+    def _executar(self):
+        fila = self.fila
+        while True:
+            with self._condicao:
+                while not fila.pendentes and not self._encerrado:
+                    self._condicao.wait()
+                if not fila.pendentes:
+                    return
+                pedidos = []
+                linhas = fila.drenar(pedidos)
+                if fila.esperar_mais(pedidos, linhas):
+                    prazo = time.perf_counter() + fila.max_espera
+                    while linhas < fila.max_lote and not self._encerrado:
+                        restante = prazo - time.perf_counter()
+                        if restante <= 0:
+                            break
+                        self._condicao.wait(restante)
+                        linhas = fila.drenar(pedidos, linhas)
+            fila.pontuar(pedidos)
@@ -0,0 +1,205 @@
+# ============================================================
+# Busca de hiperparâmetros paralela e com orçamento
+# ============================================================
+# O paralelismo fica no nível da busca (candidatos x folds), não dentro
+# do estimador: cada ajuste usa um núcleo (n_jobs=1 nos ensembles, como o
+# Random Forest) e a busca distribui os ajustes entre todos os núcleos.
+#
+# Modos:
+#   grid     -> todas as combinações (GridSearchCV, como no projeto original)
+#   random   -> amostra aleatória de combinações
+#   halving  -> successive halving (candidatos ruins são descartados
+#               cedo, com poucos dados; os bons recebem a base inteira)
+# Os modos grid/random aceitam orçamento por nº de ajustes e/ou tempo;
+# o halving define sozinho os recursos de cada rodada e não aceita orçamento.
+
+import time
+
+import numpy as np
+import pandas as pd
+from sklearn.model_selection import (
+    GridSearchCV,
+    ParameterGrid,
+    ParameterSampler,
+    check_cv,
+)
+# BaseSearchCV não é API pública: a versão do sklearn fica fixada no
+# requirements.txt e tests/test_busca.py confere a busca contra o GridSearchCV
+from sklearn.model_selection._search import BaseSearchCV
+
+MODOS_BUSCA = ["grid", "random", "halving"]
+
+
+class BuscaComOrcamento(BaseSearchCV):
+    """Busca em grade/aleatória que para ao atingir um orçamento.
+
+    Os candidatos são avaliados em lotes de `lote` combinações (todas as
+    combinações x folds de um lote rodam em paralelo). `max_ajustes`
+    limita o total de ajustes (candidatos x folds): são avaliados
+    max_ajustes // folds candidatos, arredondando para baixo, e um valor
+    menor que o nº de folds é recusado. `orcamento_segundos` limita o
+    tempo de parede: é conferido antes de cada lote, e o lote padrão é
+    uma rodada de ajustes paralelos (núcleos // folds candidatos), então
+    o orçamento é excedido em no máximo o tempo de uma rodada. O
+    primeiro lote roda sempre, para haver um best_estimator_. Os
+    resultados (cv_results_, best_estimator_, ...) seguem o formato do
+    GridSearchCV.
+    """
+
+    def __init__(self, estimator, param_grid, *, amostragem="grid", n_iter=None,
+                 max_ajustes=None, orcamento_segundos=None, lote=None,
+                 random_state=None, scoring=None, n_jobs=None, refit=True, cv=None,
+                 verbose=0, pre_dispatch="2*n_jobs", error_score=np.nan,
+                 return_train_score=False):
+        super().__init__(
+            estimator=estimator, scoring=scoring, n_jobs=n_jobs, refit=refit, cv=cv,
+            verbose=verbose, pre_dispatch=pre_dispatch, error_score=error_score,
+            return_train_score=return_train_score,
+        )
+        self.param_grid = param_grid
+        self.amostragem = amostragem
+        self.n_iter = n_iter
+        self.max_ajustes = max_ajustes
+        self.orcamento_segundos = orcamento_segundos
+        self.lote = lote
+        self.random_state = random_state
+
+    def _candidatos(self):
+        grade = ParameterGrid(self.param_grid)
+        if self.amostragem == "grid":
+            return list(grade)
+        n_iter = min(self.n_iter or len(grade), len(grade))
+        return list(ParameterSampler(self.param_grid, n_iter, random_state=self.random_state))
+
+    def _run_search(self, evaluate_candidates):
+        candidatos = self._candidatos()
+        n_folds = check_cv(self.cv).get_n_splits()
+        if self.max_ajustes is not None:
+            if self.max_ajustes < n_folds:
+                raise ValueError(
+                    f"max_ajustes={self.max_ajustes} não cobre um candidato "
+                    f"({n_folds} folds): use pelo menos {n_folds}"
+                )
+            candidatos = candidatos[:self.max_ajustes // n_folds]
+
+        lote = self.lote or max(1, _nucleos(self.n_jobs) // n_folds)
+        inicio = time.perf_counter()
+        self.candidatos_avaliados_ = 0
+        for i in range(0, len(candidatos), lote):
+            if (self.orcamento_segundos is not None and i > 0
+                    and time.perf_counter() - inicio >= self.orcamento_segundos):
+                break
+            evaluate_candidates(candidatos[i:i + lote])
+            self.candidatos_avaliados_ += len(candidatos[i:i + lote])
+        self.orcamento_esgotado_ = self.candidatos_avaliados_ < len(self._candidatos())
+
+
+def _nucleos(n_jobs):
+    from joblib import effective_n_jobs
+
+    return max(1, effective_n_jobs(n_jobs))
+
+
+def criar_busca(estimador, parametros, modo="grid", cv=3, scoring="roc_auc",
+                n_jobs=-1, max_ajustes=None, orcamento_segundos=None,
+                random_state=42, verbose=0):
+    """Cria a busca de hiperparâmetros no modo escolhido.
+
+    O paralelismo interno dos ensembles (n_jobs do Random Forest) é
+    desligado numa cópia do estimador: com `n_jobs` na busca, os núcleos
+    ficam com os ajustes independentes (candidatos x folds), que escalam
+    melhor que as árvores de um único ajuste. Os demais estimadores
+    (ex.: a regressão logística, cujo n_jobs não tem efeito) ficam como
+    estão.
+    """
+    from sklearn.base import clone
+
+    if modo not in MODOS_BUSCA:
+        raise ValueError(f"Modo de busca inválido: {modo} (opções: {MODOS_BUSCA})")
+
+    estimador = clone(estimador)
+    if {"n_jobs", "n_estimators"} <= estimador.get_params().keys():
+        estimador.set_params(n_jobs=1)
+
+    if modo == "halving":
+        if max_ajustes is not None or orcamento_segundos is not None:
+            raise ValueError(
+                "O modo halving não aceita orçamento (max_ajustes/orcamento_segundos): "
+                "use o modo grid ou random"
+            )
+        # Successive halving ainda é experimental no sklearn
+        from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+        from sklearn.model_selection import HalvingGridSearchCV
+
+        return HalvingGridSearchCV(
+            estimador, parametros, cv=cv, scoring=scoring, n_jobs=n_jobs,
+            factor=3, random_state=random_state, verbose=verbose,
+        )
+
+    if modo == "grid" and max_ajustes is None and orcamento_segundos is None:
+        return GridSearchCV(
+            estimador, parametros, cv=cv, scoring=scoring, n_jobs=n_jobs,
+            verbose=verbose,
+        )
+
+    return BuscaComOrcamento(
+        estimador, parametros,
+        amostragem="random" if modo == "random" else "grid",
+        max_ajustes=max_ajustes,
+        orcamento_segundos=orcamento_segundos,
+        random_state=random_state,
+        cv=cv, scoring=scoring, n_jobs=n_jobs, verbose=verbose,
+    )
+
+
+def tempos_candidatos(busca):
+    """Tempo de ajuste e score de cada candidato avaliado na busca."""
+    resultados = pd.DataFrame(busca.cv_results_)
+    n_folds = busca.n_splits_
+    tempos = pd.DataFrame({
+        "parametros": resultados["params"].astype(str),
+        "tempo_ajuste_s": resultados["mean_fit_time"] * n_folds,
+        "tempo_score_s": resultados["mean_score_time"] * n_folds,
+        "score_medio": resultados["mean_test_score"],
+        "rank": resultados["rank_test_score"],
+    })
+    if "iter" in resultados:
+        # successive halving: rodada e nº de amostras usadas no ajuste
+        tempos["rodada"] = resultados["iter"]
+        tempos["amostras"] = resultados["n_resources"]
+    return tempos.sort_values("rank").reset_index(drop=True)
+
+
+def sem_busca(pipeline, nome="Modelo"):
+    """Pipeline com a busca (último passo) trocada pelo seu best_estimator_.
+
+    O best_estimator_ já foi reajustado na base inteira pela busca: as
+    previsões são as mesmas, sem cv_results_, sem o estimador-modelo não
+    ajustado e sem a camada de delegação da busca a cada predict_proba.
+    """
+    from sklearn.pipeline import Pipeline
+
+    *passos, (_, busca) = pipeline.steps
+    return Pipeline([*passos, (nome, busca.best_estimator_)])
+
+
+def resultados_busca(busca):
+    """Resumo da busca em tipos nativos (serializável em JSON)."""
+    resultados = pd.DataFrame(busca.cv_results_)
+    colunas = ["mean_test_score", "std_test_score", "rank_test_score",
+               "mean_fit_time", "mean_score_time"]
+    if "iter" in resultados:
+        colunas += ["iter", "n_resources"]
+    candidatos = [
+        {"params": params, **{c: resultados[c].iloc[i].item() for c in colunas}}
+        for i, params in enumerate(resultados["params"])
+    ]
+    return {
+        "busca": type(busca).__name__,
+        "estimador": type(busca.estimator).__name__,
+        "scoring": busca.scoring,
+        "n_splits": busca.n_splits_,
+        "melhores_parametros": busca.best_params_,
+        "melhor_score": float(busca.best_score_),
+        "candidatos": candidatos,
+    }
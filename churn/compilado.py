@@ -0,0 +1,511 @@
+# ============================================================
+# Modelo compilado: pontuação sem pandas/sklearn/feature_engine
+# ============================================================
+# Depois da discretização por árvore + OneHot, a regressão logística é
+# uma soma de pesos: cada variável numérica cai em um bin (busca nos
+# limites do DecisionTreeDiscretiser) e cada bin/dummy ativa uma
+# posição do vetor de coeficientes. O pipeline ajustado é "compilado"
+# em uma tabela de pesos por variável: pontuar N clientes custa um
+# searchsorted por variável discretizada, um gather na tabela de pesos
+# por variável e uma sigmoide, só com NumPy.
+#
+# Artefato leve (modelchurn.json): o scorecard, legível. Para cada
+# variável, as faixas (limites dos bins) ou os níveis e o peso de cada
+# um, além do intercepto e das medianas de imputação (ver também
+# modelchurn_scorecard.csv e `python -m churn scorecard`). Carregá-lo
+# só precisa de NumPy; o app não importa sklearn, feature_engine nem
+# desserializa o GridSearchCV do modelchurn.pkl.
+
+import hashlib
+import json
+import os
+
+import numpy as np
+
+from churn.formulas import COLUNAS_ORIGEM, FEATURES_DERIVADAS, calcular_derivadas
+
+# Versão do formato do artefato leve (muda se os campos mudarem):
+# 1 = posições no vetor de coeficientes; 2 = scorecard (pesos por faixa/nível)
+FORMATO_LEVE = 2
+# Versão do modelchurn.pkl: 1 = pipelines com o GridSearchCV (sem o campo
+# "formato"); 2 = pipelines com o best_estimator_ no passo "Modelo"
+FORMATO_PICKLE = 2
+# Entradas booleanas na base (dados.ajustar_tipos): true/false valem 1/0.
+# Nas demais colunas numéricas um booleano é recusado no modo estrito
+ENTRADAS_BOOLEANAS = {"Reclamação"}
+# Inteiros acima disso não são representados exatamente em float64
+LIMITE_INTEIRO = 2 ** 53
+
+
+def _sigmoide(z):
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def faixas_bins(limites):
+    """Rótulos legíveis dos bins definidos pelos limites internos (x <= limite)."""
+    if not len(limites):
+        return ["todos"]
+    texto = [f"{limite:.6g}" for limite in limites]
+    return ([f"<= {texto[0]}"]
+            + [f"{a} < x <= {b}" for a, b in zip(texto[:-1], texto[1:])]
+            + [f"> {texto[-1]}"])
+
+
+def _chave_nivel(valor):
+    """Chave de busca de um nível categórico.
+
+    Números e textos numéricos viram float: "3", 3 e 3.0 encontram o
+    mesmo nível, seja ele guardado como inteiro ou como texto.
+    """
+    if isinstance(valor, str):
+        try:
+            return float(valor)
+        except ValueError:
+            return valor
+    if isinstance(valor, (int, float, np.number)) and not isinstance(valor, bool):
+        return float(valor)
+    return valor
+
+
+def _numeros_validos(colunas, valores):
+    """Caminho rápido do modo estrito: nenhum valor precisa de conversão ou é inválido."""
+    return all(
+        valor is None
+        or (type(valor) is float and valor - valor == 0)  # NaN e infinito falham
+        or (type(valor) is int and -LIMITE_INTEIRO <= valor <= LIMITE_INTEIRO)
+        or (type(valor) is bool and coluna in ENTRADAS_BOOLEANAS)
+        for coluna, valor in zip(colunas, valores)
+    )
+
+
+def _numero(coluna, valor):
+    """Valor numérico de uma entrada JSON (None = ausente); levanta ValueError se inválido."""
+    if valor is None:
+        return np.nan
+    if isinstance(valor, bool) and coluna in ENTRADAS_BOOLEANAS:
+        return float(valor)
+    if isinstance(valor, bool) or not isinstance(valor, (int, float, str)):
+        raise ValueError(f"{coluna}: esperado um número, recebido {valor!r}")
+    try:
+        numero = float(valor)
+    except (ValueError, OverflowError):
+        raise ValueError(f"{coluna}: esperado um número finito, recebido {valor!r}") from None
+    if not np.isfinite(numero):
+        raise ValueError(f"{coluna}: esperado um número finito, recebido {valor!r}")
+    return numero
+
+
+class ModeloCompilado:
+    """Forma compilada do pipeline completo (linhas cruas -> probabilidade).
+
+    Layout da matriz de entrada (uma linha por cliente, float64):
+    colunas numéricas cruas (`entradas`), features derivadas e, por fim,
+    os códigos das variáveis categóricas (-1 = nível desconhecido).
+    """
+
+    def __init__(self, entradas, categorias, medianas, discretizadas,
+                 dummies, lineares, coef, intercepto):
+        self.entradas = list(entradas)
+        self.categorias = {var: list(niveis) for var, niveis in categorias.items()}
+        self.colunas = self.entradas + FEATURES_DERIVADAS + list(self.categorias)
+        self.posicao = {coluna: i for i, coluna in enumerate(self.colunas)}
+
+        # {coluna: mediana} para imputação após as features derivadas
+        self.medianas = dict(medianas)
+        # {variável: (limites internos ordenados, posição no coef por bin)}
+        self.discretizadas = {
+            var: (np.asarray(limites, dtype=np.float64), np.asarray(indices, dtype=np.intp))
+            for var, (limites, indices) in discretizadas.items()
+        }
+        # {variável categórica: posição no coef por código (último = desconhecido)}
+        self.dummies = {
+            var: np.asarray(indices, dtype=np.intp) for var, indices in dummies.items()
+        }
+        # {coluna: posição no coef} para colunas que entram sem transformação
+        self.lineares = dict(lineares)
+        # Vetor denso de coeficientes com um zero no fim: a posição -1
+        # representa "nenhuma coluna ativa" sem precisar de desvio
+        self.coef = np.append(np.asarray(coef, dtype=np.float64), 0.0)
+        self.intercepto = float(intercepto)
+        self._montar_tabelas()
+
+    def __setstate__(self, estado):
+        # Objetos gravados no modelchurn.pkl por versões anteriores da classe
+        self.__dict__.update(estado)
+        self._montar_tabelas()
+
+    def _montar_tabelas(self):
+        # Colunas aceitas pela codificação estrita
+        self._aceitas = frozenset(self.entradas) | frozenset(self.categorias)
+        self._codigos = {
+            var: {_chave_nivel(nivel): j for j, nivel in enumerate(niveis)}
+            for var, niveis in self.categorias.items()
+        }
+        self._imputar = [
+            (self.posicao[coluna], mediana) for coluna, mediana in self.medianas.items()
+            if coluna in self.posicao
+        ]
+        # Tabelas de peso por bin/nível (coef já indexado): a pontuação faz
+        # um gather por variável em vez de dois
+        self._pesos_bins = [
+            (self.posicao[var], limites, self.coef[indices])
+            for var, (limites, indices) in self.discretizadas.items()
+        ]
+        self._pesos_niveis = [
+            (self.posicao[var], self.coef[indices]) for var, indices in self.dummies.items()
+        ]
+        self._pesos_lineares = [
+            (self.posicao[coluna], self.coef[i]) for coluna, i in self.lineares.items()
+        ]
+
+    # --------------------------------------------------------
+    # Compilação a partir do pipeline ajustado
+    # --------------------------------------------------------
+
+    @classmethod
+    def de_pipeline(cls, pipeline_completo):
+        passos = pipeline_completo.named_steps
+        imputar = passos["Imputar"]
+        codificar = passos["Codificar"]
+        discretizar = passos["Discretizar"]
+        onehot = passos["OneHot"]
+        # Passo "Modelo" (formato 2) ou a busca inteira em "Grid" (formato 1)
+        modelo = passos["Modelo"] if "Modelo" in passos else passos["Grid"]
+        modelo = getattr(modelo, "best_estimator_", modelo)
+
+        nomes_coef = list(modelo.feature_names_in_)
+        posicao_coef = {nome: i for i, nome in enumerate(nomes_coef)}
+
+        discretizadas = {}
+        for var in discretizar.variables_:
+            limites = np.asarray(discretizar.binner_dict_[var], dtype=np.float64)[1:-1]
+            # pd.cut(..., labels=False) numera os bins de 0 a len(limites)
+            indices = [
+                posicao_coef.get(f"{var}_{b}", -1) if b in onehot.encoder_dict_[var] else -1
+                for b in range(len(limites) + 1)
+            ]
+            discretizadas[var] = (limites, indices)
+
+        # Dummies: código do nível -> posição da coluna dummy no coef
+        dummies, categorias = {}, {}
+        dummies_usadas = set()
+        for var, (tabela, posicoes) in codificar.tabelas_.items():
+            niveis = codificar.categorias[var]
+            indices = np.full(len(niveis) + 1, -1, dtype=np.intp)
+            for j in range(len(niveis)):
+                ativas = np.flatnonzero(tabela[j])
+                if len(ativas):
+                    nome = codificar.features[posicoes[ativas[0]]]
+                    indices[j] = posicao_coef[nome]
+                    dummies_usadas.add(nome)
+            dummies[var] = indices
+            categorias[var] = niveis
+
+        lineares = {
+            nome: i for nome, i in posicao_coef.items()
+            if nome in codificar.features and nome not in dummies_usadas
+            and nome not in discretizadas
+        }
+
+        derivadas = set(FEATURES_DERIVADAS)
+        entradas = [c for c in COLUNAS_ORIGEM]
+        for nome in list(discretizadas) + list(lineares):
+            if nome not in derivadas and nome not in entradas:
+                entradas.append(nome)
+
+        medianas = dict(zip(imputar.colunas, imputar.medianas_))
+
+        return cls(
+            entradas=entradas,
+            categorias=categorias,
+            medianas=medianas,
+            discretizadas=discretizadas,
+            dummies=dummies,
+            lineares=lineares,
+            coef=modelo.coef_[0],
+            intercepto=modelo.intercept_[0],
+        )
+
+    # --------------------------------------------------------
+    # Artefato leve (JSON)
+    # --------------------------------------------------------
+
+    def para_dict(self):
+        """Scorecard em tipos nativos do Python (serializável em JSON).
+
+        `variaveis` segue a ordem da soma na pontuação: discretizadas
+        (faixas, limites e peso de cada bin), categóricas (peso de cada
+        nível e do nível desconhecido) e colunas lineares.
+        """
+        variaveis = {}
+        for var, (limites, indices) in self.discretizadas.items():
+            variaveis[var] = {
+                "tipo": "bins",
+                "faixas": faixas_bins(limites),
+                "limites": limites.tolist(),
+                "pesos": self.coef[indices].tolist(),
+            }
+        for var, indices in self.dummies.items():
+            variaveis[var] = {
+                "tipo": "niveis",
+                "niveis": self.categorias[var],
+                "pesos": self.coef[indices[:-1]].tolist(),
+                "peso_desconhecido": float(self.coef[indices[-1]]),
+            }
+        for coluna, i in self.lineares.items():
+            variaveis[coluna] = {"tipo": "linear", "peso": float(self.coef[i])}
+        return {
+            "formato": FORMATO_LEVE,
+            "intercepto": self.intercepto,
+            "entradas": self.entradas,
+            "medianas": {coluna: float(m) for coluna, m in self.medianas.items()},
+            "variaveis": variaveis,
+        }
+
+    @classmethod
+    def de_dict(cls, dados):
+        formato = dados.get("formato")
+        if formato == 1:
+            return cls(
+                entradas=dados["entradas"],
+                categorias=dados["categorias"],
+                medianas=dados["medianas"],
+                discretizadas={
+                    var: (d["limites"], d["indices"]) for var, d in dados["discretizadas"].items()
+                },
+                dummies=dados["dummies"],
+                lineares=dados["lineares"],
+                coef=dados["coef"],
+                intercepto=dados["intercepto"],
+            )
+        if formato != FORMATO_LEVE:
+            raise ValueError(
+                f"Formato de modelo não suportado: {formato} (esperado {FORMATO_LEVE})"
+            )
+
+        # Scorecard: cada peso ganha uma posição no vetor de coeficientes
+        coef = []
+
+        def alocar(pesos):
+            inicio = len(coef)
+            coef.extend(pesos)
+            return list(range(inicio, len(coef)))
+
+        categorias, discretizadas, dummies, lineares = {}, {}, {}, {}
+        for var, d in dados["variaveis"].items():
+            if d["tipo"] == "bins":
+                discretizadas[var] = (d["limites"], alocar(d["pesos"]))
+            elif d["tipo"] == "niveis":
+                categorias[var] = d["niveis"]
+                dummies[var] = alocar(d["pesos"] + [d["peso_desconhecido"]])
+            else:
+                lineares[var] = alocar([d["peso"]])[0]
+        return cls(
+            entradas=dados["entradas"],
+            categorias=categorias,
+            medianas=dados["medianas"],
+            discretizadas=discretizadas,
+            dummies=dummies,
+            lineares=lineares,
+            coef=coef,
+            intercepto=dados["intercepto"],
+        )
+
+    def salvar(self, caminho):
+        """Grava o artefato leve (JSON; floats com repr exato)."""
+        temporario = caminho + ".tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump(self.para_dict(), f, ensure_ascii=False, indent=1)
+        os.replace(temporario, caminho)
+
+    def versao(self):
+        """sha1 dos parâmetros do modelo: muda sempre que o modelo muda."""
+        texto = json.dumps(self.para_dict(), sort_keys=True)
+        return hashlib.sha1(texto.encode()).hexdigest()
+
+    @classmethod
+    def carregar(cls, caminho):
+        with open(caminho, encoding="utf-8") as f:
+            return cls.de_dict(json.load(f))
+
+    # --------------------------------------------------------
+    # Montagem da matriz de entrada
+    # --------------------------------------------------------
+
+    def codificar(self, df, saida=None):
+        """Monta a matriz de entrada a partir de um DataFrame cru.
+
+        Colunas numéricas ausentes ficam como NaN (imputadas pela mediana).
+        `saida` permite reaproveitar uma matriz já alocada.
+        """
+        import pandas as pd
+
+        n = len(df)
+        if saida is None:
+            saida = np.empty((n, len(self.colunas)), dtype=np.float64)
+        for coluna in self.entradas:
+            j = self.posicao[coluna]
+            if coluna in df:
+                saida[:n, j] = df[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+            else:
+                saida[:n, j] = np.nan
+        for var, niveis in self.categorias.items():
+            saida[:n, self.posicao[var]] = pd.Categorical(df[var], categories=niveis).codes
+        return saida[:n]
+
+    def codificar_linha(self, linha):
+        """Matriz 1 x k a partir de um dicionário {coluna: valor}."""
+        return self.codificar_linhas([linha])
+
+    def codificar_linhas(self, linhas, estrito=False, ignoradas=()):
+        """Matriz n x k a partir de uma lista de dicionários {coluna: valor}.
+
+        Colunas numéricas ausentes ou None ficam como NaN (imputadas pela
+        mediana); categóricas ausentes ou None usam o peso do nível
+        desconhecido. Níveis numéricos são comparados pelo valor ("3"
+        encontra o nível 3). Valores não numéricos levantam
+        ValueError/TypeError.
+
+        Com `estrito` (entradas externas, ex.: o serviço HTTP), níveis
+        desconhecidos, booleanos fora de ENTRADAS_BOOLEANAS, números não
+        finitos (NaN, 1e400) e colunas fora de `entradas` e `categorias`
+        (ex.: nome digitado errado, que seria imputado pela mediana) também
+        levantam ValueError em vez de serem aceitos; `ignoradas` são
+        colunas extras permitidas (ex.: o ID do cliente).
+        """
+        matriz = np.full((len(linhas), len(self.colunas)), np.nan)
+        n_entradas = len(self.entradas)
+        inicio_categorias = len(self.colunas) - len(self.categorias)
+        aceitas = self._aceitas.union(ignoradas) if ignoradas else self._aceitas
+        for i, linha in enumerate(linhas):
+            if estrito and not aceitas.issuperset(linha):
+                desconhecidas = sorted(map(str, set(linha) - aceitas))
+                raise ValueError(f"colunas desconhecidas: {', '.join(desconhecidas)} "
+                                 f"(colunas válidas: {', '.join(sorted(aceitas))})")
+            valores = [linha.get(coluna) for coluna in self.entradas]
+            if estrito and not _numeros_validos(self.entradas, valores):
+                # Converte textos numéricos e booleanos permitidos ou levanta ValueError
+                valores = [_numero(c, v) for c, v in zip(self.entradas, valores)]
+            matriz[i, :n_entradas] = valores
+            matriz[i, inicio_categorias:] = [
+                self._codigo_nivel(var, linha.get(var), estrito) for var in self.categorias
+            ]
+        return matriz
+
+    def _codigo_nivel(self, var, valor, estrito):
+        if valor is None:
+            return -1
+        niveis = self._codigos[var]
+        codigo = niveis.get(valor)
+        if codigo is None:
+            codigo = niveis.get(_chave_nivel(valor))
+        if codigo is not None and not (estrito and isinstance(valor, bool)):
+            return codigo
+        if estrito:
+            raise ValueError(f"{var}: nível desconhecido {valor!r} "
+                             f"(níveis: {', '.join(map(str, self.categorias[var]))})")
+        return -1
+
+    # --------------------------------------------------------
+    # Pontuação
+    # --------------------------------------------------------
+
+    def _preparar(self, matriz):
+        """Features derivadas e imputação, escritas na própria matriz."""
+        calcular_derivadas(
+            lambda nome: matriz[:, self.posicao[nome]],
+            lambda nome: matriz[:, self.posicao[nome]],
+        )
+        for j, mediana in self._imputar:
+            coluna = matriz[:, j]
+            coluna[np.isnan(coluna)] = mediana
+
+    def _ativadas(self, matriz):
+        """Posição no coef ativada em cada linha, por variável discretizada e categórica."""
+        for var, (limites, indices) in self.discretizadas.items():
+            yield indices[np.searchsorted(limites, matriz[:, self.posicao[var]], side="left")]
+        for var, indices in self.dummies.items():
+            yield indices[matriz[:, self.posicao[var]].astype(np.intp)]
+
+    def pontuar_matriz(self, matriz):
+        """Probabilidade de churn para cada linha da matriz de entrada.
+
+        A matriz é usada como área de trabalho: features derivadas e
+        imputação são escritas nela.
+        """
+        self._preparar(matriz)
+        z = np.full(len(matriz), self.intercepto)
+        for j, limites, pesos in self._pesos_bins:
+            z += pesos[np.searchsorted(limites, matriz[:, j], side="left")]
+        for j, pesos in self._pesos_niveis:
+            z += pesos[matriz[:, j].astype(np.intp)]
+        for j, peso in self._pesos_lineares:
+            z += peso * matriz[:, j]
+        return _sigmoide(z)
+
+    def chaves(self, matriz):
+        """Chave de bins de cada linha da matriz de entrada (n x v, float64).
+
+        A probabilidade só depende das posições ativadas no coef (bin de
+        cada variável discretizada, nível de cada categórica) e dos
+        valores das colunas lineares: linhas com a mesma chave têm a mesma
+        probabilidade. Como em `pontuar_matriz`, a matriz é área de trabalho.
+        """
+        self._preparar(matriz)
+        colunas = list(self._ativadas(matriz))
+        colunas += [matriz[:, self.posicao[coluna]] for coluna in self.lineares]
+        return np.column_stack(colunas).astype(np.float64)
+
+    def pontuar_chaves(self, chaves):
+        """Probabilidade a partir das chaves de bins (mesma soma de `pontuar_matriz`)."""
+        n_ativadas = len(self.discretizadas) + len(self.dummies)
+        posicoes = chaves[:, :n_ativadas].astype(np.intp)
+        z = np.full(len(chaves), self.intercepto)
+        for j in range(n_ativadas):
+            z += self.coef[posicoes[:, j]]
+        for j, i in enumerate(self.lineares.values(), start=n_ativadas):
+            z += self.coef[i] * chaves[:, j]
+        return _sigmoide(z)
+
+    def pontuar(self, df):
+        """Probabilidade de churn para cada linha de um DataFrame cru."""
+        return self.pontuar_matriz(self.codificar(df))
+
+    def pontuar_linha(self, linha):
+        """Probabilidade de churn de um único cliente ({coluna: valor})."""
+        return float(self.pontuar_matriz(self.codificar_linha(linha))[0])
+
+
+def caminho_leve(caminho_modelo):
+    """Caminho do artefato leve gravado ao lado do modelchurn.pkl."""
+    return os.path.splitext(caminho_modelo)[0] + ".json"
+
+
+def carregar_modelo(caminho):
+    """Modelo compilado a partir do artefato leve (.json) ou do modelchurn.pkl."""
+    if caminho.endswith(".json"):
+        return ModeloCompilado.carregar(caminho)
+    import pandas as pd
+
+    model_df = pd.read_pickle(caminho)
+    formato = model_df.get("formato", 1)
+    if formato > FORMATO_PICKLE:
+        raise ValueError(
+            f"{caminho}: formato {formato} mais novo que o suportado ({FORMATO_PICKLE})"
+        )
+    return model_df["compilado"]
+
+
+def verificar_equivalencia(compilado, pipeline_completo, df, tolerancia=1e-9):
+    """Confere o modelo compilado contra `predict_proba` do pipeline.
+
+    Retorna a maior diferença absoluta; levanta AssertionError se ela
+    passar da tolerância.
+    """
+    esperado = pipeline_completo.predict_proba(df)[:, 1]
+    obtido = compilado.pontuar(df)
+    diferenca = float(np.max(np.abs(esperado - obtido))) if len(df) else 0.0
+    assert diferenca <= tolerancia, (
+        f"Modelo compilado diverge do pipeline (diferença máxima {diferenca:.3g})"
+    )
+    return diferenca
@@ -0,0 +1,124 @@
+# ------------------------------------------------------------
+# Carregamento do dataset de clientes
+# ------------------------------------------------------------
+# A leitura da planilha com openpyxl é a etapa mais lenta da
+# inicialização. A planilha é convertida uma única vez para Parquet,
+# já com os tipos ajustados, e o arquivo convertido passa a ser a
+# fonte preferencial. Se a planilha mudar, a conversão é refeita.
+
+import hashlib
+import os
+
+import pandas as pd
+
+CAMINHO_PLANILHA = "dataset/E Commerce Dataset.xlsx"
+ABA_PLANILHA = "E Comm"
+
+# Chaves gravadas nos metadados do Parquet para identificar a origem
+_META_MTIME = b"churn.origem_mtime_ns"
+_META_TAMANHO = b"churn.origem_tamanho"
+_META_HASH = b"churn.origem_sha1"
+
+
+def ajustar_tipos(df):
+    """Ajuste de tipos de dados igual ao do treino (in place)."""
+    df['Reclamação'] = df['Reclamação'].astype(bool)
+    df['Nível da Cidade'] = df['Nível da Cidade'].astype('category')
+    return df
+
+
+def caminho_convertido(caminho_planilha=CAMINHO_PLANILHA):
+    """Caminho do arquivo colunar gerado a partir da planilha."""
+    return os.path.splitext(caminho_planilha)[0] + ".parquet"
+
+
+def hash_arquivo(caminho):
+    """sha1 do conteúdo do arquivo, lido em blocos de 1 MB."""
+    sha1 = hashlib.sha1()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""):
+            sha1.update(bloco)
+    return sha1.hexdigest()
+
+
+def ler_planilha(caminho_planilha=CAMINHO_PLANILHA):
+    """Leitura direta da planilha (caminho lento), já com tipos ajustados."""
+    df = pd.read_excel(caminho_planilha, sheet_name=ABA_PLANILHA)
+    return ajustar_tipos(df)
+
+
+def converter_planilha(caminho_planilha=CAMINHO_PLANILHA, destino=None):
+    """Converte a planilha para Parquet tipado e retorna o DataFrame lido.
+
+    A origem (mtime, tamanho e sha1) fica registrada nos metadados do
+    arquivo para que o carregador saiba quando a conversão está velha.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    destino = destino or caminho_convertido(caminho_planilha)
+    stat = os.stat(caminho_planilha)
+    df = ler_planilha(caminho_planilha)
+
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    metadados = dict(tabela.schema.metadata or {})
+    metadados.update({
+        _META_MTIME: str(stat.st_mtime_ns).encode(),
+        _META_TAMANHO: str(stat.st_size).encode(),
+        _META_HASH: hash_arquivo(caminho_planilha).encode(),
+    })
+    tabela = tabela.replace_schema_metadata(metadados)
+
+    # Escrita atômica: outro processo nunca lê um arquivo pela metade
+    temporario = destino + ".tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, destino)
+    return df
+
+
+def conversao_atualizada(caminho_planilha=CAMINHO_PLANILHA, destino=None):
+    """Indica se o arquivo convertido corresponde à planilha atual."""
+    import pyarrow.parquet as pq
+
+    destino = destino or caminho_convertido(caminho_planilha)
+    if not os.path.exists(destino):
+        return False
+
+    metadados = pq.read_schema(destino).metadata or {}
+    if _META_HASH not in metadados:
+        return False
+
+    stat = os.stat(caminho_planilha)
+    if (metadados.get(_META_MTIME) == str(stat.st_mtime_ns).encode()
+            and metadados.get(_META_TAMANHO) == str(stat.st_size).encode()):
+        return True
+
+    # mtime mudou (ex.: checkout do git): só reconverte se o conteúdo mudou
+    return metadados[_META_HASH] == hash_arquivo(caminho_planilha).encode()
+
+
+def carregar_dataset(caminho_planilha=CAMINHO_PLANILHA, converter=True):
+    """Carrega o dataset de clientes pelo caminho mais rápido disponível.
+
+    Usa o Parquet convertido quando ele está atualizado; caso contrário
+    reconverte a planilha (se `converter`) ou cai para a leitura do Excel.
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return ler_planilha(caminho_planilha)
+
+    destino = caminho_convertido(caminho_planilha)
+    if conversao_atualizada(caminho_planilha, destino):
+        # O Parquet guarda 'Nível da Cidade' como inteiro (o dicionário de
+        # inteiros não volta como category na leitura): reaplica os tipos
+        return ajustar_tipos(pd.read_parquet(destino))
+
+    if not converter:
+        return ler_planilha(caminho_planilha)
+
+    try:
+        return converter_planilha(caminho_planilha, destino)
+    except OSError:
+        # Diretório somente leitura: segue com a planilha
+        return ler_planilha(caminho_planilha)
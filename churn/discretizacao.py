@@ -0,0 +1,258 @@
+# ============================================================
+# Discretização por árvore: paralela, com cache e caminho por histograma
+# ============================================================
+# O DecisionTreeDiscretiser do feature_engine ajusta, para cada
+# variável, uma busca em grade com validação cruzada (max_depth 1 a 4,
+# cv=3: 4 x 3 + 1 = 13 árvores) sobre a coluna inteira, uma variável
+# após a outra. DiscretizadorArvore é o mesmo transformador (mesmos
+# parâmetros, binner_dict_, scores_dict_ e transform) com três opções:
+#
+#   - n_jobs: as variáveis são ajustadas em paralelo (joblib);
+#   - diretorio_cache: os limites aprendidos ficam em disco, por
+#     variável, sob o sha1 da coluna, do alvo e dos parâmetros. Refazer a
+#     busca da regressão (outra grade, outro modo) ou treinar de novo na
+#     mesma base não ajusta as árvores de novo;
+#   - max_bins: caminho rápido para bases grandes. Os valores da coluna
+#     são pré-agrupados em até `max_bins` faixas de quantis e cada fold
+#     vira um histograma (faixa x classe): as árvores são ajustadas sobre
+#     esses poucos pontos com peso = contagem, em vez de uma linha por
+#     cliente. O custo deixa de crescer com o número de linhas (só a
+#     contagem, em O(n)). Com até `max_bins` valores distintos o
+#     resultado é o mesmo do caminho exato; acima disso os limites só
+#     podem cair entre faixas de quantis. Só para classificação com
+#     bin_output 'bin_number' ou 'boundaries'.
+#
+# Sem essas opções (n_jobs=None, diretorio_cache=None, max_bins=None) o
+# ajuste é o do feature_engine, passo a passo.
+
+import hashlib
+import json
+import os
+
+import numpy as np
+import pandas as pd
+from feature_engine.discretisation import DecisionTreeDiscretiser
+from joblib import Parallel, delayed
+
+# Muda quando o formato dos resultados em cache muda
+VERSAO_CACHE = 1
+
+GRADE_PADRAO = {"max_depth": [1, 2, 3, 4]}
+
+
+class DiscretizadorArvore(DecisionTreeDiscretiser):
+    """DecisionTreeDiscretiser com ajuste paralelo, cache de limites e histograma.
+
+    Os parâmetros do feature_engine mantêm o significado original; os
+    novos (n_jobs, max_bins, diretorio_cache) estão descritos no topo do
+    módulo. `variaveis_do_cache_` lista as variáveis lidas do cache no
+    último fit.
+    """
+
+    def __init__(self, variables=None, bin_output="prediction", precision=None, cv=3,
+                 scoring="neg_mean_squared_error", param_grid=None, regression=True,
+                 random_state=None, n_jobs=None, max_bins=None, diretorio_cache=None):
+        super().__init__(
+            variables=variables, bin_output=bin_output, precision=precision, cv=cv,
+            scoring=scoring, param_grid=param_grid, regression=regression,
+            random_state=random_state,
+        )
+        # Só guarda os parâmetros (contrato do sklearn: clone/set_params);
+        # max_bins é conferido no fit
+        self.n_jobs = n_jobs
+        self.max_bins = max_bins
+        self.diretorio_cache = diretorio_cache
+
+    def fit(self, X, y):
+        from sklearn.utils.multiclass import check_classification_targets, type_of_target
+
+        if self.max_bins is not None:
+            if self.regression:
+                raise ValueError("max_bins só é suportado com regression=False")
+            if self.bin_output == "prediction":
+                raise ValueError("max_bins requer bin_output 'bin_number' ou 'boundaries'")
+            if self.max_bins < 2:
+                raise ValueError(f"max_bins deve ser pelo menos 2, recebido {self.max_bins}")
+        # Mesmas conferências do DecisionTreeDiscretiser.fit
+        if self.regression:
+            if type_of_target(y) == "binary":
+                raise ValueError(
+                    "Trying to fit a regression to a binary target is not "
+                    "allowed by this transformer. Check the target values "
+                    "or set regression to False."
+                )
+        else:
+            check_classification_targets(y)
+        # Pula o laço do DecisionTreeDiscretiser: só confere X e define variables_
+        X = super(DecisionTreeDiscretiser, self).fit(X)
+
+        parametros = {
+            "regression": self.regression,
+            "bin_output": self.bin_output,
+            "cv": self.cv,
+            "scoring": self.scoring,
+            "param_grid": self.param_grid or GRADE_PADRAO,
+            "random_state": self.random_state,
+            "max_bins": self.max_bins,
+        }
+        resultados = {}
+        chaves = {}
+        if self.diretorio_cache:
+            for var in self.variables_:
+                chaves[var] = chave_cache(X[var], y, parametros)
+                caminho = self._caminho_cache(chaves[var])
+                if os.path.exists(caminho):
+                    resultados[var] = pd.read_pickle(caminho)
+
+        pendentes = [var for var in self.variables_ if var not in resultados]
+        folds = None
+        if pendentes and self.max_bins is not None:
+            from sklearn.model_selection import check_cv
+
+            # Os mesmos folds do GridSearchCV; dependem só de y, valem para todas as variáveis
+            folds = list(check_cv(self.cv, y, classifier=True).split(X, y))
+        ajustes = Parallel(n_jobs=self.n_jobs)(
+            delayed(ajustar_variavel)(X[var], y, parametros, folds) for var in pendentes
+        )
+        for var, resultado in zip(pendentes, ajustes):
+            resultados[var] = resultado
+            if self.diretorio_cache:
+                self._gravar_cache(chaves[var], resultado)
+
+        self.binner_dict_ = {var: resultados[var][0] for var in self.variables_}
+        self.scores_dict_ = {var: resultados[var][1] for var in self.variables_}
+        self.variaveis_do_cache_ = [var for var in self.variables_ if var not in pendentes]
+        return self
+
+    # --------------------------------------------------------
+    # Cache de limites
+    # --------------------------------------------------------
+
+    def _caminho_cache(self, chave):
+        return os.path.join(self.diretorio_cache, f"{chave}.pkl")
+
+    def _gravar_cache(self, chave, resultado):
+        os.makedirs(self.diretorio_cache, exist_ok=True)
+        # Escrita atômica: um ajuste interrompido não deixa cache corrompido
+        caminho = self._caminho_cache(chave)
+        temporario = caminho + ".tmp"
+        pd.to_pickle(resultado, temporario)
+        os.replace(temporario, caminho)
+
+
+def chave_cache(x, y, parametros):
+    """sha1 da coluna (como float64), do alvo e dos parâmetros do ajuste."""
+    import sklearn
+
+    sha1 = hashlib.sha1()
+    for serie in (pd.Series(x, dtype=np.float64), pd.Series(np.asarray(y))):
+        sha1.update(pd.util.hash_pandas_object(serie, index=False).to_numpy().tobytes())
+    conteudo = {"versao": VERSAO_CACHE, "sklearn": sklearn.__version__, **parametros}
+    sha1.update(json.dumps(conteudo, sort_keys=True, default=repr).encode())
+    return sha1.hexdigest()
+
+
+# ------------------------------------------------------------
+# Ajuste de uma variável (executado nos processos do joblib)
+# ------------------------------------------------------------
+
+def ajustar_variavel(x, y, parametros, folds=None):
+    """(binner, score) de uma variável: limites [-inf, ..., inf] ou a busca ajustada.
+
+    `folds` (pares treino/teste) só é usado no caminho por histograma.
+    """
+    if parametros["max_bins"] is not None:
+        return _ajustar_histograma(x.to_numpy(dtype=np.float64), np.asarray(y), parametros,
+                                   folds)
+
+    from sklearn.model_selection import GridSearchCV
+    from sklearn.tree import DecisionTreeClassifier, DecisionTreeRegressor
+
+    arvore = DecisionTreeRegressor if parametros["regression"] else DecisionTreeClassifier
+    busca = GridSearchCV(arvore(random_state=parametros["random_state"]),
+                         cv=parametros["cv"], scoring=parametros["scoring"],
+                         param_grid=parametros["param_grid"])
+    busca.fit(x.to_frame(), y)
+    score = busca.score(x.to_frame(), y)
+    if parametros["bin_output"] == "prediction":
+        return busca, score
+    return _limites(busca.best_estimator_), score
+
+
+def _limites(arvore):
+    limites = arvore.tree_.threshold[arvore.tree_.feature == 0]
+    return [-np.inf] + sorted(limites) + [np.inf]
+
+
+def agrupar_quantis(x, max_bins):
+    """Faixa de cada linha e (maior, menor) valor de cada faixa.
+
+    Valores distintos são atribuídos à faixa de quantil em que começam
+    (pela contagem acumulada), então um valor nunca é dividido entre
+    faixas e as faixas ficam em ordem. Com até `max_bins` valores
+    distintos cada valor é uma faixa.
+    """
+    valores, inverso, contagens = np.unique(x, return_inverse=True, return_counts=True)
+    if len(valores) <= max_bins:
+        return inverso, valores, valores
+    inicio_valor = np.cumsum(contagens) - contagens
+    faixa_valor = inicio_valor * max_bins // len(x)
+    # Faixas vazias (valores muito frequentes) são renumeradas
+    primeiros = np.flatnonzero(np.r_[True, np.diff(faixa_valor) > 0])
+    faixa_valor = np.cumsum(np.r_[False, np.diff(faixa_valor) > 0])
+    ultimos = np.r_[primeiros[1:] - 1, len(valores) - 1]
+    return faixa_valor[inverso], valores[ultimos], valores[primeiros]
+
+
+def _limite_arvore(anterior, seguinte):
+    # Mesma conta do splitter do sklearn (valores em float32, média em float64)
+    anterior = float(np.float32(anterior))
+    seguinte = float(np.float32(seguinte))
+    limite = anterior / 2.0 + seguinte / 2.0
+    return anterior if limite in (seguinte, np.inf, -np.inf) else limite
+
+
+def _ajustar_histograma(x, y, parametros, folds):
+    from sklearn.metrics import check_scoring
+    from sklearn.model_selection import ParameterGrid
+    from sklearn.tree import DecisionTreeClassifier
+
+    faixa, maiores, menores = agrupar_quantis(x, parametros["max_bins"])
+    classes, y_codigo = np.unique(y, return_inverse=True)
+    n_faixas, n_classes = len(maiores), len(classes)
+    codigo = faixa * n_classes + y_codigo
+    # Cada faixa representada pelo seu maior valor
+    X_faixas = maiores.reshape(-1, 1)
+
+    def histograma(linhas=None):
+        """Pontos (faixa, classe) presentes em `linhas`, com as contagens."""
+        contagem = np.bincount(codigo if linhas is None else codigo[linhas],
+                               minlength=n_faixas * n_classes)
+        pontos = np.flatnonzero(contagem)
+        return X_faixas[pontos // n_classes], classes[pontos % n_classes], contagem[pontos]
+
+    def ajustar(pontos, params):
+        arvore = DecisionTreeClassifier(random_state=parametros["random_state"], **params)
+        return arvore.fit(*pontos[:2], sample_weight=pontos[2])
+
+    def pontuar(arvore, pontos):
+        # Score ponderado pelas contagens = score linha a linha
+        return scorer(arvore, *pontos[:2], sample_weight=pontos[2])
+
+    # As linhas só são percorridas aqui: o resto é sobre os histogramas
+    histogramas = [(histograma(treino), histograma(teste)) for treino, teste in folds]
+    grade = list(ParameterGrid(parametros["param_grid"]))
+    scorer = check_scoring(DecisionTreeClassifier(), scoring=parametros["scoring"])
+    medias = [np.mean([pontuar(ajustar(treino, params), teste) for treino, teste in histogramas])
+              for params in grade]
+    todas = histograma()
+    arvore = ajustar(todas, grade[int(np.argmax(medias))])
+    score = pontuar(arvore, todas)
+
+    limites = arvore.tree_.threshold[arvore.tree_.feature == 0]
+    if not np.array_equal(maiores, menores):
+        # O limite da árvore fica entre os maiores valores de duas faixas;
+        # na base original ele fica entre o fim de uma e o início da outra
+        i = np.clip(np.searchsorted(maiores, limites, side="right") - 1, 0, n_faixas - 2)
+        limites = [_limite_arvore(maiores[k], menores[k + 1]) for k in i]
+    return [-np.inf] + sorted(limites) + [np.inf], score
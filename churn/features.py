@@ -0,0 +1,81 @@
+# ============================================================
+# Feature Engineering compartilhada entre treino e app
+# ============================================================
+# Variáveis derivadas calculadas em um único lugar. O transformador é
+# serializado junto com o modelo (modelchurn.pkl), então treino, tabela
+# de clientes e simulador usam exatamente as mesmas fórmulas.
+# As fórmulas ficam em churn/formulas.py (sem dependência do sklearn).
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+from churn.formulas import (  # noqa: F401  (reexportadas)
+    COLUNAS_ORIGEM,
+    FEATURES_DERIVADAS,
+    INSATISFACAO,
+    OFFSET,
+    RAZOES,
+    calcular_derivadas,
+)
+
+
+class FeaturesDerivadas(BaseEstimator, TransformerMixin):
+    """Cria as seis features derivadas a partir das colunas originais.
+
+    Aceita um DataFrame (as colunas novas são adicionadas ao próprio
+    DataFrame quando `copy=False`) ou um bloco NumPy com as colunas na
+    ordem vista no `fit` (as features são anexadas à direita).
+    """
+
+    def __init__(self, copy=True):
+        self.copy = copy
+
+    def fit(self, X, y=None):
+        if isinstance(X, pd.DataFrame):
+            colunas = list(X.columns)
+        else:
+            colunas = list(getattr(self, 'feature_names_in_', COLUNAS_ORIGEM))
+        faltantes = [c for c in COLUNAS_ORIGEM if c not in colunas]
+        if faltantes:
+            raise ValueError(f"Colunas necessárias ausentes: {faltantes}")
+        self.feature_names_in_ = np.asarray(colunas, dtype=object)
+        self.n_features_in_ = len(colunas)
+        return self
+
+    def transform(self, X):
+        if isinstance(X, pd.DataFrame):
+            return self._transform_dataframe(X)
+        return self._transform_array(np.asarray(X))
+
+    def _transform_dataframe(self, df):
+        if self.copy:
+            df = df.copy()
+        n = len(df)
+        novas = {nome: np.empty(n, dtype=np.float64) for nome in FEATURES_DERIVADAS}
+        calcular_derivadas(
+            lambda nome: df[nome].to_numpy(dtype=np.float64, na_value=np.nan),
+            novas.__getitem__,
+        )
+        for nome in FEATURES_DERIVADAS:
+            df[nome] = novas[nome]
+        return df
+
+    def _transform_array(self, X):
+        indice = {nome: i for i, nome in enumerate(self.feature_names_in_)}
+        if X.ndim != 2 or X.shape[1] != len(indice):
+            raise ValueError(
+                f"Esperado bloco com {len(indice)} colunas, recebido {X.shape}"
+            )
+        saida = np.empty((X.shape[0], X.shape[1] + len(FEATURES_DERIVADAS)),
+                         dtype=np.float64)
+        saida[:, :X.shape[1]] = X
+        destino = {nome: X.shape[1] + i for i, nome in enumerate(FEATURES_DERIVADAS)}
+        calcular_derivadas(
+            lambda nome: saida[:, indice[nome]],
+            lambda nome: saida[:, destino[nome]],
+        )
+        return saida
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(list(self.feature_names_in_) + FEATURES_DERIVADAS, dtype=object)
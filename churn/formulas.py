@@ -0,0 +1,54 @@
+# ============================================================
+# Fórmulas das features derivadas
+# ============================================================
+# Só NumPy: usadas pelo transformador do treino (churn/features.py) e
+# pelo modelo compilado do app, que não deve depender do sklearn.
+# Pequeno offset é utilizado para evitar divisão por zero.
+
+import numpy as np
+
+OFFSET = 0.1
+
+# Razões (nova feature, numerador, denominador), na ordem em que as
+# colunas são criadas no treino
+RAZOES = [
+    ('pedidos_por_ano_rel', 'Quantidade de Pedidos', 'Tempo de Relacionamento'),
+    ('rf_score', 'Quantidade de Pedidos', 'Dias Desde Último Pedido'),
+    ('intensidade_uso', 'Horas no App', 'Quantidade de Pedidos'),
+    ('distancia_por_pedido', 'Armazém até a Casa', 'Quantidade de Pedidos'),
+    ('dispositivos_por_pedido', 'Número de Dispositivos Registrados', 'Quantidade de Pedidos'),
+]
+
+# insatisfacao_recente = Reclamação * (6 - Pontuação de Satisfação)
+INSATISFACAO = ('insatisfacao_recente', 'Reclamação', 'Pontuação de Satisfação')
+
+FEATURES_DERIVADAS = [
+    'pedidos_por_ano_rel',
+    'rf_score',
+    'intensidade_uso',
+    'insatisfacao_recente',
+    'distancia_por_pedido',
+    'dispositivos_por_pedido',
+]
+
+COLUNAS_ORIGEM = sorted(
+    {col for _, num, den in RAZOES for col in (num, den)} | set(INSATISFACAO[1:])
+)
+
+
+def calcular_derivadas(coluna, destino):
+    """Calcula cada feature derivada em `destino[nome]` sem temporários extras.
+
+    `coluna(nome)` devolve o array de uma coluna de origem e
+    `destino(nome)` o array (já alocado) onde a feature é escrita.
+    """
+    for nome in FEATURES_DERIVADAS:
+        saida = destino(nome)
+        if nome == INSATISFACAO[0]:
+            # (6 - satisfação) * reclamação, direto no array de saída
+            np.subtract(6, coluna(INSATISFACAO[2]), out=saida)
+            np.multiply(saida, coluna(INSATISFACAO[1]), out=saida)
+            continue
+        _, numerador, denominador = next(r for r in RAZOES if r[0] == nome)
+        np.add(coluna(denominador), OFFSET, out=saida)
+        np.divide(coluna(numerador), saida, out=saida)
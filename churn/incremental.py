@@ -0,0 +1,264 @@
+# ============================================================
+# Pontuação incremental: só clientes novos ou alterados
+# ============================================================
+# A base de clientes muda poucos % por dia, mas a pontuação completa
+# refaz todos os clientes ativos. A loja de pontuação (Parquet) guarda,
+# por 'ID do Cliente', o hash das colunas de entrada do modelo e a
+# última probabilidade/ação. A cada execução:
+#   - o hash de cada cliente ativo é comparado com o da loja;
+#   - só clientes novos ou com entradas alteradas são repontuados;
+#   - se a versão do modelo (sha1 dos parâmetros) mudou, todos são;
+#   - clientes que saíram da base ativa (removidos ou Churn == 1) saem
+#     da loja.
+# O delta tem os clientes novos, os removidos e os que tiveram a
+# probabilidade (%) ou a ação alterada.
+#
+# O hash ainda percorre a base inteira, mas é uma operação vetorizada
+# bem mais barata que a pontuação: o trabalho de pontuação é
+# proporcional às linhas que mudaram.
+#
+# Uso: python -m churn incremental clientes.parquet delta.parquet
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from churn.instrumentacao import intervalo
+from churn.lote import (
+    COLUNA_ACAO,
+    COLUNA_ID,
+    COLUNA_PROBA,
+    TAMANHO_BLOCO,
+    EscritorSaida,
+    colunas_necessarias,
+    ler_em_blocos,
+)
+from churn.regras import ACOES, acao_recomendada, probabilidade_percentual
+
+CAMINHO_LOJA = os.path.join(".cache", "pontuacao.parquet")
+# Muda quando as colunas da loja mudam (loja antiga => repontua tudo)
+FORMATO_LOJA = 1
+
+COLUNA_HASH = "Hash Entradas"
+COLUNA_SITUACAO = "Situação"
+COLUNA_PROBA_ANTERIOR = "Probabilidade Churn Anterior (%)"
+COLUNA_ACAO_ANTERIOR = "Ação Anterior"
+COLUNAS_LOJA = [COLUNA_ID, COLUNA_HASH, COLUNA_PROBA, COLUNA_ACAO]
+COLUNAS_DELTA = [COLUNA_ID, COLUNA_SITUACAO, COLUNA_PROBA_ANTERIOR, COLUNA_PROBA,
+                 COLUNA_ACAO_ANTERIOR, COLUNA_ACAO]
+SITUACOES = ["novo", "alterado", "removido"]
+
+
+def hash_linhas(bloco, colunas):
+    """Hash (uint64) das colunas de entrada de cada linha.
+
+    Numéricas, booleanas e categorias numéricas viram float64 antes do
+    hash: a mesma linha lida de Parquet, CSV ou da planilha (int/float,
+    category/str) tem o mesmo hash.
+    """
+    normalizado = {}
+    for coluna in colunas:
+        serie = bloco[coluna] if coluna in bloco else pd.Series(np.nan, index=bloco.index)
+        if isinstance(serie.dtype, pd.CategoricalDtype):
+            if pd.api.types.is_numeric_dtype(serie.cat.categories.dtype):
+                serie = serie.astype(np.float64)
+        elif pd.api.types.is_numeric_dtype(serie):
+            serie = serie.astype(np.float64)
+        normalizado[coluna] = serie
+    return pd.util.hash_pandas_object(pd.DataFrame(normalizado), index=False).to_numpy()
+
+
+# ------------------------------------------------------------
+# Loja de pontuação
+# ------------------------------------------------------------
+
+def _loja_vazia():
+    return pd.DataFrame({
+        COLUNA_ID: np.array([], dtype=np.int64),
+        COLUNA_HASH: np.array([], dtype=np.uint64),
+        COLUNA_PROBA: np.array([], dtype=np.int64),
+        COLUNA_ACAO: pd.Categorical([], categories=ACOES),
+    })
+
+
+def carregar_loja(caminho=CAMINHO_LOJA):
+    """(loja, versão do modelo); loja vazia e versão None se não houver loja válida."""
+    if not os.path.exists(caminho):
+        return _loja_vazia(), None
+    import pyarrow.parquet as pq
+
+    tabela = pq.read_table(caminho)
+    metadados = tabela.schema.metadata or {}
+    if metadados.get(b"formato") != str(FORMATO_LOJA).encode():
+        return _loja_vazia(), None
+    loja = tabela.to_pandas()
+    loja[COLUNA_ACAO] = pd.Categorical(loja[COLUNA_ACAO], categories=ACOES)
+    return loja, metadados[b"versao_modelo"].decode()
+
+
+def salvar_loja(loja, versao_modelo, caminho=CAMINHO_LOJA):
+    """Grava a loja com a versão do modelo nos metadados (escrita atômica)."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    tabela = pa.Table.from_pandas(loja[COLUNAS_LOJA], preserve_index=False)
+    tabela = tabela.replace_schema_metadata({
+        **(tabela.schema.metadata or {}),
+        b"formato": str(FORMATO_LOJA).encode(),
+        b"versao_modelo": versao_modelo.encode(),
+    })
+    os.makedirs(os.path.dirname(caminho) or ".", exist_ok=True)
+    temporario = caminho + ".tmp"
+    pq.write_table(tabela, temporario)
+    os.replace(temporario, caminho)
+
+
+# ------------------------------------------------------------
+# Pontuação incremental
+# ------------------------------------------------------------
+
+class EstatisticasIncremental:
+    """Clientes ativos lidos, repontuados e no delta."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.repontuadas = 0
+        self.novos = 0
+        self.alterados = 0
+        self.removidos = 0
+        self.delta = 0
+        self.completa = False
+        self.segundos = 0.0
+
+    def __repr__(self):
+        motivo = " (modelo novo: pontuação completa)" if self.completa else ""
+        return (f"{self.linhas} clientes ativos, {self.repontuadas} repontuados{motivo}: "
+                f"{self.novos} novos, {self.alterados} com entradas alteradas, "
+                f"{self.removidos} removidos; {self.delta} linhas no delta "
+                f"em {self.segundos:.2f}s")
+
+
+def _delta(ids, situacao, proba_anterior, proba, acao_anterior, acao):
+    return pd.DataFrame({
+        COLUNA_ID: ids,
+        COLUNA_SITUACAO: pd.Categorical(situacao, categories=SITUACOES),
+        COLUNA_PROBA_ANTERIOR: pd.array(proba_anterior, dtype="Int64"),
+        COLUNA_PROBA: pd.array(proba, dtype="Int64"),
+        COLUNA_ACAO_ANTERIOR: pd.Categorical(acao_anterior, categories=ACOES),
+        COLUNA_ACAO: pd.Categorical(acao, categories=ACOES),
+    })
+
+
+def pontuar_incremental(compilado, origem, loja, versao_loja=None,
+                        tamanho_bloco=TAMANHO_BLOCO, forcar=False):
+    """Atualiza a `loja` com a base `origem` e devolve (loja nova, delta, estatísticas).
+
+    Com `forcar`, ou se `versao_loja` não é a versão do modelo, todos os
+    clientes ativos são repontuados (o delta continua sendo calculado
+    contra a loja).
+    """
+    inicio = time.perf_counter()
+    estatisticas = EstatisticasIncremental()
+    estatisticas.completa = forcar or versao_loja != compilado.versao()
+
+    indice = pd.Index(loja[COLUNA_ID].to_numpy())
+    hashes_loja = loja[COLUNA_HASH].to_numpy()
+    proba_loja = loja[COLUNA_PROBA].to_numpy()
+    acao_loja = loja[COLUNA_ACAO].cat.codes.to_numpy()
+    vistos = np.zeros(len(loja), dtype=bool)
+
+    colunas = compilado.entradas + list(compilado.categorias)
+    matriz = np.empty((tamanho_bloco, len(compilado.colunas)), dtype=np.float32)
+    partes_loja, partes_delta = [], []
+    for bloco in ler_em_blocos(origem, tamanho_bloco, colunas_necessarias(compilado)):
+        if "Churn" in bloco:
+            bloco = bloco[bloco["Churn"].to_numpy() == 0]
+        n = len(bloco)
+        ids = bloco[COLUNA_ID].to_numpy(dtype=np.int64)
+        with intervalo("hash_linhas", linhas=n):
+            hashes = hash_linhas(bloco, colunas)
+
+        posicoes = indice.get_indexer(ids)
+        existe = posicoes >= 0
+        anteriores = posicoes[existe]
+        vistos[anteriores] = True
+
+        alterado = np.zeros(n, dtype=bool)
+        alterado[existe] = hashes_loja[anteriores] != hashes[existe]
+        repontuar = np.ones(n, dtype=bool) if estatisticas.completa else (~existe | alterado)
+
+        # Clientes inalterados mantêm a probabilidade da loja
+        proba = np.zeros(n, dtype=np.int64)
+        proba[existe] = proba_loja[anteriores]
+        if repontuar.any():
+            pedaco = bloco[repontuar]
+            with intervalo("pontuar_bloco", linhas=len(pedaco)):
+                matriz_pedaco = compilado.codificar(pedaco, saida=matriz)
+                proba[repontuar] = probabilidade_percentual(compilado.pontuar_matriz(matriz_pedaco))
+        # A ação é sempre recalculada: mudanças na regra também entram no delta
+        acao = acao_recomendada(proba)
+
+        proba_anterior = np.zeros(n, dtype=np.int64)
+        proba_anterior[existe] = proba_loja[anteriores]
+        acao_anterior = np.full(n, -1, dtype=np.int8)
+        acao_anterior[existe] = acao_loja[anteriores]
+        mudou = existe & ((proba != proba_anterior) | (acao.codes != acao_anterior))
+        no_delta = ~existe | mudou
+
+        estatisticas.linhas += n
+        estatisticas.repontuadas += int(repontuar.sum())
+        estatisticas.novos += int((~existe).sum())
+        estatisticas.alterados += int(alterado.sum())
+
+        partes_loja.append(pd.DataFrame({
+            COLUNA_ID: ids, COLUNA_HASH: hashes, COLUNA_PROBA: proba, COLUNA_ACAO: acao,
+        }))
+        if no_delta.any():
+            novo = ~existe[no_delta]
+            partes_delta.append(_delta(
+                ids[no_delta],
+                np.where(novo, "novo", "alterado"),
+                np.where(novo, None, proba_anterior[no_delta]),
+                proba[no_delta],
+                pd.Categorical.from_codes(acao_anterior[no_delta], categories=ACOES),
+                acao[no_delta],
+            ))
+
+    # Clientes da loja que não estão mais na base ativa
+    removidos = ~vistos
+    estatisticas.removidos = int(removidos.sum())
+    if removidos.any():
+        partes_delta.append(_delta(
+            loja[COLUNA_ID].to_numpy()[removidos],
+            np.full(estatisticas.removidos, "removido"),
+            proba_loja[removidos],
+            [None] * estatisticas.removidos,
+            pd.Categorical.from_codes(acao_loja[removidos], categories=ACOES),
+            [None] * estatisticas.removidos,
+        ))
+
+    loja_nova = pd.concat(partes_loja, ignore_index=True) if partes_loja else _loja_vazia()
+    if not loja_nova[COLUNA_ID].is_unique:
+        raise ValueError(f"'{COLUNA_ID}' duplicado na base de clientes")
+    delta = (pd.concat(partes_delta, ignore_index=True) if partes_delta
+             else _delta([], [], [], [], [], []))
+    estatisticas.delta = len(delta)
+    estatisticas.segundos = time.perf_counter() - inicio
+    return loja_nova, delta, estatisticas
+
+
+def atualizar_pontuacao(compilado, origem, destino_delta, caminho_loja=CAMINHO_LOJA,
+                        tamanho_bloco=TAMANHO_BLOCO, forcar=False):
+    """Pontuação incremental de `origem`: grava o delta e, por fim, a loja atualizada."""
+    loja, versao_loja = carregar_loja(caminho_loja)
+    loja_nova, delta, estatisticas = pontuar_incremental(
+        compilado, origem, loja, versao_loja, tamanho_bloco, forcar
+    )
+    with EscritorSaida(destino_delta, COLUNAS_DELTA) as escritor:
+        escritor.escrever(delta)
+    # A loja só é substituída depois do delta gravado: se algo falhar, a
+    # próxima execução recalcula o mesmo delta
+    salvar_loja(loja_nova, compilado.versao(), caminho_loja)
+    return estatisticas
@@ -0,0 +1,337 @@
+# ============================================================
+# Índice de pontuação: consultas por faixa de risco e segmento
+# ============================================================
+# Perguntas como "todos os clientes com probabilidade >= 85" ou "os 500
+# de maior risco que pagam com COD" não precisam repontuar nem filtrar
+# a base: o score em lote (python -m churn score ... --indice DIR) grava
+# um índice em que cada cliente ocupa uma posição na ordem decrescente
+# de probabilidade (empates pelo menor ID). Com isso:
+#   - uma faixa de probabilidade é um intervalo contíguo de posições
+#     (contagem acumulada por percentual, guardada no indice.json);
+#   - cada ação recomendada também é uma faixa (churn/regras.py);
+#   - cada nível de um segmento (método de pagamento, nível da cidade,
+#     dispositivo de login, categoria de pedido) tem a lista ordenada
+#     das suas posições; "os N de maior risco com COD" são as N
+#     primeiras posições da lista de COD;
+#   - filtros em segmentos diferentes são interseções de listas ordenadas.
+#
+# Arquivos (diretório):
+#   indice.json        formato, versão do modelo, contagens por % e níveis
+#   ids.npy            ID do cliente por posição
+#   proba.npy          probabilidade (%) por posição (int16, decrescente)
+#   ids_ordenados.npy  IDs em ordem crescente e por_id.npy as posições
+#                      correspondentes (busca binária de IDs)
+#   segmento_<i>.npy   posições de cada nível, nível a nível
+# Os arrays são abertos com mmap: abrir o índice não lê a base inteira e
+# uma consulta só toca as posições que devolve.
+#
+# Uso: python -m churn query DIR --min 85 --pagamento COD --top 500
+
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from churn.lote import COLUNA_ACAO, COLUNA_ID, COLUNA_PROBA
+from churn.regras import ACOES, LIMITES_FAIXAS, acao_recomendada
+
+# Muda quando os arquivos do índice mudam
+FORMATO_INDICE = 1
+MANIFESTO = "indice.json"
+
+# Nome curto (linha de comando) -> coluna da base
+SEGMENTOS = {
+    "pagamento": "Método de Pagamento Preferido",
+    "cidade": "Nível da Cidade",
+    "login": "Dispositivo de Login Preferido",
+    "categoria": "Categoria de Pedido Preferida",
+}
+
+
+def faixa_da_acao(acao):
+    """Faixa de probabilidade (%) em que a regra de negócio recomenda `acao`."""
+    i = ACOES.index(acao)
+    limites = [0, *LIMITES_FAIXAS, 101]
+    return limites[i], limites[i + 1] - 1
+
+
+def intersecao(a, b):
+    """Interseção de duas listas crescentes de posições, sem repetições.
+
+    Cada posição da lista menor é procurada na maior por busca binária:
+    O(m log n), sem copiar nem ordenar a lista maior (pode estar em mmap).
+    """
+    if len(a) > len(b):
+        a, b = b, a
+    a = np.asarray(a)
+    if not len(a) or not len(b):
+        return a[:0]
+    posicoes = np.minimum(np.searchsorted(b, a), len(b) - 1)
+    return a[np.asarray(b[posicoes]) == a]
+
+
+class IndicePontuacao:
+    """Probabilidades ordenadas por risco e listas de posições por segmento."""
+
+    def __init__(self, ids, proba, ids_ordenados, por_id, acumulado, segmentos,
+                 versao_modelo=None):
+        self.ids = ids
+        self.proba = proba
+        self.ids_ordenados = ids_ordenados
+        self.por_id = por_id
+        # acumulado[p]: nº de clientes com probabilidade >= p% (p = 0..101)
+        self.acumulado = np.asarray(acumulado, dtype=np.int64)
+        # {coluna: {"niveis": [...], "offsets": [...], "posicoes": array}}
+        self.segmentos = segmentos
+        self.versao_modelo = versao_modelo
+
+    def __len__(self):
+        return len(self.ids)
+
+    # --------------------------------------------------------
+    # Construção
+    # --------------------------------------------------------
+
+    @classmethod
+    def construir(cls, ids, proba, segmentos=None, versao_modelo=None):
+        """Índice a partir de IDs, probabilidades em % (0-100) e valores dos segmentos.
+
+        `segmentos`: {coluna: valores por cliente} (array, Series ou Categorical).
+        """
+        ids = np.asarray(ids, dtype=np.int64)
+        n = len(ids)
+        tipo = np.int32 if n < 2**31 else np.int64
+        # int16: o argsort estável do NumPy usa radix sort (linear)
+        percentual = np.asarray(proba).astype(np.int16)
+
+        por_id_linhas = np.argsort(ids, kind="stable")
+        ordem = por_id_linhas[np.argsort(-percentual[por_id_linhas], kind="stable")]
+        posicao = np.empty(n, dtype=tipo)
+        posicao[ordem] = np.arange(n, dtype=tipo)
+
+        contagens = np.bincount(percentual, minlength=101)[:101]
+        acumulado = np.concatenate([np.cumsum(contagens[::-1])[::-1], [0]])
+
+        indices_segmentos = {}
+        for coluna, valores in (segmentos or {}).items():
+            categorias = pd.Categorical(valores)
+            codigos = np.asarray(categorias.codes)[ordem]
+            # Posições agrupadas por nível, crescentes dentro de cada nível;
+            # clientes sem valor (código -1) ficam de fora
+            agrupadas = np.argsort(codigos, kind="stable").astype(tipo)
+            validos = codigos >= 0
+            offsets = np.concatenate([
+                [0], np.cumsum(np.bincount(codigos[validos], minlength=len(categorias.categories)))
+            ])
+            indices_segmentos[coluna] = {
+                "niveis": categorias.categories.tolist(),
+                "offsets": offsets.tolist(),
+                "posicoes": agrupadas[n - int(validos.sum()):],
+            }
+
+        return cls(
+            ids=ids[ordem],
+            proba=percentual[ordem],
+            ids_ordenados=ids[por_id_linhas],
+            por_id=posicao[por_id_linhas],
+            acumulado=acumulado,
+            segmentos=indices_segmentos,
+            versao_modelo=versao_modelo,
+        )
+
+    # --------------------------------------------------------
+    # Persistência
+    # --------------------------------------------------------
+
+    def salvar(self, diretorio):
+        """Grava o índice em `diretorio` (substituído por inteiro ao final)."""
+        temporario = diretorio.rstrip(os.sep) + ".tmp"
+        shutil.rmtree(temporario, ignore_errors=True)
+        os.makedirs(temporario)
+
+        arrays = {"ids": self.ids, "proba": self.proba,
+                  "ids_ordenados": self.ids_ordenados, "por_id": self.por_id}
+        segmentos = {}
+        for i, (coluna, segmento) in enumerate(self.segmentos.items()):
+            arquivo = f"segmento_{i}"
+            arrays[arquivo] = segmento["posicoes"]
+            segmentos[coluna] = {"arquivo": arquivo, "niveis": segmento["niveis"],
+                                 "offsets": segmento["offsets"]}
+        for nome, array in arrays.items():
+            np.save(os.path.join(temporario, f"{nome}.npy"), np.asarray(array))
+        manifesto = {
+            "formato": FORMATO_INDICE,
+            "versao_modelo": self.versao_modelo,
+            "linhas": len(self),
+            "acumulado": self.acumulado.tolist(),
+            "segmentos": segmentos,
+        }
+        with open(os.path.join(temporario, MANIFESTO), "w", encoding="utf-8") as f:
+            json.dump(manifesto, f, ensure_ascii=False, indent=1)
+
+        # Troca o diretório antigo pelo novo só com o índice completo
+        antigo = diretorio.rstrip(os.sep) + ".antigo"
+        if os.path.exists(diretorio):
+            shutil.rmtree(antigo, ignore_errors=True)
+            os.replace(diretorio, antigo)
+        os.replace(temporario, diretorio)
+        shutil.rmtree(antigo, ignore_errors=True)
+
+    @classmethod
+    def carregar(cls, diretorio, mmap=True):
+        with open(os.path.join(diretorio, MANIFESTO), encoding="utf-8") as f:
+            manifesto = json.load(f)
+        formato = manifesto.get("formato")
+        if formato != FORMATO_INDICE:
+            raise ValueError(
+                f"Formato de índice não suportado: {formato} (esperado {FORMATO_INDICE})"
+            )
+
+        def abrir(nome):
+            return np.load(os.path.join(diretorio, f"{nome}.npy"),
+                           mmap_mode="r" if mmap else None)
+
+        return cls(
+            ids=abrir("ids"),
+            proba=abrir("proba"),
+            ids_ordenados=abrir("ids_ordenados"),
+            por_id=abrir("por_id"),
+            acumulado=manifesto["acumulado"],
+            segmentos={
+                coluna: {"niveis": s["niveis"], "offsets": s["offsets"],
+                         "posicoes": abrir(s["arquivo"])}
+                for coluna, s in manifesto["segmentos"].items()
+            },
+            versao_modelo=manifesto["versao_modelo"],
+        )
+
+    # --------------------------------------------------------
+    # Consultas
+    # --------------------------------------------------------
+
+    def faixa(self, minimo=0, maximo=100):
+        """Intervalo [inicio, fim) das posições com probabilidade entre `minimo` e `maximo` (%)."""
+        minimo, maximo = max(int(minimo), 0), min(int(maximo), 100)
+        if minimo > maximo:
+            return 0, 0
+        return int(self.acumulado[maximo + 1]), int(self.acumulado[minimo])
+
+    def intervalos(self, minimo=0, maximo=100, acoes=None):
+        """Intervalos de posições (crescentes, disjuntos) da faixa, restritos às `acoes`."""
+        if acoes is None:
+            faixas = [(minimo, maximo)]
+        else:
+            # Ação de maior risco primeiro: posições crescentes
+            faixas = []
+            for acao in sorted(acoes, key=ACOES.index, reverse=True):
+                inicio_acao, fim_acao = faixa_da_acao(acao)
+                faixas.append((max(minimo, inicio_acao), min(maximo, fim_acao)))
+        intervalos = [self.faixa(*f) for f in faixas]
+        return [(inicio, fim) for inicio, fim in intervalos if inicio < fim]
+
+    def niveis(self, coluna):
+        return self.segmentos[coluna]["niveis"]
+
+    def postings(self, coluna, niveis, intervalos):
+        """Posições (crescentes) dos clientes com `coluna` em `niveis`, dentro dos intervalos.
+
+        Os níveis são comparados como texto ("1" encontra o nível 1).
+        """
+        segmento = self.segmentos[coluna]
+        pedidos = {str(nivel) for nivel in niveis}
+        partes = []
+        for i, nivel in enumerate(segmento["niveis"]):
+            if str(nivel) not in pedidos:
+                continue
+            lista = segmento["posicoes"][segmento["offsets"][i]:segmento["offsets"][i + 1]]
+            for inicio, fim in intervalos:
+                a, b = np.searchsorted(lista, [inicio, fim])
+                partes.append(lista[a:b])
+        if not partes:
+            return np.array([], dtype=np.int64)
+        if len(partes) == 1:
+            return partes[0]
+        return np.sort(np.concatenate(partes))
+
+    def buscar_ids(self, ids):
+        """Posições (crescentes) dos IDs encontrados no índice."""
+        ids = np.asarray(ids, dtype=np.int64)
+        encontrados = np.searchsorted(self.ids_ordenados, ids)
+        validos = encontrados < len(self)
+        validos[validos] = self.ids_ordenados[encontrados[validos]] == ids[validos]
+        return np.unique(np.asarray(self.por_id[encontrados[validos]], dtype=np.int64))
+
+    def consultar(self, minimo=0, maximo=100, acoes=None, segmentos=None, ids=None,
+                  limite=None):
+        """Posições dos clientes que atendem a todos os filtros, do maior para o menor risco.
+
+        `segmentos`: {coluna: [níveis]}; níveis de uma mesma coluna são
+        alternativas (OU), colunas diferentes se combinam (E).
+        `limite`: só os N de maior risco.
+        """
+        intervalos = self.intervalos(minimo, maximo, acoes)
+        listas = [self.postings(coluna, niveis, intervalos)
+                  for coluna, niveis in (segmentos or {}).items()]
+        if ids is not None:
+            posicoes = self.buscar_ids(ids)
+            dentro = np.zeros(len(posicoes), dtype=bool)
+            for inicio, fim in intervalos:
+                dentro |= (posicoes >= inicio) & (posicoes < fim)
+            listas.append(posicoes[dentro])
+        resultado = None
+        # Da lista menor para a maior: o resultado só diminui
+        for posicoes in sorted(listas, key=len):
+            resultado = posicoes if resultado is None else intersecao(resultado, posicoes)
+
+        if resultado is None:
+            # Só faixa/ações: as posições são os próprios intervalos
+            partes = []
+            restantes = limite
+            for inicio, fim in intervalos:
+                if restantes is not None:
+                    fim = min(fim, inicio + restantes)
+                    restantes -= fim - inicio
+                partes.append(np.arange(inicio, fim))
+            resultado = np.concatenate(partes) if partes else np.array([], dtype=np.int64)
+        return resultado[:limite]
+
+    def resultado(self, posicoes):
+        """DataFrame (ID, probabilidade em %, ação) das posições dadas."""
+        posicoes = np.asarray(posicoes, dtype=np.int64)
+        percentual = np.asarray(self.proba[posicoes], dtype=np.int64)
+        return pd.DataFrame({
+            COLUNA_ID: np.asarray(self.ids[posicoes]),
+            COLUNA_PROBA: percentual,
+            COLUNA_ACAO: acao_recomendada(percentual),
+        })
+
+
+class ConstrutorIndice:
+    """Acumula os blocos pontuados pelo score em lote e constrói o índice no final."""
+
+    def __init__(self, colunas=tuple(SEGMENTOS.values())):
+        self.colunas = list(colunas)
+        self._ids = []
+        self._proba = []
+        self._segmentos = {coluna: [] for coluna in self.colunas}
+
+    def adicionar(self, resultado):
+        """`resultado`: bloco de saída da pontuação com as colunas de segmento."""
+        self._ids.append(resultado[COLUNA_ID].to_numpy(dtype=np.int64))
+        self._proba.append(resultado[COLUNA_PROBA].to_numpy().astype(np.int16))
+        for coluna in self.colunas:
+            self._segmentos[coluna].append(pd.Categorical(resultado[coluna]))
+
+    def construir(self, versao_modelo=None):
+        from pandas.api.types import union_categoricals
+
+        vazio = np.array([], dtype=np.int64)
+        return IndicePontuacao.construir(
+            np.concatenate(self._ids) if self._ids else vazio,
+            np.concatenate(self._proba) if self._proba else vazio,
+            {coluna: (union_categoricals(partes) if partes else pd.Categorical([]))
+             for coluna, partes in self._segmentos.items()},
+            versao_modelo,
+        )
@@ -0,0 +1,285 @@
+# ============================================================
+# Instrumentação: intervalos nomeados de tempo, CPU, linhas e memória
+# ============================================================
+# Cada passo relevante do treino e do app (carga, features derivadas,
+# imputação, dummies, discretização, ajuste/predição, gráficos) roda
+# dentro de um intervalo que registra:
+#   - tempo de parede e tempo de CPU do processo;
+#   - linhas processadas (quando o passo sabe quantas);
+#   - RSS atual no fim do intervalo e a variação desde o início (memória
+#     retida pelo passo; Linux, via /proc/self/statm);
+#   - pico de RSS do processo até o fim do intervalo. É acumulado desde
+#     o início do processo: depois do passo mais pesado todos os
+#     intervalos repetem o mesmo valor, então não mede o passo em si.
+# Os intervalos ficam em memória (últimos MAX_INTERVALOS) e o custo de
+# cada um é de poucos microssegundos, então a instrumentação fica sempre
+# ligada; só a gravação é opcional:
+#   CHURN_TRACE=trace.jsonl  uma linha JSON por intervalo (anexada)
+#   CHURN_TRACE=trace.json   Chrome trace (chrome://tracing ou Perfetto)
+#   CHURN_PERFIL=perfis/     um .prof (cProfile) por intervalo de primeiro
+#                            nível; abrir com pstats ou snakeviz
+# No treino as mesmas opções existem como --trace e --perfil.
+#
+# Uso:
+#   from churn.instrumentacao import intervalo
+#   with intervalo("imputacao", linhas=len(df)):
+#       ...
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+MAX_INTERVALOS = 10_000
+
+_MB = 1024 * 1024
+# (pid, descritor) de /proc/self/statm: reaberto em processos filhos (fork)
+_statm = (None, None)
+
+
+def rss_mb():
+    """RSS atual do processo em MB (None fora do Linux)."""
+    global _statm
+    pid, fd = _statm
+    try:
+        if pid != os.getpid():
+            fd = os.open("/proc/self/statm", os.O_RDONLY)
+            _statm = (os.getpid(), fd)
+        # statm: tamanho e residente, em páginas
+        return int(os.pread(fd, 64, 0).split()[1]) * os.sysconf("SC_PAGE_SIZE") / _MB
+    except (OSError, AttributeError, ValueError):
+        return None
+
+
+def rss_pico_processo_mb():
+    """Pico de RSS do processo em MB desde o seu início (None onde não há `resource`)."""
+    if resource is None:
+        return None
+    # ru_maxrss: KB no Linux, bytes no macOS
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / _MB if sys.platform == "darwin" else pico / 1024
+
+
+class Intervalo:
+    """Um passo medido. `linhas` e `atributos` podem ser preenchidos dentro do bloco."""
+
+    __slots__ = ("nome", "categoria", "linhas", "atributos", "inicio", "segundos",
+                 "cpu_segundos", "rss_mb", "rss_delta_mb", "rss_pico_processo_mb", "profundidade", "pai", "thread", "erro")
+
+    def __init__(self, nome, categoria, linhas, atributos, profundidade, pai):
+        self.nome = nome
+        self.categoria = categoria
+        self.linhas = linhas
+        self.atributos = atributos
+        self.profundidade = profundidade
+        self.pai = pai
+        self.thread = threading.get_ident()
+        self.inicio = None
+        self.segundos = None
+        self.cpu_segundos = None
+        self.rss_mb = None
+        self.rss_delta_mb = None
+        self.rss_pico_processo_mb = None
+        self.erro = None
+
+    def para_dict(self):
+        return {
+            "nome": self.nome,
+            "categoria": self.categoria,
+            "inicio": self.inicio,
+            "segundos": self.segundos,
+            "cpu_segundos": self.cpu_segundos,
+            "linhas": self.linhas,
+            "rss_mb": self.rss_mb,
+            "rss_delta_mb": self.rss_delta_mb,
+            "rss_pico_processo_mb": self.rss_pico_processo_mb,
+            "profundidade": self.profundidade,
+            "pai": self.pai,
+            "pid": os.getpid(),
+            "thread": self.thread,
+            "erro": self.erro,
+            **self.atributos,
+        }
+
+
+class Rastreador:
+    """Coleta os intervalos do processo e grava o trace/perfis sob demanda."""
+
+    def __init__(self, maximo=MAX_INTERVALOS, diretorio_perfil=None):
+        self.intervalos = deque(maxlen=maximo)
+        self.diretorio_perfil = diretorio_perfil
+        # Instante zero dos tempos de início (epoch, como no Chrome trace)
+        self._origem = time.time() - time.perf_counter()
+        self._local = threading.local()
+        self._trava = threading.Lock()
+        self._perfilando = False
+        self._registrados = 0
+        self._gravados = {}
+
+    def _pilha(self):
+        if not hasattr(self._local, "pilha"):
+            self._local.pilha = []
+        return self._local.pilha
+
+    @contextmanager
+    def intervalo(self, nome, linhas=None, categoria="churn", **atributos):
+        pilha = self._pilha()
+        registro = Intervalo(nome, categoria, linhas, atributos, len(pilha),
+                             pilha[-1].nome if pilha else None)
+        perfil = self._iniciar_perfil()
+        pilha.append(registro)
+        inicio_rss = rss_mb()
+        inicio_cpu = time.process_time()
+        inicio = time.perf_counter()
+        try:
+            yield registro
+        except BaseException as erro:
+            registro.erro = type(erro).__name__
+            raise
+        finally:
+            fim = time.perf_counter()
+            registro.cpu_segundos = time.process_time() - inicio_cpu
+            registro.segundos = fim - inicio
+            registro.inicio = self._origem + inicio
+            registro.rss_mb = rss_mb()
+            if registro.rss_mb is not None and inicio_rss is not None:
+                registro.rss_delta_mb = registro.rss_mb - inicio_rss
+            registro.rss_pico_processo_mb = rss_pico_processo_mb()
+            pilha.pop()
+            if perfil is not None:
+                self._gravar_perfil(perfil, registro)
+            with self._trava:
+                self.intervalos.append(registro)
+                self._registrados += 1
+
+    # --------------------------------------------------------
+    # Perfis (cProfile) por intervalo de primeiro nível
+    # --------------------------------------------------------
+
+    def _iniciar_perfil(self):
+        if not self.diretorio_perfil:
+            return None
+        with self._trava:
+            # Um perfilador por vez: intervalos internos ficam no perfil do externo
+            if self._perfilando:
+                return None
+            self._perfilando = True
+        import cProfile
+
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro perfilador já ativo (ex.: python -m cProfile)
+            self._liberar_perfil()
+            return None
+        return perfil
+
+    def _liberar_perfil(self):
+        with self._trava:
+            self._perfilando = False
+
+    def _gravar_perfil(self, perfil, registro):
+        perfil.disable()
+        try:
+            os.makedirs(self.diretorio_perfil, exist_ok=True)
+            nome = re.sub(r"[^\w.-]+", "_", registro.nome)
+            sufixo = time.strftime("%Y%m%d-%H%M%S", time.localtime(registro.inicio))
+            perfil.dump_stats(os.path.join(self.diretorio_perfil,
+                                           f"{sufixo}-{os.getpid()}-{nome}.prof"))
+        finally:
+            # Mesmo se a gravação falhar, os próximos intervalos podem ser perfilados
+            self._liberar_perfil()
+
+    # --------------------------------------------------------
+    # Saída
+    # --------------------------------------------------------
+
+    def registros(self):
+        with self._trava:
+            return [intervalo.para_dict() for intervalo in self.intervalos]
+
+    def gravar(self, caminho):
+        """Grava os intervalos em `caminho`: .jsonl (anexa só os novos) ou Chrome trace."""
+        if str(caminho).endswith(".jsonl"):
+            with self._trava:
+                novos = min(self._registrados - self._gravados.get(caminho, 0),
+                            len(self.intervalos))
+                registros = [self.intervalos[i].para_dict()
+                             for i in range(len(self.intervalos) - novos, len(self.intervalos))]
+                self._gravados[caminho] = self._registrados
+            with open(caminho, "a", encoding="utf-8") as f:
+                for registro in registros:
+                    f.write(json.dumps(registro, ensure_ascii=False, default=str) + "\n")
+            return
+
+        eventos = [{
+            "name": registro["nome"],
+            "cat": registro["categoria"],
+            "ph": "X",
+            "ts": registro["inicio"] * 1e6,
+            "dur": registro["segundos"] * 1e6,
+            "pid": registro["pid"],
+            "tid": registro["thread"],
+            "args": {chave: valor for chave, valor in registro.items()
+                     if chave not in ("nome", "categoria", "inicio", "pid", "thread")},
+        } for registro in self.registros()]
+        # Escrita atômica: o trace pode ser aberto enquanto o app roda
+        temporario = f"{caminho}.tmp"
+        with open(temporario, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": eventos, "displayTimeUnit": "ms"}, f,
+                      ensure_ascii=False, default=str)
+        os.replace(temporario, caminho)
+
+    def resumo(self):
+        """Totais por nome de intervalo: chamadas, tempo, CPU, linhas e memória.
+
+        `rss_delta_mb` soma a variação de RSS das chamadas e `rss_max_mb` é
+        o maior RSS ao fim de uma chamada; o pico acumulado do processo
+        fica só nos registros.
+        """
+        totais = {}
+        for registro in self.registros():
+            total = totais.setdefault(registro["nome"], {
+                "nome": registro["nome"], "chamadas": 0, "segundos": 0.0,
+                "cpu_segundos": 0.0, "linhas": 0, "rss_delta_mb": 0.0, "rss_max_mb": 0.0,
+            })
+            total["chamadas"] += 1
+            total["segundos"] += registro["segundos"]
+            total["cpu_segundos"] += registro["cpu_segundos"]
+            total["linhas"] += registro["linhas"] or 0
+            total["rss_delta_mb"] += registro["rss_delta_mb"] or 0.0
+            total["rss_max_mb"] = max(total["rss_max_mb"], registro["rss_mb"] or 0.0)
+        return list(totais.values())
+
+
+# Rastreador do processo (treino, app e linha de comando)
+RASTREADOR = Rastreador(diretorio_perfil=os.environ.get("CHURN_PERFIL"))
+
+
+def intervalo(nome, linhas=None, categoria="churn", **atributos):
+    """Mede o bloco `with` no rastreador do processo."""
+    return RASTREADOR.intervalo(nome, linhas, categoria, **atributos)
+
+
+def configurar(diretorio_perfil=None):
+    """Liga os perfis por intervalo (além de CHURN_PERFIL)."""
+    if diretorio_perfil:
+        RASTREADOR.diretorio_perfil = diretorio_perfil
+
+
+def gravar_trace(caminho=None):
+    """Grava o trace em `caminho` ou em CHURN_TRACE; sem nenhum dos dois não faz nada."""
+    caminho = caminho or os.environ.get("CHURN_TRACE")
+    if caminho:
+        RASTREADOR.gravar(caminho)
+    return caminho
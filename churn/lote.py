@@ -0,0 +1,284 @@
+# ============================================================
+# Pontuação em lote, em blocos de tamanho fixo
+# ============================================================
+# A base de clientes é lida e pontuada em blocos: cada bloco é
+# codificado em uma matriz float32 pré-alocada (reaproveitada entre os
+# blocos) e pontuado pelo modelo compilado. O pico de memória depende
+# do tamanho do bloco, não do tamanho da base.
+#
+# float32 é suficiente: os limites dos bins vêm de árvores do sklearn,
+# que já são ajustadas sobre os dados convertidos para float32.
+
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from churn.dados import carregar_dataset
+from churn.instrumentacao import intervalo
+from churn.regras import acao_recomendada, probabilidade_percentual
+
+TAMANHO_BLOCO = 100_000
+
+COLUNA_ID = "ID do Cliente"
+COLUNA_PROBA = "Probabilidade Churn (%)"
+COLUNA_ACAO = "Ação Recomendada"
+COLUNAS_SAIDA = [COLUNA_ID, COLUNA_PROBA, COLUNA_ACAO]
+
+
+# ------------------------------------------------------------
+# Leitura em blocos
+# ------------------------------------------------------------
+
+def ler_em_blocos(origem, tamanho_bloco=TAMANHO_BLOCO, colunas=None):
+    """Itera sobre a base de clientes em DataFrames de até `tamanho_bloco` linhas.
+
+    `origem` pode ser um DataFrame ou um arquivo .parquet, .csv ou .xlsx.
+    Parquet e CSV são lidos em streaming; a planilha passa pelo carregador
+    de churn.dados (conversão para Parquet em cache) e depois é fatiada.
+    """
+    if isinstance(origem, pd.DataFrame):
+        if colunas is not None:
+            origem = origem[[c for c in colunas if c in origem]]
+        for inicio in range(0, len(origem), tamanho_bloco):
+            yield origem.iloc[inicio:inicio + tamanho_bloco]
+        return
+
+    extensao = os.path.splitext(str(origem))[1].lower()
+    if extensao == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        esquema = pq.read_schema(origem)
+        if colunas is not None:
+            colunas = [c for c in colunas if c in esquema.names]
+        # Colunas de texto lidas como dicionário (category no pandas): a
+        # codificação das categóricas fica proporcional ao nº de níveis
+        texto = [
+            campo.name for campo in esquema
+            if pa.types.is_string(campo.type) or pa.types.is_large_string(campo.type)
+        ]
+        arquivo = pq.ParquetFile(origem, read_dictionary=texto)
+        for lote in arquivo.iter_batches(batch_size=tamanho_bloco, columns=colunas):
+            yield lote.to_pandas()
+    elif extensao == ".csv":
+        usecols = None if colunas is None else (lambda c: c in set(colunas))
+        # round_trip: os mesmos floats do Parquet (o parser padrão erra o
+        # último bit de valores como 120.86000000000001 da planilha)
+        yield from pd.read_csv(origem, chunksize=tamanho_bloco, usecols=usecols,
+                               float_precision="round_trip")
+    elif extensao in (".xlsx", ".xls"):
+        df = carregar_dataset(origem)
+        yield from ler_em_blocos(df, tamanho_bloco, colunas)
+    else:
+        raise ValueError(f"Formato de arquivo não suportado: {origem}")
+
+
+def colunas_necessarias(compilado, colunas_extras=()):
+    """Colunas da base que o modelo compilado usa (mais ID, Churn e as extras)."""
+    colunas = [COLUNA_ID, "Churn"] + compilado.entradas + list(compilado.categorias)
+    return list(dict.fromkeys(colunas + list(colunas_extras)))
+
+
+# ------------------------------------------------------------
+# Pontuação
+# ------------------------------------------------------------
+
+class Estatisticas:
+    """Linhas processadas, tempo e vazão da pontuação em lote."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.blocos = 0
+        self.segundos = 0.0
+        # Tempos por processo quando a pontuação é paralela
+        self.trabalhadores = None
+
+    @property
+    def linhas_por_segundo(self):
+        return self.linhas / self.segundos if self.segundos else 0.0
+
+    def __repr__(self):
+        texto = (f"{self.linhas} linhas em {self.blocos} blocos, "
+                 f"{self.segundos:.2f}s ({self.linhas_por_segundo:,.0f} linhas/s)")
+        if self.trabalhadores is not None:
+            texto += "\n" + repr(self.trabalhadores)
+        return texto
+
+
+def resultado_bloco(ids, proba):
+    """DataFrame de saída (ID, probabilidade em %, ação) de um bloco."""
+    percentual = probabilidade_percentual(proba)
+    return pd.DataFrame({
+        COLUNA_ID: ids,
+        COLUNA_PROBA: percentual,
+        COLUNA_ACAO: acao_recomendada(percentual),
+    })
+
+
+def _pedacos(blocos, tamanho_bloco, apenas_ativos):
+    """Fatia os blocos lidos em pedaços de no máximo `tamanho_bloco` linhas."""
+    for bloco in blocos:
+        if apenas_ativos and "Churn" in bloco:
+            bloco = bloco[bloco["Churn"].to_numpy() == 0]
+        for parte in range(0, len(bloco), tamanho_bloco):
+            yield bloco.iloc[parte:parte + tamanho_bloco]
+
+
+def _pontuar_pedaco(compilado, pedaco, matriz):
+    proba = compilado.pontuar_matriz(compilado.codificar(pedaco, saida=matriz))
+    return resultado_bloco(pedaco[COLUNA_ID].to_numpy(), proba)
+
+
+def pontuar_em_blocos(compilado, blocos, tamanho_bloco=TAMANHO_BLOCO,
+                      apenas_ativos=True, estatisticas=None, workers=1, colunas_extras=()):
+    """Pontua cada bloco e devolve, bloco a bloco, ID, probabilidade e ação.
+
+    Se `apenas_ativos` e a base tiver a coluna 'Churn', clientes que já
+    saíram (Churn == 1) são descartados, como no app. Com `workers` > 1
+    os blocos são pontuados em um pool de processos (churn.paralelo), com
+    a mesma saída e na mesma ordem da pontuação serial. `colunas_extras`
+    da base são repassadas para o resultado (ex.: segmentos do índice).
+    """
+    inicio = time.perf_counter()
+    pedacos = _pedacos(blocos, tamanho_bloco, apenas_ativos)
+
+    if workers > 1:
+        from collections import deque
+
+        from churn.paralelo import PoolPontuacao
+
+        # O pool devolve os blocos na ordem de entrada: as colunas extras
+        # de cada pedaço esperam em uma fila até o resultado correspondente
+        extras = deque()
+
+        def guardar_extras(pedacos):
+            for pedaco in pedacos:
+                extras.append({c: pedaco[c].to_numpy() for c in colunas_extras})
+                yield pedaco
+
+        with PoolPontuacao(compilado, tamanho_bloco, workers) as pool:
+            if estatisticas is not None:
+                estatisticas.trabalhadores = pool.tempos
+            for ids, proba in pool.pontuar(guardar_extras(pedacos)):
+                _registrar(estatisticas, len(ids), inicio)
+                yield resultado_bloco(ids, proba).assign(**extras.popleft())
+        return
+
+    matriz = np.empty((tamanho_bloco, len(compilado.colunas)), dtype=np.float32)
+    for pedaco in pedacos:
+        with intervalo("pontuar_bloco", linhas=len(pedaco)):
+            resultado = _pontuar_pedaco(compilado, pedaco, matriz)
+        for coluna in colunas_extras:
+            resultado[coluna] = pedaco[coluna].to_numpy()
+        _registrar(estatisticas, len(pedaco), inicio)
+        yield resultado
+
+
+def _registrar(estatisticas, linhas, inicio):
+    if estatisticas is not None:
+        # Tempo de ponta a ponta: leitura, pontuação e escrita
+        estatisticas.linhas += linhas
+        estatisticas.blocos += 1
+        estatisticas.segundos = time.perf_counter() - inicio
+
+
+def pontuar_base(compilado, origem, tamanho_bloco=TAMANHO_BLOCO, apenas_ativos=True,
+                 workers=1, colunas_extras=()):
+    """Pontua a base inteira e devolve (DataFrame de saída, estatísticas)."""
+    estatisticas = Estatisticas()
+    blocos = ler_em_blocos(origem, tamanho_bloco, colunas_necessarias(compilado, colunas_extras))
+    partes = list(pontuar_em_blocos(
+        compilado, blocos, tamanho_bloco, apenas_ativos, estatisticas, workers, colunas_extras
+    ))
+    if not partes:
+        return pd.DataFrame(columns=COLUNAS_SAIDA + list(colunas_extras)), estatisticas
+    return pd.concat(partes, ignore_index=True), estatisticas
+
+
+# ------------------------------------------------------------
+# Escrita do resultado
+# ------------------------------------------------------------
+
+class EscritorSaida:
+    """Grava os blocos de resultado em Parquet ou CSV, um bloco por vez."""
+
+    def __init__(self, destino, colunas=None):
+        self.destino = str(destino)
+        self.colunas = list(colunas or COLUNAS_SAIDA)
+        self.formato = os.path.splitext(self.destino)[1].lower()
+        if self.formato not in (".parquet", ".csv"):
+            raise ValueError(f"Formato de saída não suportado: {destino}")
+        self._escritor = None
+        self._primeiro = True
+
+    def escrever(self, resultado):
+        resultado = resultado[self.colunas]
+        if self.formato == ".csv":
+            resultado.to_csv(self.destino, mode="w" if self._primeiro else "a",
+                             header=self._primeiro, index=False)
+        else:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            tabela = pa.Table.from_pandas(resultado, preserve_index=False)
+            if self._escritor is None:
+                self._escritor = pq.ParquetWriter(self.destino, tabela.schema)
+            self._escritor.write_table(tabela)
+        self._primeiro = False
+
+    def fechar(self):
+        if self._escritor is not None:
+            self._escritor.close()
+        elif self._primeiro:
+            # Nenhum bloco: grava um arquivo vazio com as colunas de saída
+            self._primeiro = False
+            vazio = resultado_bloco(np.array([], dtype=np.int64), np.array([]))[self.colunas]
+            if self.formato == ".csv":
+                vazio.to_csv(self.destino, index=False)
+            else:
+                vazio.to_parquet(self.destino, index=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+def pontuar_arquivo(compilado, origem, destino, tamanho_bloco=TAMANHO_BLOCO,
+                    apenas_ativos=True, workers=1, colunas=None, indice=None):
+    """Pontua `origem` em blocos e grava o resultado em `destino`.
+
+    `colunas` escolhe quais colunas de saída gravar (padrão: todas).
+    Com `indice` (diretório), grava também o índice de pontuação
+    (churn.indice) para consultas por faixa de risco e segmento.
+    """
+    colunas = list(colunas or COLUNAS_SAIDA)
+    invalidas = [c for c in colunas if c not in COLUNAS_SAIDA]
+    if invalidas:
+        raise ValueError(f"Colunas de saída inválidas: {invalidas} "
+                         f"(opções: {COLUNAS_SAIDA})")
+
+    construtor = None
+    if indice is not None:
+        from churn.indice import ConstrutorIndice
+
+        construtor = ConstrutorIndice()
+    colunas_extras = construtor.colunas if construtor is not None else []
+
+    estatisticas = Estatisticas()
+    blocos = ler_em_blocos(origem, tamanho_bloco, colunas_necessarias(compilado, colunas_extras))
+    with EscritorSaida(destino, colunas) as escritor:
+        for resultado in pontuar_em_blocos(
+            compilado, blocos, tamanho_bloco, apenas_ativos, estatisticas, workers,
+            colunas_extras,
+        ):
+            escritor.escrever(resultado)
+            if construtor is not None:
+                construtor.adicionar(resultado)
+    if construtor is not None:
+        with intervalo("indexar", linhas=estatisticas.linhas):
+            construtor.construir(compilado.versao()).salvar(indice)
+    return estatisticas
@@ -0,0 +1,154 @@
+# ============================================================
+# Pontuação paralela em processos, via memória compartilhada
+# ============================================================
+# O processo principal lê cada bloco e o codifica (operação barata)
+# direto em uma matriz float32 alocada em memória compartilhada. Os
+# processos do pool recebem apenas (slot, número de linhas): a matriz e
+# o vetor de probabilidades são os mesmos segmentos de memória, sem
+# serializar DataFrames. Os slots são consumidos em ordem, então a saída
+# sai na mesma ordem da entrada e idêntica à pontuação serial.
+
+import multiprocessing
+import os
+import time
+from collections import deque
+from multiprocessing import shared_memory
+
+import numpy as np
+
+# Estado de cada processo do pool (preenchido no inicializador)
+_trabalhador = {}
+
+
+def _iniciar_trabalhador(compilado, nome_matrizes, nome_saidas, forma):
+    matrizes = shared_memory.SharedMemory(name=nome_matrizes)
+    saidas = shared_memory.SharedMemory(name=nome_saidas)
+    slots, linhas, colunas = forma
+    _trabalhador.update(
+        compilado=compilado,
+        segmentos=(matrizes, saidas),
+        matrizes=np.ndarray((slots, linhas, colunas), dtype=np.float32, buffer=matrizes.buf),
+        saidas=np.ndarray((slots, linhas), dtype=np.float64, buffer=saidas.buf),
+    )
+
+
+def _pontuar_slot(slot, n):
+    inicio_cpu = time.process_time()
+    inicio = time.perf_counter()
+    matriz = _trabalhador["matrizes"][slot, :n]
+    _trabalhador["saidas"][slot, :n] = _trabalhador["compilado"].pontuar_matriz(matriz)
+    return os.getpid(), n, time.perf_counter() - inicio, time.process_time() - inicio_cpu
+
+
+class TemposTrabalhadores:
+    """Tempo de pontuação acumulado por processo do pool."""
+
+    def __init__(self):
+        self.por_processo = {}
+
+    def registrar(self, pid, linhas, segundos, segundos_cpu):
+        atual = self.por_processo.setdefault(
+            pid, {"blocos": 0, "linhas": 0, "segundos": 0.0, "segundos_cpu": 0.0}
+        )
+        atual["blocos"] += 1
+        atual["linhas"] += linhas
+        atual["segundos"] += segundos
+        atual["segundos_cpu"] += segundos_cpu
+
+    def __repr__(self):
+        linhas = []
+        for pid, t in sorted(self.por_processo.items()):
+            vazao = t["linhas"] / t["segundos"] if t["segundos"] else 0.0
+            linhas.append(
+                f"  pid {pid}: {t['blocos']} blocos, {t['linhas']} linhas, "
+                f"{t['segundos']:.2f}s ({vazao:,.0f} linhas/s)"
+            )
+        return "\n".join(linhas)
+
+
+class PoolPontuacao:
+    """Pool de processos que pontua blocos a partir de memória compartilhada.
+
+    Uso:
+        with PoolPontuacao(compilado, tamanho_bloco, processos=8) as pool:
+            for ids, proba in pool.pontuar(pedacos):
+                ...
+    """
+
+    def __init__(self, compilado, tamanho_bloco, processos=None):
+        self.compilado = compilado
+        self.tamanho_bloco = tamanho_bloco
+        self.processos = processos or os.cpu_count() or 1
+        # Dois slots por processo: enquanto um é pontuado, o próximo é codificado
+        self.slots = 2 * self.processos
+        self.tempos = TemposTrabalhadores()
+
+        colunas = len(compilado.colunas)
+        forma = (self.slots, tamanho_bloco, colunas)
+        self._mem_matrizes = shared_memory.SharedMemory(
+            create=True, size=int(np.prod(forma)) * np.dtype(np.float32).itemsize
+        )
+        self._mem_saidas = shared_memory.SharedMemory(
+            create=True, size=self.slots * tamanho_bloco * np.dtype(np.float64).itemsize
+        )
+        self.matrizes = np.ndarray(forma, dtype=np.float32, buffer=self._mem_matrizes.buf)
+        self.saidas = np.ndarray(
+            (self.slots, tamanho_bloco), dtype=np.float64, buffer=self._mem_saidas.buf
+        )
+
+        contexto = multiprocessing.get_context("spawn")
+        try:
+            self._pool = contexto.Pool(
+                self.processos,
+                initializer=_iniciar_trabalhador,
+                initargs=(compilado, self._mem_matrizes.name, self._mem_saidas.name, forma),
+            )
+        except BaseException:
+            # Sem pool não há fechar(): os segmentos são liberados aqui
+            self._liberar_memoria()
+            raise
+
+    def pontuar(self, pedacos, coluna_id="ID do Cliente"):
+        """Pontua os pedaços (DataFrames) e devolve (ids, proba) na ordem de entrada."""
+        livres = deque(range(self.slots))
+        pendentes = deque()
+
+        def concluir():
+            slot, ids, n, tarefa = pendentes.popleft()
+            self.tempos.registrar(*tarefa.get())
+            proba = self.saidas[slot, :n].copy()
+            livres.append(slot)
+            return ids, proba
+
+        for pedaco in pedacos:
+            if not livres:
+                yield concluir()
+            slot = livres.popleft()
+            n = len(pedaco)
+            self.compilado.codificar(pedaco, saida=self.matrizes[slot])
+            tarefa = self._pool.apply_async(_pontuar_slot, (slot, n))
+            pendentes.append((slot, pedaco[coluna_id].to_numpy(), n, tarefa))
+
+        while pendentes:
+            yield concluir()
+
+    def fechar(self, cancelar=False):
+        if cancelar:
+            self._pool.terminate()
+        else:
+            self._pool.close()
+        self._pool.join()
+        self._liberar_memoria()
+
+    def _liberar_memoria(self):
+        # As views precisam ser liberadas antes de fechar o segmento
+        del self.matrizes, self.saidas
+        for memoria in (self._mem_matrizes, self._mem_saidas):
+            memoria.close()
+            memoria.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, valor, traceback):
+        self.fechar(cancelar=tipo is not None)
@@ -0,0 +1,95 @@
+# ============================================================
+# Pré-processamento ajustado no treino
+# ============================================================
+# Transformadores usados no pipeline completo do modelo (linhas cruas
+# da planilha -> probabilidade). Todos os parâmetros (medianas, níveis
+# das categóricas e mapa das colunas dummy) são ajustados no treino;
+# no app só há transform.
+
+import numpy as np
+import pandas as pd
+from sklearn.base import BaseEstimator, TransformerMixin
+
+
+class ImputarMediana(BaseEstimator, TransformerMixin):
+    """Imputação pela mediana do treino nas colunas indicadas.
+
+    Escreve direto nas colunas do DataFrame recebido (sem cópia). Colunas
+    ausentes no DataFrame são tratadas como inteiramente vazias.
+    """
+
+    def __init__(self, colunas):
+        self.colunas = colunas
+
+    def fit(self, X, y=None):
+        self.medianas_ = np.nanmedian(
+            X[self.colunas].to_numpy(dtype=np.float64, na_value=np.nan), axis=0
+        )
+        return self
+
+    def transform(self, X):
+        for coluna, mediana in zip(self.colunas, self.medianas_):
+            if coluna not in X:
+                X[coluna] = mediana
+                continue
+            valores = X[coluna].to_numpy(dtype=np.float64, na_value=np.nan)
+            ausentes = np.isnan(valores)
+            if ausentes.any():
+                valores = valores.copy()
+                valores[ausentes] = mediana
+                X[coluna] = valores
+        return X
+
+
+class CodificarFeatures(BaseEstimator, TransformerMixin):
+    """Monta a matriz de features do modelo, com as dummies já resolvidas.
+
+    Substitui `get_dummies` + `concat` + `reindex` contra um template: no
+    fit é calculado, para cada variável categórica, uma tabela
+    (nível -> colunas dummy do modelo). No transform cada variável vira
+    códigos inteiros e as dummies saem por indexação nessa tabela.
+    """
+
+    def __init__(self, features, categorias):
+        self.features = features
+        self.categorias = categorias
+
+    def fit(self, X=None, y=None):
+        posicao = {feature: i for i, feature in enumerate(self.features)}
+
+        self.tabelas_ = {}
+        usadas = set()
+        for variavel, niveis in self.categorias.items():
+            colunas = []
+            for j, nivel in enumerate(niveis):
+                nome = f"{variavel}_{nivel}"
+                if nome in posicao:
+                    colunas.append((j, posicao[nome]))
+                    usadas.add(nome)
+            if not colunas:
+                continue
+            # Última linha (código -1 = nível desconhecido/ausente) fica zerada
+            tabela = np.zeros((len(niveis) + 1, len(colunas)), dtype=np.float64)
+            for k, (j, _) in enumerate(colunas):
+                tabela[j, k] = 1.0
+            self.tabelas_[variavel] = (tabela, [p for _, p in colunas])
+
+        self.numericas_ = [
+            (feature, posicao[feature]) for feature in self.features
+            if feature not in usadas
+        ]
+        return self
+
+    def transform(self, X):
+        matriz = np.empty((len(X), len(self.features)), dtype=np.float64)
+        for feature, j in self.numericas_:
+            matriz[:, j] = X[feature].to_numpy(dtype=np.float64, na_value=np.nan)
+        for variavel, (tabela, posicoes) in self.tabelas_.items():
+            codigos = pd.Categorical(
+                X[variavel], categories=self.categorias[variavel]
+            ).codes
+            matriz[:, posicoes] = tabela[codigos]
+        return pd.DataFrame(matriz, columns=self.features, index=X.index)
+
+    def get_feature_names_out(self, input_features=None):
+        return np.asarray(self.features, dtype=object)
@@ -0,0 +1,34 @@
+# ============================================================
+# Regra de negócio: ação recomendada por faixa de probabilidade
+# ============================================================
+
+import numpy as np
+import pandas as pd
+
+# Limites inferiores (em %) de cada faixa e a ação correspondente
+#   < 30      baixo       -> Monitorar
+#   30 a 69   moderado    -> Sugerir produtos relacionados
+#   70 a 84   alto        -> Oferecer cashback+
+#   >= 85     muito alto  -> Enviar cupom agressivo
+LIMITES_FAIXAS = [30, 70, 85]
+ACOES = [
+    "Monitorar",
+    "Sugerir produtos relacionados",
+    "Oferecer cashback+",
+    "Enviar cupom agressivo",
+]
+
+
+def probabilidade_percentual(proba):
+    """Probabilidade (0-1) -> percentual inteiro exibido no app."""
+    return np.round(np.asarray(proba) * 100).astype(np.int64)
+
+
+def codigos_acao(proba_percentual):
+    """Posição em ACOES da ação recomendada para cada probabilidade (em %)."""
+    return np.searchsorted(LIMITES_FAIXAS, proba_percentual, side="right")
+
+
+def acao_recomendada(proba_percentual):
+    """Ação recomendada para cada probabilidade (em %), como Categorical."""
+    return pd.Categorical.from_codes(codigos_acao(proba_percentual), categories=ACOES)
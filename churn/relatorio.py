@@ -0,0 +1,255 @@
+# ============================================================
+# Relatório do treino: análise exploratória, gráficos e métricas
+# ============================================================
+# Separado do ajuste dos modelos (churn/treino.py): o treino não importa
+# matplotlib/seaborn nem calcula nada daqui. Quando o relatório é pedido
+# (--relatorio DIR), as tabelas são gravadas em CSV e os gráficos em PNG
+# no diretório indicado. Os gráficos usam matplotlib.figure.Figure
+# direto, sem pyplot: nenhuma janela é aberta e nenhum backend gráfico
+# é necessário (servidores de CI/retreino).
+#
+# As seções seguem a numeração do projeto original (README.md).
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from churn.features import FEATURES_DERIVADAS
+from churn.instrumentacao import intervalo
+from churn.treino import TARGET, resumo_avaliacao
+
+
+class Relatorio:
+    """Diretório de saída do relatório e lista dos arquivos gravados."""
+
+    def __init__(self, diretorio):
+        self.diretorio = diretorio
+        self.arquivos = []
+        os.makedirs(diretorio, exist_ok=True)
+
+    def _caminho(self, nome):
+        caminho = os.path.join(self.diretorio, nome)
+        self.arquivos.append(caminho)
+        return caminho
+
+    def tabela(self, nome, df, index=True):
+        df.to_csv(self._caminho(f"{nome}.csv"), index=index)
+
+    def figura(self, nome, fig):
+        fig.savefig(self._caminho(f"{nome}.png"), dpi=100, bbox_inches="tight")
+
+
+def _figura(figsize):
+    from matplotlib.figure import Figure
+
+    fig = Figure(figsize=figsize)
+    return fig, fig.add_subplot()
+
+
+# ------------------------------------------------------------
+# Seções
+# ------------------------------------------------------------
+
+def valores_ausentes(relatorio, treino):
+    """4. Quantidade e % de valores ausentes por coluna da planilha."""
+    df = treino["dados"]["df"].drop(columns=FEATURES_DERIVADAS)
+    missing_df = pd.DataFrame({
+        'qtd_vazios': df.isnull().sum(),
+        '%vazios': (df.isnull().mean() * 100).round(2)
+    }).sort_values('%vazios', ascending=False)
+    relatorio.tabela("04_valores_ausentes", missing_df)
+
+
+def _treino_cru(treino):
+    # Conjunto de treino antes da imputação e das dummies (para a EDA)
+    df = treino["dados"]["df"]
+    divisao = treino["divisao"]
+    X_train = df.loc[divisao["idx_train"]].drop(columns=TARGET)
+    return X_train, df.loc[divisao["idx_train"], TARGET], df.loc[divisao["idx_test"], TARGET]
+
+
+def balanceamento(relatorio, treino):
+    """9. Taxa de churn geral, no treino e no teste."""
+    _, y_train, y_test = _treino_cru(treino)
+    taxas = pd.Series({
+        "geral": pd.concat([y_train, y_test]).mean(),
+        "treino": y_train.mean(),
+        "teste": y_test.mean(),
+    }, name="taxa_churn")
+    relatorio.tabela("09_balanceamento", taxas)
+
+
+def numericas_por_classe(relatorio, treino):
+    """10-11. Média/mediana por classe, diferença relativa e correlação."""
+    import seaborn as sns
+
+    X_train, y_train, _ = _treino_cru(treino)
+    numericas = X_train.select_dtypes(include=['int64', 'float64']).columns
+
+    df_analise_num = X_train[numericas].copy()
+    df_analise_num[TARGET] = y_train
+
+    # Média e mediana por classe de churn, ordenadas pela razão
+    # relativa entre não churn e churn (mais discriminativas primeiro)
+    summario_num = df_analise_num.groupby(TARGET).agg(['mean', 'median']).T
+    summario_num['diff_rel'] = summario_num[0] / summario_num[1]
+    summario_num = summario_num.sort_values('diff_rel', ascending=False)
+    relatorio.tabela("10_numericas_por_classe", summario_num)
+
+    # Só a média como referência para a diferença relativa
+    diff_rel = summario_num.groupby(level=0)['diff_rel'].first()
+    sorted_diff = diff_rel.sort_values(ascending=False)
+
+    fig, ax = _figura((12, 8))
+    sns.barplot(x=sorted_diff.values, y=sorted_diff.index, hue=sorted_diff.index,
+                palette='coolwarm_r', legend=False, ax=ax)
+    # Linha de referência em 1.0 (neutro)
+    ax.axvline(1.0, color='black', linestyle='--', linewidth=1)
+    ax.set_title('Diferença Relativa (Não Churn / Churn) por Variável Numérica', fontsize=14)
+    ax.set_xlabel('diff_rel')
+    ax.set_ylabel('Variável')
+    relatorio.figura("10_diferenca_relativa", fig)
+
+    corr_matrix = df_analise_num[numericas].corr()
+    fig, ax = _figura((14, 10))
+    sns.heatmap(corr_matrix, cmap='coolwarm', annot=False, linewidths=0.5, ax=ax)
+    ax.set_title("Matriz de Correlação das Variáveis Numéricas", fontsize=14)
+    relatorio.figura("11_correlacao", fig)
+
+
+def categoricas_por_classe(relatorio, treino):
+    """12. % de churn por nível de cada variável categórica."""
+    X_train, y_train, _ = _treino_cru(treino)
+    categoricas = X_train.select_dtypes(include=['object', 'category', 'bool']).columns
+
+    resumos = []
+    for col in categoricas:
+        resumo_cat = pd.crosstab(X_train[col], y_train, normalize='index') * 100
+        resumo_cat = resumo_cat.rename(columns={0: '%Nao_Churn', 1: '%Churn'})
+        # Poder discriminativo relativo
+        resumo_cat['diff_rel'] = resumo_cat['%Churn'] / resumo_cat['%Nao_Churn']
+        resumo_cat = resumo_cat.sort_values('diff_rel', ascending=False)
+        resumo_cat.index = pd.MultiIndex.from_product(
+            [[col], resumo_cat.index.astype(str)], names=["variavel", "nivel"]
+        )
+        resumos.append(resumo_cat.round(2))
+    relatorio.tabela("12_categoricas_por_classe", pd.concat(resumos))
+
+
+def importancias(relatorio, treino):
+    """17-18. Importância das features (árvore) e gráfico de Pareto."""
+    features_importances = treino["importancias"]["features_importances"]
+    relatorio.tabela("18_importancias", features_importances, index=False)
+
+    features = features_importances['feature']
+    fig, ax1 = _figura((12, 6))
+    # Barras: importância individual; linha: acumulada (eixo secundário)
+    ax1.bar(features, features_importances['importance'], color='steelblue')
+    ax1.set_ylabel('Importância (%)')
+    ax1.tick_params(axis='x', rotation=90)
+    ax2 = ax1.twinx()
+    ax2.plot(features, features_importances['importance_acumulada'],
+             color='red', marker='o', linestyle='-')
+    ax2.set_ylabel('Importância Acumulada')
+    # Linha de corte em 95%
+    ax2.axhline(0.95, color='green', linestyle='--', label='Corte 95%')
+    ax2.legend(loc='lower right')
+    ax1.set_title('Gráfico de Pareto - Importância das Features')
+    relatorio.figura("18_pareto_importancias", fig)
+
+
+def buscas(relatorio, treino):
+    """19-20. Melhores hiperparâmetros e tempo por candidato das buscas."""
+    for etapa, nome in (("busca_rf", "19_busca_random_forest"),
+                        ("busca_lr", "20_busca_regressao_logistica")):
+        busca = treino[etapa]
+        relatorio.tabela(nome, busca["tempos"], index=False)
+        relatorio.tabela(f"{nome}_melhores", pd.Series(busca["best_params"], name="valor"))
+
+
+def avaliacao(relatorio, treino):
+    """21. Acurácia e AUC dos dois modelos em treino, teste e OOT."""
+    relatorio.tabela("21_avaliacao", resumo_avaliacao(treino), index=False)
+
+
+def coeficientes(relatorio, treino):
+    """21. Coeficientes da regressão logística (top 20 em gráfico)."""
+    from matplotlib.patches import Rectangle
+
+    log_pipeline = treino["busca_lr"]["pipeline"]
+    best_features = treino["importancias"]["best_features"]
+    coef = log_pipeline.named_steps["Modelo"].coef_[0]
+
+    # Nomes das colunas após bins + dummies, alinhados aos coeficientes
+    X_transformado = log_pipeline[:-1].transform(treino["preparacao"]["X_train"][best_features])
+    feature_names = X_transformado.columns
+    assert len(feature_names) == len(coef), "Mismatch entre features e coeficientes"
+
+    importancia_features = pd.DataFrame({
+        "feature": feature_names,
+        "coeficiente": coef,
+        "importancia_absoluta": np.abs(coef)
+    }).sort_values("importancia_absoluta", ascending=False)
+    relatorio.tabela("21_coeficientes", importancia_features, index=False)
+
+    top_features = importancia_features.head(20)
+    fig, ax = _figura((8, 6))
+    # Verde: aumenta a probabilidade de churn; vermelho: reduz
+    colors = ["seagreen" if c > 0 else "tomato" for c in top_features["coeficiente"]]
+    ax.barh(top_features["feature"], top_features["coeficiente"], color=colors)
+    ax.axvline(0, color='black', linewidth=1)
+    ax.set_xlabel("Coeficiente")
+    ax.set_title("Importância das Features - Regressão Logística")
+    ax.invert_yaxis()  # Garante que a mais importante fique no topo
+    ax.legend(handles=[
+        Rectangle((0, 0), 1, 1, color="seagreen", label="Aumenta prob. Churn"),
+        Rectangle((0, 0), 1, 1, color="tomato", label="Reduz prob. churn"),
+    ], loc="lower right")
+    relatorio.figura("21_coeficientes", fig)
+
+
+def curva_roc(relatorio, treino):
+    """22. Curva ROC da regressão logística em treino, teste e OOT."""
+    avaliacao_lr = treino["avaliacao_lr"]
+    fig, ax = _figura((6.4, 4.8))
+    for conjunto in ("treino", "teste", "oot"):
+        fpr, tpr, _ = avaliacao_lr[conjunto]["roc"]
+        ax.plot(fpr, tpr)
+    ax.plot([0, 1], [0, 1], "--", color='black')
+    ax.set_title("Curva ROC")
+    ax.set_ylabel("Sensibilidade")
+    ax.set_xlabel("1- Especificidade")
+    ax.legend([
+        f"Treino = {100 * avaliacao_lr['treino']['auc']:.2f}",
+        f"Teste = {100 * avaliacao_lr['teste']['auc']:.2f}",
+        f"Out of Time = {100 * avaliacao_lr['oot']['auc']:.2f}",
+    ])
+    ax.grid(True)
+    relatorio.figura("22_curva_roc", fig)
+
+
+SECOES = [
+    valores_ausentes,
+    balanceamento,
+    numericas_por_classe,
+    categoricas_por_classe,
+    importancias,
+    buscas,
+    avaliacao,
+    coeficientes,
+    curva_roc,
+]
+
+
+def gerar_relatorio(treino, diretorio):
+    """Grava todas as seções do relatório em `diretorio`.
+
+    `treino` é um churn.treino.PipelineTreino: as etapas usadas pelo
+    relatório são carregadas do cache (ou executadas) sob demanda.
+    """
+    relatorio = Relatorio(diretorio)
+    for secao in SECOES:
+        with intervalo(f"relatorio:{secao.__name__}", categoria="relatorio"):
+            secao(relatorio, treino)
+    return relatorio
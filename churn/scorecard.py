@@ -0,0 +1,68 @@
+# ============================================================
+# Scorecard: tabela legível de pesos por faixa/nível
+# ============================================================
+# O artefato leve (modelchurn.json) já é o scorecard que os motores de
+# pontuação (app, score, serve, incremental) carregam. Aqui ficam a
+# visão em tabela (uma linha por faixa ou nível, gravada em
+# modelchurn_scorecard.csv) e a conferência do scorecard contra o
+# `log_pipeline.predict_proba` do modelchurn.pkl na base inteira.
+#
+# Leitura: log-odds de churn = intercepto + soma dos pesos da faixa (ou
+# nível) em que o cliente cai em cada variável; probabilidade =
+# sigmoide(log-odds). Variáveis derivadas (pedidos_por_ano_rel, rf_score,
+# ...) são calculadas pelas fórmulas de churn/formulas.py antes da busca
+# da faixa; valores ausentes recebem a mediana do treino.
+#
+# Uso: python -m churn scorecard [--csv scorecard.csv] [--verificar]
+
+import os
+
+import numpy as np
+
+COLUNAS_TABELA = ["Variável", "Tipo", "Faixa/Nível", "Peso"]
+
+
+def caminho_scorecard(caminho_modelo):
+    """Tabela do scorecard gravada ao lado do modelchurn.pkl."""
+    return os.path.splitext(caminho_modelo)[0] + "_scorecard.csv"
+
+
+def tabela_scorecard(compilado):
+    """DataFrame com uma linha por faixa/nível (e o intercepto na primeira)."""
+    import pandas as pd
+
+    linhas = [("(intercepto)", "intercepto", "", compilado.intercepto)]
+    for var, d in compilado.para_dict()["variaveis"].items():
+        if d["tipo"] == "bins":
+            linhas += [(var, "faixa", faixa, peso) for faixa, peso in zip(d["faixas"], d["pesos"])]
+        elif d["tipo"] == "niveis":
+            linhas += [(var, "nível", str(nivel), peso)
+                       for nivel, peso in zip(d["niveis"], d["pesos"])]
+            linhas.append((var, "nível", "(desconhecido)", d["peso_desconhecido"]))
+        else:
+            linhas.append((var, "linear", "x valor", d["peso"]))
+    return pd.DataFrame(linhas, columns=COLUNAS_TABELA)
+
+
+def gravar_tabela(compilado, destino):
+    tabela_scorecard(compilado).to_csv(destino, index=False, encoding="utf-8")
+
+
+def verificar_scorecard(compilado, model_df, df, tolerancia=1e-9):
+    """Confere o scorecard contra `log_pipeline.predict_proba` em `df` (linhas cruas).
+
+    O log_pipeline recebe as colunas já pré-processadas (features
+    derivadas, imputação e codificação: os três primeiros passos do
+    pipeline completo). Retorna a maior diferença absoluta; levanta
+    AssertionError se ela passar da tolerância.
+    """
+    if not len(df):
+        return 0.0
+    preprocessado = model_df["pipeline"][:3].transform(df)
+    esperado = model_df["model"].predict_proba(preprocessado)[:, 1]
+    obtido = compilado.pontuar(df)
+    diferenca = float(np.max(np.abs(esperado - obtido)))
+    assert diferenca <= tolerancia, (
+        f"Scorecard diverge do log_pipeline (diferença máxima {diferenca:.3g})"
+    )
+    return diferenca
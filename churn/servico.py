@@ -0,0 +1,334 @@
+# ============================================================
+# Serviço HTTP de pontuação (asyncio, só biblioteca padrão)
+# ============================================================
+# CRM e campanhas precisam da probabilidade de churn de clientes sob
+# demanda, sem passar pela página do Streamlit. O serviço carrega o
+# modelo compilado (o mesmo artefato do simulador) uma única vez e
+# atende JSON:
+#   POST /score        um cliente {coluna: valor}
+#   POST /score/batch  lista de clientes (ou {"clientes": [...]})
+#   GET  /metrics      latência p50/p99, vazão e tamanho dos lotes
+#   GET  /health       versão do modelo
+# Entradas inválidas (texto não numérico, booleano, NaN/infinito, nível
+# categórico desconhecido, coluna que o modelo não usa) recebem 400;
+# "3" e 3 valem o mesmo nível. Além das colunas do modelo (GET /health),
+# só o "ID do Cliente" é aceito, e volta na resposta.
+#
+# Micro-lotes: cada conexão lê e codifica o próprio pedido (uma matriz
+# de poucas linhas) e o entrega ao agrupador. O agrupador junta os
+# pedidos que chegaram no mesmo intervalo (até MAX_LOTE linhas ou
+# MAX_ESPERA_MS de espera) e pontua todos em uma única chamada
+# vetorizada de `pontuar_matriz`. Com muitas conexões simultâneas o
+# custo por cliente cai para o de uma linha de matriz. A política de
+# lotes é a FilaLotes de churn/agrupador.py (a mesma do simulador), mas
+# aqui o lote é montado no próprio loop de eventos: entregar cada pedido
+# a outra thread custa uma troca de GIL e um despertar do loop por pedido.
+#
+# Uso: python -m churn serve --port 8000
+#   curl -X POST localhost:8000/score -d '{"Tempo de Relacionamento": 1}'
+# Teste de carga: python benchmarks/carga.py
+
+import asyncio
+import json
+import time
+from collections import Counter, deque
+from http import HTTPStatus
+
+import numpy as np
+
+from churn.agrupador import MAX_ESPERA_MS, MAX_LOTE, FilaLotes
+from churn.lote import COLUNA_ACAO, COLUNA_ID, COLUNA_PROBA
+from churn.regras import ACOES, codigos_acao, probabilidade_percentual
+
+COLUNA_PROBA_EXATA = "Probabilidade Churn"
+
+# Corpo máximo de um pedido (lote de dezenas de milhares de clientes)
+MAX_CORPO = 16 * 1024 * 1024
+# Latências guardadas para os percentis e janela da vazão recente
+MAX_AMOSTRAS = 100_000
+JANELA_SEGUNDOS = 10.0
+
+
+class ErroPedido(Exception):
+    """Pedido inválido: vira uma resposta de erro com o status HTTP dado."""
+
+    def __init__(self, status, mensagem):
+        super().__init__(mensagem)
+        self.status = status
+
+
+# ------------------------------------------------------------
+# Métricas
+# ------------------------------------------------------------
+
+class MetricasServico:
+    """Contadores por rota e latências recentes (os micro-lotes ficam na FilaLotes)."""
+
+    def __init__(self, maximo=MAX_AMOSTRAS, janela=JANELA_SEGUNDOS):
+        self.inicio = time.perf_counter()
+        self.janela = janela
+        self.requisicoes = Counter()
+        self.erros = Counter()
+        self.clientes = 0
+        # (instante do fim, segundos) das requisições de pontuação
+        self._latencias = deque(maxlen=maximo)
+
+    def registrar(self, rota, status, segundos, clientes=0):
+        self.requisicoes[rota] += 1
+        if status >= 400:
+            self.erros[rota] += 1
+        elif clientes:
+            self.clientes += clientes
+            self._latencias.append((time.perf_counter(), segundos))
+
+    def resumo(self, lotes):
+        """Métricas do serviço; `lotes` são as estatísticas da fila de micro-lotes."""
+        agora = time.perf_counter()
+        ativo = agora - self.inicio
+        amostras = np.array(self._latencias, dtype=np.float64).reshape(-1, 2)
+        recentes = amostras[amostras[:, 0] >= agora - self.janela, 1]
+        latencia_ms = {}
+        if len(recentes):
+            p50, p90, p99 = np.percentile(recentes, [50, 90, 99]) * 1000
+            latencia_ms = {"p50": p50, "p90": p90, "p99": p99,
+                           "max": float(recentes.max()) * 1000}
+        return {
+            "segundos_ativo": ativo,
+            "requisicoes": dict(self.requisicoes),
+            "erros": dict(self.erros),
+            "clientes_pontuados": self.clientes,
+            # Pedidos de pontuação por segundo na janela recente e desde o início
+            "vazao_recente": len(recentes) / min(self.janela, ativo) if ativo else 0.0,
+            "vazao_media": len(amostras) / ativo if ativo else 0.0,
+            "janela_segundos": self.janela,
+            "latencia_ms": {chave: round(float(valor), 3) for chave, valor in latencia_ms.items()},
+            **lotes,
+        }
+
+
+# ------------------------------------------------------------
+# Micro-lotes
+# ------------------------------------------------------------
+
+class AgrupadorLotes:
+    """Frente asyncio da FilaLotes: os lotes são montados e pontuados no loop de eventos."""
+
+    def __init__(self, compilado, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS):
+        self.fila = FilaLotes(compilado.pontuar_matriz, max_lote, max_espera_ms,
+                              nome="servico", categoria="servico")
+        self._pendente = asyncio.Event()
+
+    async def pontuar(self, matriz):
+        """Probabilidades das linhas de `matriz`, pontuadas no próximo micro-lote."""
+        futuro = asyncio.get_running_loop().create_future()
+        self.fila.adicionar(matriz, futuro)
+        self._pendente.set()
+        return await futuro
+
+    def estatisticas(self):
+        return self.fila.estatisticas()
+
+    async def executar(self):
+        fila = self.fila
+        while True:
+            await self._pendente.wait()
+            self._pendente.clear()
+            # Cede o loop uma vez: conexões com pedidos já lidos entram no lote
+            await asyncio.sleep(0)
+            while fila.pendentes:
+                pedidos = []
+                linhas = fila.drenar(pedidos)
+                if fila.esperar_mais(pedidos, linhas):
+                    await asyncio.sleep(fila.max_espera)
+                    linhas = fila.drenar(pedidos, linhas)
+                fila.pontuar(pedidos)
+
+
+# ------------------------------------------------------------
+# Serviço
+# ------------------------------------------------------------
+
+def _resposta(status, conteudo, manter_conexao):
+    corpo = json.dumps(conteudo, ensure_ascii=False).encode()
+    cabecalho = (
+        f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        "Content-Type: application/json; charset=utf-8\r\n"
+        f"Content-Length: {len(corpo)}\r\n"
+        f"Connection: {'keep-alive' if manter_conexao else 'close'}\r\n\r\n"
+    )
+    return cabecalho.encode("latin-1") + corpo
+
+
+class ServicoPontuacao:
+    """Servidor HTTP/1.1 (keep-alive) em torno de um modelo compilado."""
+
+    def __init__(self, compilado, max_lote=MAX_LOTE, max_espera_ms=MAX_ESPERA_MS):
+        self.compilado = compilado
+        self.versao_modelo = compilado.versao()
+        self.metricas = MetricasServico()
+        self.agrupador = AgrupadorLotes(compilado, max_lote, max_espera_ms)
+        self._rotas = {
+            ("POST", "/score"): self._score,
+            ("POST", "/score/batch"): self._score_batch,
+            ("GET", "/metrics"): self._metrics,
+            ("GET", "/health"): self._health,
+        }
+
+    async def iniciar(self, host="127.0.0.1", porta=8000):
+        """Abre o socket e inicia o agrupador; devolve o asyncio.Server."""
+        self._tarefa_agrupador = asyncio.create_task(self.agrupador.executar())
+        return await asyncio.start_server(self._atender, host, porta)
+
+    async def servir(self, host="127.0.0.1", porta=8000, ao_iniciar=None):
+        servidor = await self.iniciar(host, porta)
+        if ao_iniciar is not None:
+            ao_iniciar(servidor)
+        async with servidor:
+            await servidor.serve_forever()
+
+    # --------------------------------------------------------
+    # Conexões
+    # --------------------------------------------------------
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                try:
+                    cabecalho = await reader.readuntil(b"\r\n\r\n")
+                except asyncio.IncompleteReadError:
+                    break
+                inicio = time.perf_counter()
+                try:
+                    metodo, rota, manter, tamanho = self._ler_cabecalho(cabecalho)
+                except ErroPedido as erro:
+                    # Corpo não lido: a conexão não pode ser reaproveitada
+                    writer.write(_resposta(erro.status, {"erro": str(erro)}, False))
+                    await writer.drain()
+                    self.metricas.registrar("invalida", erro.status, 0.0)
+                    break
+                corpo = await reader.readexactly(tamanho) if tamanho else b""
+                try:
+                    status, conteudo, clientes = await self._processar(metodo, rota, corpo)
+                except ErroPedido as erro:
+                    status, conteudo, clientes = erro.status, {"erro": str(erro)}, 0
+                except Exception as erro:
+                    status, conteudo, clientes = (HTTPStatus.INTERNAL_SERVER_ERROR,
+                                                  {"erro": f"{type(erro).__name__}: {erro}"}, 0)
+                writer.write(_resposta(status, conteudo, manter))
+                await writer.drain()
+                self.metricas.registrar(rota, status, time.perf_counter() - inicio, clientes)
+                if not manter:
+                    break
+        except (ConnectionError, asyncio.LimitOverrunError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    def _ler_cabecalho(self, cabecalho):
+        linhas = cabecalho.decode("latin-1").split("\r\n")
+        try:
+            metodo, rota, versao = linhas[0].split(" ", 2)
+        except ValueError:
+            raise ErroPedido(HTTPStatus.BAD_REQUEST, "linha de requisição inválida")
+        campos = {}
+        for linha in linhas[1:]:
+            nome, _, valor = linha.partition(":")
+            if nome:
+                campos[nome.strip().lower()] = valor.strip()
+        manter = versao == "HTTP/1.1" and campos.get("connection", "").lower() != "close"
+        if "transfer-encoding" in campos:
+            raise ErroPedido(HTTPStatus.LENGTH_REQUIRED, "envie o corpo com Content-Length")
+        try:
+            tamanho = int(campos.get("content-length", 0))
+        except ValueError:
+            raise ErroPedido(HTTPStatus.BAD_REQUEST, "Content-Length inválido")
+        if tamanho > MAX_CORPO:
+            raise ErroPedido(HTTPStatus.REQUEST_ENTITY_TOO_LARGE,
+                             f"corpo maior que {MAX_CORPO} bytes")
+        return metodo, rota.split("?", 1)[0], manter, tamanho
+
+    async def _processar(self, metodo, rota, corpo):
+        """(status, conteúdo JSON, clientes pontuados) de um pedido."""
+        tratador = self._rotas.get((metodo, rota))
+        if tratador is None:
+            if any(rota == caminho for _, caminho in self._rotas):
+                raise ErroPedido(HTTPStatus.METHOD_NOT_ALLOWED, f"{metodo} não aceito em {rota}")
+            raise ErroPedido(HTTPStatus.NOT_FOUND, f"rota desconhecida: {rota}")
+        return await tratador(corpo)
+
+    # --------------------------------------------------------
+    # Rotas
+    # --------------------------------------------------------
+
+    def _json(self, corpo):
+        try:
+            return json.loads(corpo)
+        except ValueError as erro:
+            raise ErroPedido(HTTPStatus.BAD_REQUEST, f"JSON inválido: {erro}")
+
+    async def _pontuar_clientes(self, clientes):
+        if not all(isinstance(cliente, dict) for cliente in clientes):
+            raise ErroPedido(HTTPStatus.BAD_REQUEST, "cada cliente deve ser um objeto JSON")
+        try:
+            matriz = self.compilado.codificar_linhas(clientes, estrito=True,
+                                                     ignoradas=(COLUNA_ID,))
+        except (TypeError, ValueError) as erro:
+            raise ErroPedido(HTTPStatus.BAD_REQUEST, f"valor inválido: {erro}")
+        proba = await self.agrupador.pontuar(matriz)
+        percentual = probabilidade_percentual(proba)
+        return [
+            {
+                COLUNA_ID: cliente.get(COLUNA_ID),
+                COLUNA_PROBA_EXATA: p,
+                COLUNA_PROBA: pct,
+                COLUNA_ACAO: ACOES[codigo],
+            }
+            for cliente, p, pct, codigo in zip(
+                clientes, proba.tolist(), percentual.tolist(), codigos_acao(percentual).tolist()
+            )
+        ]
+
+    async def _score(self, corpo):
+        cliente = self._json(corpo)
+        if not isinstance(cliente, dict):
+            raise ErroPedido(HTTPStatus.BAD_REQUEST, "envie um objeto JSON {coluna: valor}")
+        resultado, = await self._pontuar_clientes([cliente])
+        return HTTPStatus.OK, resultado, 1
+
+    async def _score_batch(self, corpo):
+        clientes = self._json(corpo)
+        if isinstance(clientes, dict):
+            clientes = clientes.get("clientes")
+        if not isinstance(clientes, list):
+            raise ErroPedido(HTTPStatus.BAD_REQUEST,
+                             'envie uma lista de clientes ou {"clientes": [...]}')
+        resultados = await self._pontuar_clientes(clientes) if clientes else []
+        return HTTPStatus.OK, {"resultados": resultados}, len(resultados)
+
+    async def _metrics(self, corpo):
+        return HTTPStatus.OK, self.metricas.resumo(self.agrupador.estatisticas()), 0
+
+    async def _health(self, corpo):
+        return HTTPStatus.OK, {
+            "status": "ok",
+            "versao_modelo": self.versao_modelo,
+            "colunas": self.compilado.entradas + list(self.compilado.categorias),
+        }, 0
+
+
+def servir(compilado, host="127.0.0.1", porta=8000, max_lote=MAX_LOTE,
+           max_espera_ms=MAX_ESPERA_MS):
+    """Atende até Ctrl+C (porta 0 escolhe uma porta livre)."""
+    servico = ServicoPontuacao(compilado, max_lote, max_espera_ms)
+
+    def anunciar(servidor):
+        endereco, porta_aberta = servidor.sockets[0].getsockname()[:2]
+        print(f"Servindo em http://{endereco}:{porta_aberta} "
+              f"(micro-lotes de até {max_lote} linhas, espera de {max_espera_ms} ms)",
+              flush=True)
+
+    try:
+        asyncio.run(servico.servir(host, porta, anunciar))
+    except KeyboardInterrupt:
+        pass
+    return servico
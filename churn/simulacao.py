@@ -0,0 +1,82 @@
+# ============================================================
+# Simulação individual: memo por chave de bins e curvas de sensibilidade
+# ============================================================
+# O modelo discretiza cada variável numérica (e as features derivadas)
+# em poucos bins de árvore e as categóricas viram dummies: a
+# probabilidade só depende da chave de bins do cliente (posição ativada
+# no vetor de coeficientes por variável; ModeloCompilado.chaves). Mudar
+# "Dias desde o último pedido" de 10 para 11 quase nunca muda a chave.
+#
+#   - SimuladorMemo guarda a probabilidade em dois níveis (LRU): pelas
+#     entradas brutas do simulador ({coluna: valor}), que num acerto não
+#     codifica nem calcula chaves (a parte cara da pontuação de uma
+#     linha), e pela chave de bins, que evita pontuar de novo entradas
+#     novas que caem numa combinação de bins já vista;
+#   - curva_sensibilidade varia uma entrada por uma grade de valores com
+#     as demais fixas: a grade inteira vira uma matriz, as chaves
+#     repetidas são pontuadas uma vez só (np.unique) em uma única
+#     chamada vetorizada. A curva é uma escada com um degrau por limite
+#     de bin atravessado.
+
+import functools
+
+import numpy as np
+
+MAX_MEMO = 65_536
+
+
+def curva_sensibilidade(compilado, linha, variavel, valores, pontuar_chaves=None):
+    """Probabilidade para cada valor de `variavel`, com as demais entradas de `linha` fixas.
+
+    Devolve (probabilidades, número de chaves de bins distintas na grade).
+    """
+    valores = list(valores)
+    matriz = np.repeat(compilado.codificar_linha(linha), len(valores), axis=0)
+    j = compilado.posicao[variavel]
+    if variavel in compilado.categorias:
+        matriz[:, j] = compilado.codificar_linhas([{variavel: v} for v in valores])[:, j]
+    else:
+        matriz[:, j] = np.asarray(valores, dtype=np.float64)
+    chaves = compilado.chaves(matriz)
+    unicas, inverso = np.unique(chaves, axis=0, return_inverse=True)
+    proba = (pontuar_chaves or compilado.pontuar_chaves)(unicas)
+    return np.asarray(proba)[inverso.ravel()], len(unicas)
+
+
+class SimuladorMemo:
+    """Probabilidade do simulador memoizada pelas entradas e pela chave de bins.
+
+    `pontuar_chaves` permite passar as chaves por outro caminho (ex.: o
+    agrupador de micro-lotes); o padrão é o próprio modelo compilado.
+    """
+
+    def __init__(self, compilado, pontuar_chaves=None, maximo=MAX_MEMO):
+        self.compilado = compilado
+        self._pontuar_chaves = pontuar_chaves or compilado.pontuar_chaves
+        # lru_cache é seguro entre threads (sessões do Streamlit)
+        self._pontuar_chave = functools.lru_cache(maxsize=maximo)(self._pontuar_uma)
+        self._pontuar_entradas = functools.lru_cache(maxsize=maximo)(self._pontuar_itens)
+
+    def _pontuar_uma(self, chave):
+        return float(np.asarray(self._pontuar_chaves(np.array([chave])))[0])
+
+    def _pontuar_itens(self, itens):
+        return self._pontuar_chave(self.chave(dict(itens)))
+
+    def chave(self, linha):
+        """Chave de bins (tupla) de um cliente {coluna: valor}."""
+        return tuple(self.compilado.chaves(self.compilado.codificar_linha(linha))[0].tolist())
+
+    def pontuar_linha(self, linha):
+        """Probabilidade de churn de um cliente ({coluna: valor})."""
+        return self._pontuar_entradas(tuple(linha.items()))
+
+    def curva(self, linha, variavel, valores):
+        """(probabilidades, chaves distintas) de `curva_sensibilidade`."""
+        return curva_sensibilidade(self.compilado, linha, variavel, valores,
+                                   self._pontuar_chaves)
+
+    def info(self):
+        """cache_info dos dois níveis: entradas brutas e chaves de bins."""
+        return {"entradas": self._pontuar_entradas.cache_info(),
+                "chaves": self._pontuar_chave.cache_info()}
@@ -0,0 +1,177 @@
+# ============================================================
+# Clientes sintéticos com o esquema da aba "E Comm"
+# ============================================================
+# A planilha tem ~5,6 mil clientes, pouco para medir desempenho. O perfil
+# ajustado na planilha guarda, por coluna:
+#   - distribuição marginal: níveis e frequências (categóricas, booleanas
+#     e numéricas com poucos valores distintos) ou quantis interpolados
+#     (numéricas contínuas, como 'Valor de Cashback');
+#   - taxa de valores ausentes (~5% nas numéricas, seção 4 do treino);
+#   - tipo da coluna, para que a base gerada tenha os mesmos dtypes.
+# As colunas são sorteadas de forma independente (as correlações entre
+# elas não são preservadas). O rótulo 'Churn' é sorteado a partir da
+# probabilidade dada pelo modelo atual, então a taxa de churn e a relação
+# entre variáveis e churn seguem o modelo.
+#
+# A geração é feita em blocos de tamanho fixo gravados direto no arquivo
+# de saída (Parquet/CSV): o pico de memória depende do tamanho do bloco,
+# não de N. Cada bloco tem a própria semente (semente, nº do bloco), então
+# a saída é reprodutível.
+#
+# Uso: python -m churn synth 10000000 dataset/sinteticos.parquet
+
+import time
+
+import numpy as np
+import pandas as pd
+
+from churn.dados import carregar_dataset
+
+COLUNA_ID = "ID do Cliente"
+COLUNA_ROTULO = "Churn"
+TAMANHO_BLOCO = 500_000
+
+# Numéricas com mais valores distintos que isso são tratadas como contínuas
+MAX_VALORES_DISCRETOS = 100
+# Pontos da função quantil guardados para as contínuas
+N_QUANTIS = 1001
+
+
+def _casas_decimais(valores, maximo=6):
+    for casas in range(maximo + 1):
+        if np.allclose(valores, np.round(valores, casas)):
+            return casas
+    return None
+
+
+class PerfilClientes:
+    """Distribuições por coluna ajustadas na planilha de clientes."""
+
+    def __init__(self, colunas):
+        # [{nome, tipo, dtype, ausentes, ...parâmetros do tipo}]
+        self.colunas = colunas
+
+    @classmethod
+    def ajustar(cls, base):
+        colunas = []
+        for nome in base.columns:
+            serie = base[nome]
+            coluna = {"nome": nome, "dtype": serie.dtype, "ausentes": float(serie.isna().mean())}
+            validos = serie.dropna()
+
+            if nome == COLUNA_ID:
+                coluna.update(tipo="id", inicio=int(serie.max()) + 1)
+            elif (pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+                  and validos.nunique() > MAX_VALORES_DISCRETOS):
+                quantis = np.quantile(validos.to_numpy(dtype=np.float64),
+                                      np.linspace(0, 1, N_QUANTIS))
+                coluna.update(tipo="continua", quantis=quantis,
+                              casas=_casas_decimais(validos.to_numpy(dtype=np.float64)))
+            else:
+                frequencias = validos.value_counts(normalize=True, sort=False)
+                if isinstance(serie.dtype, pd.CategoricalDtype):
+                    # Níveis na ordem do dtype (códigos do Categorical)
+                    frequencias = frequencias.reindex(serie.cat.categories, fill_value=0.0)
+                coluna.update(
+                    tipo="discreta",
+                    valores=frequencias.index.to_numpy(),
+                    probabilidades=frequencias.to_numpy(dtype=np.float64),
+                )
+            colunas.append(coluna)
+        return cls(colunas)
+
+    @property
+    def nomes(self):
+        return [coluna["nome"] for coluna in self.colunas]
+
+    def _sortear(self, coluna, n, rng):
+        if coluna["tipo"] == "continua":
+            valores = np.interp(rng.random(n), np.linspace(0, 1, N_QUANTIS), coluna["quantis"])
+            if coluna["casas"] is not None:
+                valores = np.round(valores, coluna["casas"])
+        else:
+            probabilidades = coluna["probabilidades"]
+            codigos = rng.choice(len(probabilidades), size=n, p=probabilidades / probabilidades.sum())
+            if isinstance(coluna["dtype"], pd.CategoricalDtype):
+                return pd.Categorical.from_codes(codigos, dtype=coluna["dtype"])
+            valores = coluna["valores"][codigos]
+
+        if coluna["ausentes"] > 0:
+            valores = valores.astype(np.float64)
+            valores[rng.random(n) < coluna["ausentes"]] = np.nan
+        return valores
+
+    def gerar(self, n, rng, id_inicial=None, compilado=None):
+        """DataFrame com `n` clientes (mesmas colunas e dtypes da planilha).
+
+        Com `compilado` o rótulo 'Churn' é sorteado com a probabilidade do
+        modelo para cada cliente; sem ele, pela taxa de churn da planilha.
+        """
+        dados = {}
+        for coluna in self.colunas:
+            nome = coluna["nome"]
+            if coluna["tipo"] == "id":
+                inicio = coluna["inicio"] if id_inicial is None else id_inicial
+                dados[nome] = np.arange(inicio, inicio + n, dtype=np.int64)
+                continue
+            valores = self._sortear(coluna, n, rng)
+            if isinstance(valores, pd.Categorical) or valores.dtype == coluna["dtype"]:
+                dados[nome] = valores
+            else:
+                dados[nome] = pd.array(valores, dtype=coluna["dtype"])
+        df = pd.DataFrame(dados, columns=self.nomes)
+
+        if compilado is not None and COLUNA_ROTULO in df:
+            proba = compilado.pontuar(df)
+            df[COLUNA_ROTULO] = (rng.random(n) < proba).astype(df[COLUNA_ROTULO].dtype)
+        return df
+
+
+def gerar_em_blocos(n, perfil, tamanho_bloco=TAMANHO_BLOCO, random_state=42, compilado=None):
+    """Itera sobre os `n` clientes sintéticos em DataFrames de até `tamanho_bloco` linhas."""
+    id_inicial = next(c["inicio"] for c in perfil.colunas if c["tipo"] == "id")
+    for indice, inicio in enumerate(range(0, n, tamanho_bloco)):
+        rng = np.random.default_rng([random_state, indice])
+        yield perfil.gerar(min(tamanho_bloco, n - inicio), rng,
+                           id_inicial=id_inicial + inicio, compilado=compilado)
+
+
+def gerar_clientes(n, base=None, random_state=42, compilado=None):
+    """DataFrame com `n` clientes sintéticos (em memória; para N grande use gravar_clientes)."""
+    perfil = PerfilClientes.ajustar(carregar_dataset() if base is None else base)
+    blocos = list(gerar_em_blocos(n, perfil, max(n, 1), random_state, compilado))
+    return blocos[0] if blocos else pd.DataFrame(columns=perfil.nomes)
+
+
+class EstatisticasGeracao:
+    """Linhas geradas, tempo, vazão e taxa de churn sorteada."""
+
+    def __init__(self):
+        self.linhas = 0
+        self.blocos = 0
+        self.churn = 0
+        self.segundos = 0.0
+
+    def __repr__(self):
+        vazao = self.linhas / self.segundos if self.segundos else 0.0
+        taxa = self.churn / self.linhas if self.linhas else 0.0
+        return (f"{self.linhas} linhas em {self.blocos} blocos, {self.segundos:.2f}s "
+                f"({vazao:,.0f} linhas/s), taxa de churn {taxa:.2%}")
+
+
+def gravar_clientes(destino, n, base=None, tamanho_bloco=TAMANHO_BLOCO, random_state=42,
+                    compilado=None):
+    """Gera `n` clientes em blocos e grava direto em `destino` (.parquet ou .csv)."""
+    from churn.lote import EscritorSaida
+
+    perfil = PerfilClientes.ajustar(carregar_dataset() if base is None else base)
+    estatisticas = EstatisticasGeracao()
+    inicio = time.perf_counter()
+    with EscritorSaida(destino, perfil.nomes) as escritor:
+        for bloco in gerar_em_blocos(n, perfil, tamanho_bloco, random_state, compilado):
+            escritor.escrever(bloco)
+            estatisticas.linhas += len(bloco)
+            estatisticas.blocos += 1
+            estatisticas.churn += int(bloco[COLUNA_ROTULO].sum())
+            estatisticas.segundos = time.perf_counter() - inicio
+    return estatisticas
@@ -0,0 +1,98 @@
+# ============================================================
+# Tabela de risco paginada: filtros e ordenação no servidor
+# ============================================================
+# O app enviava a tabela pontuada inteira ao navegador a cada
+# reexecução (payload Arrow proporcional à base). A TabelaRisco se
+# apoia no índice de pontuação (churn.indice), construído uma única vez
+# por versão de dados/modelo: as posições do índice já estão em ordem
+# decrescente de risco, então faixa de probabilidade, ação, segmentos e
+# "Top N de maior risco" são consultas ao índice (intervalos e listas
+# ordenadas de posições). As demais ordenações são pré-calculadas.
+# Cada interação só monta o DataFrame da página visível.
+
+import re
+
+import numpy as np
+
+from churn.indice import IndicePontuacao
+from churn.lote import COLUNA_ID, COLUNA_PROBA
+
+# Rótulo exibido -> nome da ordenação pré-calculada
+ORDENACOES = {
+    "Maior risco": "maior_risco",
+    "Menor risco": "menor_risco",
+    "ID do Cliente": "id",
+}
+
+
+def ids_da_busca(texto):
+    """(IDs, trechos inválidos) digitados na busca ("55001, 55002").
+
+    IDs é None se a busca está vazia. Trechos que não são IDs ("abc")
+    voltam à parte para o chamador avisar; só com trechos inválidos a
+    lista de IDs é vazia (nenhum cliente), não None (todos).
+    """
+    partes = [parte for parte in re.split(r"[\s,;]+", texto.strip()) if parte]
+    if not partes:
+        return None, []
+    ids = [int(parte) for parte in partes if parte.isdecimal()]
+    return ids, [parte for parte in partes if not parte.isdecimal()]
+
+
+class TabelaRisco:
+    """Clientes pontuados com ordenações pré-calculadas, para consultas paginadas."""
+
+    def __init__(self, indice):
+        self.indice = indice
+        # Posições do índice ordenadas por ID e por menor risco (empates
+        # pelo ID). Percentuais 0-100 em int16: o argsort estável do NumPy
+        # usa radix sort (linear) para inteiros de até 16 bits
+        por_id = np.asarray(indice.por_id)
+        percentual = np.asarray(indice.proba, dtype=np.int16)[por_id]
+        self.ordens = {
+            "id": por_id,
+            "menor_risco": por_id[np.argsort(percentual, kind="stable")],
+        }
+
+    @classmethod
+    def de_pontuados(cls, pontuados, segmentos=()):
+        """Tabela a partir da saída da pontuação (com as colunas de `segmentos`)."""
+        indice = IndicePontuacao.construir(
+            pontuados[COLUNA_ID], pontuados[COLUNA_PROBA],
+            {coluna: pontuados[coluna] for coluna in segmentos},
+        )
+        return cls(indice)
+
+    def __len__(self):
+        return len(self.indice)
+
+    def filtrar(self, faixa=None, acoes=None, ids=None, segmentos=None):
+        """Posições (em ordem de risco) que atendem aos filtros; None sem nenhum filtro.
+
+        `segmentos`: {coluna: [níveis]}; `ids` vazio não seleciona nenhuma linha.
+        """
+        segmentos = {coluna: niveis for coluna, niveis in (segmentos or {}).items() if niveis}
+        minimo, maximo = faixa if faixa is not None else (0, 100)
+        if (minimo, maximo) == (0, 100) and acoes is None and ids is None and not segmentos:
+            return None
+        return self.indice.consultar(minimo, maximo, acoes, segmentos, ids)
+
+    def selecionar(self, posicoes, ordem="maior_risco", top_n=None):
+        """Posições filtradas na ordem pedida (ou só o top N de maior risco).
+
+        As posições do índice já são a ordem de maior risco: o top N é o
+        começo da seleção.
+        """
+        if top_n or ordem == "maior_risco":
+            selecao = range(len(self)) if posicoes is None else posicoes
+            return selecao[:top_n] if top_n else selecao
+        indice = self.ordens[ordem]
+        if posicoes is None:
+            return indice
+        mascara = np.zeros(len(self), dtype=bool)
+        mascara[posicoes] = True
+        return indice[mascara[indice]]
+
+    def pagina(self, posicoes, numero, tamanho):
+        """DataFrame da página `numero` (a partir de 1) com `tamanho` linhas."""
+        return self.indice.resultado(posicoes[(numero - 1) * tamanho:numero * tamanho])
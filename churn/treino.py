@@ -0,0 +1,712 @@
+# ============================================================
+# Pipeline de treino em etapas, com cache por conteúdo
+# ============================================================
+# O treino (antes um script linear) é dividido em etapas: dados,
+# divisão OOT/treino/teste, preparação (imputação + dummies), seleção
+# de features, buscas RF e LR, avaliações e exportação. O resultado de
+# cada etapa é gravado em disco sob uma chave calculada a partir de:
+#   - código da etapa (e dos módulos de churn/ que ela usa);
+#   - parâmetros da etapa;
+#   - chaves das etapas de que ela depende (e, na etapa de dados, o
+#     sha1 da planilha).
+# Se nada disso mudou, a etapa é carregada do cache em vez de executada.
+# Ex.: mudar só a grade da regressão logística muda a chave de busca_lr
+# (e das etapas que dependem dela); a leitura da planilha e a busca do
+# Random Forest não rodam de novo.
+#
+# As etapas são resolvidas sob demanda: uma etapa cujo resultado não é
+# necessário nem chega a ser carregada do disco.
+#
+# Uso:
+#   python -m churn train [--modo-busca halving] [--params-lr '{"C": [0.1, 1]}']
+
+import hashlib
+import inspect
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from churn.instrumentacao import intervalo
+
+DIRETORIO_CACHE = os.path.join(".cache", "treino")
+CAMINHO_MODELO = "modelchurn.pkl"
+
+# Muda quando o formato dos resultados em cache muda
+VERSAO_CACHE = 1
+
+CONFIG_PADRAO = {
+    "planilha": "dataset/E Commerce Dataset.xlsx",
+    "quantil_oot": 0.25,
+    "test_size": 0.2,
+    "random_state": 42,
+    "corte_importancia": 0.96,
+    "modo_busca": "grid",
+    "max_ajustes": None,
+    "orcamento_segundos": None,
+    "params_rf": {
+        "min_samples_leaf": [15, 20, 25, 30, 50],
+        "n_estimators": [100, 200, 500, 1000],
+        "criterion": ['gini', 'entropy', 'log_loss'],
+    },
+    "params_lr": {
+        # l1_ratio=1 -> L1, l1_ratio=0 -> L2 (o penalty foi descontinuado no sklearn 1.8)
+        "l1_ratio": [1, 0],
+        "C": [0.01, 0.1, 1, 10, 100],
+    },
+    # Pré-agrupamento em quantis da discretização (None = árvores na base inteira)
+    "max_bins_discretizacao": None,
+    # Limites aprendidos pela discretização, por variável (None = sem cache)
+    "cache_discretizacao": os.path.join(DIRETORIO_CACHE, "discretizacao"),
+}
+
+TARGET = 'Churn'
+
+
+# ------------------------------------------------------------
+# Etapas
+# ------------------------------------------------------------
+
+def etapa_dados(parametros):
+    """Carregamento, ajuste de tipos e features derivadas (seções 1-5)."""
+    from churn.dados import carregar_dataset
+    from churn.features import FeaturesDerivadas
+
+    # Parquet convertido da planilha (reconvertido se a planilha mudar)
+    with intervalo("carga") as passo:
+        df = carregar_dataset(parametros["planilha"])
+        passo.linhas = len(df)
+    with intervalo("features_derivadas", linhas=len(df)):
+        df = FeaturesDerivadas(copy=False).fit_transform(df)
+    return {"df": df}
+
+
+def etapa_divisao(parametros, dados):
+    """Separação out-of-time e split treino/teste (seções 6-8).
+
+    Guarda apenas os índices: os conjuntos são montados a partir do
+    DataFrame da etapa de dados.
+    """
+    from sklearn import model_selection
+
+    df = dados["df"]
+
+    # Como o dataset não possui data, 'Tempo de Relacionamento' é o proxy
+    # temporal: os clientes mais recentes simulam dados futuros
+    limite_oot = df['Tempo de Relacionamento'].quantile(parametros["quantil_oot"])
+    idx_oot = df.index[df['Tempo de Relacionamento'] <= limite_oot]
+    idx_modelo = df.index[df['Tempo de Relacionamento'] > limite_oot]
+
+    # Estratificação mantém a taxa de churn equivalente entre treino e teste
+    idx_train, idx_test = model_selection.train_test_split(
+        idx_modelo,
+        random_state=parametros["random_state"],
+        test_size=parametros["test_size"],
+        stratify=df.loc[idx_modelo, TARGET],
+    )
+    return {
+        "limite_oot": limite_oot,
+        "idx_train": np.asarray(idx_train),
+        "idx_test": np.asarray(idx_test),
+        "idx_oot": np.asarray(idx_oot),
+    }
+
+
+def etapa_preparacao(parametros, dados, divisao):
+    """Remoção do ID, imputação e dummies (seções 7 e 13-16)."""
+    from churn.preprocessamento import ImputarMediana
+
+    df = dados["df"]
+    features = df.columns.drop(TARGET)
+
+    X_train = df.loc[divisao["idx_train"], features]
+    X_test = df.loc[divisao["idx_test"], features]
+    y_train = df.loc[divisao["idx_train"], TARGET]
+    y_test = df.loc[divisao["idx_test"], TARGET]
+    df_oot = df.loc[divisao["idx_oot"]]
+    y_oot = df_oot[TARGET]
+
+    categoricas = X_train.select_dtypes(
+        include=['object', 'category', 'bool']
+    ).columns
+
+    # ID do cliente é apenas identificador e não agrega poder preditivo
+    X_train = X_train.drop(columns=["ID do Cliente"])
+    X_test = X_test.drop(columns=["ID do Cliente"])
+    df_oot = df_oot.drop(columns=["ID do Cliente"])
+
+    # Imputação pela mediana, ajustada só no treino. O imputer cobre todas
+    # as colunas numéricas: no app qualquer coluna pode vir vazia (ex.:
+    # 'Tempo de Relacionamento' ausente não entra no treino, pois fica
+    # fora do corte OOT).
+    numericas = X_train.select_dtypes(include=['int64', 'float64']).columns
+    imputer = ImputarMediana(colunas=list(numericas))
+    with intervalo("imputacao", linhas=len(X_train) + len(X_test) + len(df_oot)):
+        X_train = imputer.fit_transform(X_train)
+        X_test = imputer.transform(X_test)
+        df_oot = imputer.transform(df_oot)
+
+    # Níveis vistos no treino: salvos com o modelo para que o app gere
+    # exatamente as mesmas colunas dummy
+    categorias_treino = {
+        col: X_train[col].astype('category').cat.categories.tolist()
+        for col in categoricas
+    }
+
+    with intervalo("dummies", linhas=len(X_train) + len(X_test) + len(df_oot)):
+        X_train = pd.get_dummies(X_train, columns=categoricas, drop_first=False)
+        X_test = pd.get_dummies(X_test, columns=categoricas, drop_first=False)
+        df_oot = pd.get_dummies(df_oot, columns=categoricas, drop_first=False)
+
+        # Alinha colunas entre treino, teste e OOT
+        X_test = X_test.reindex(columns=X_train.columns, fill_value=0)
+        df_oot = df_oot.reindex(columns=X_train.columns, fill_value=0)
+    df_oot[TARGET] = y_oot
+
+    return {
+        "X_train": X_train,
+        "X_test": X_test,
+        "y_train": y_train,
+        "y_test": y_test,
+        "df_oot": df_oot,
+        "numericas": list(numericas),
+        "categoricas": list(categoricas),
+        "imputer": imputer,
+        "categorias": categorias_treino,
+    }
+
+
+def etapa_importancias(parametros, preparacao):
+    """Importância das features por árvore de decisão (seções 17-18)."""
+    from sklearn.tree import DecisionTreeClassifier
+
+    X_train = preparacao["X_train"]
+    arvore = DecisionTreeClassifier(random_state=parametros["random_state"])
+    with intervalo("ajuste_arvore", linhas=len(X_train)):
+        arvore.fit(X_train, preparacao["y_train"])
+
+    features_importances = (
+        pd.Series(arvore.feature_importances_, index=X_train.columns)
+          .sort_values(ascending=False)
+          .reset_index()
+    )
+    features_importances.columns = ['feature', 'importance']
+    features_importances['importance_acumulada'] = features_importances['importance'].cumsum()
+
+    # Features responsáveis por ~95% da importância total
+    best_features = features_importances[
+        features_importances['importance_acumulada'] < parametros["corte_importancia"]
+    ]['feature'].tolist()
+
+    return {"features_importances": features_importances, "best_features": best_features}
+
+
+def etapa_busca_rf(parametros, preparacao, importancias):
+    """Random Forest + busca de hiperparâmetros (etapa 19)."""
+    from sklearn import ensemble, pipeline
+
+    from churn.busca import criar_busca, resultados_busca, sem_busca, tempos_candidatos
+
+    # n_jobs do Random Forest fica em 1: o paralelismo é feito pela busca
+    model = ensemble.RandomForestClassifier(
+        random_state=42,
+        min_samples_leaf=20,
+        n_estimators=500
+    )
+    grid = criar_busca(
+        model,
+        parametros["params_rf"],
+        modo=parametros["modo_busca"],
+        cv=3,
+        scoring='roc_auc',
+        max_ajustes=parametros["max_ajustes"],
+        orcamento_segundos=parametros["orcamento_segundos"],
+        verbose=4
+    )
+    model_pipeline = pipeline.Pipeline(steps=[("Grid", grid)])
+    best_features = importancias["best_features"]
+    with intervalo("busca", linhas=len(preparacao["X_train"]), modelo="random_forest"):
+        model_pipeline.fit(preparacao["X_train"][best_features], preparacao["y_train"])
+
+    # Daqui em diante só o melhor modelo; a busca vira um resumo em JSON
+    return {
+        "pipeline": sem_busca(model_pipeline),
+        "best_params": grid.best_params_,
+        "tempos": tempos_candidatos(grid),
+        "resultados": resultados_busca(grid),
+    }
+
+
+def etapa_busca_lr(parametros, preparacao, importancias):
+    """Discretização supervisionada + OneHot + regressão logística (etapa 20)."""
+    from feature_engine import encoding
+    from sklearn import linear_model, pipeline
+
+    from churn.busca import criar_busca, resultados_busca, sem_busca, tempos_candidatos
+    from churn.discretizacao import DiscretizadorArvore
+
+    best_features = importancias["best_features"]
+    best_features_numericas = [
+        col for col in best_features if col in preparacao["numericas"]
+    ]
+
+    # Faixas de valores aprendidas por árvore: reduz a sensibilidade a
+    # outliers e captura padrões não lineares. Uma árvore por variável,
+    # em paralelo; limites já aprendidos com os mesmos dados vêm do cache
+    tree_discretization = DiscretizadorArvore(
+        variables=best_features_numericas,
+        regression=False,
+        bin_output='bin_number',
+        cv=3,
+        n_jobs=-1,
+        max_bins=parametros["max_bins_discretizacao"],
+        diretorio_cache=parametros["cache_discretizacao"]
+    )
+    onehot = encoding.OneHotEncoder(
+        variables=best_features_numericas,
+        ignore_format=True
+    )
+    log_model = linear_model.LogisticRegression(
+        solver='liblinear',
+        max_iter=500,
+        random_state=42
+    )
+    log_grid = criar_busca(
+        log_model,
+        parametros["params_lr"],
+        modo=parametros["modo_busca"],
+        cv=3,
+        scoring="roc_auc",
+        max_ajustes=parametros["max_ajustes"],
+        orcamento_segundos=parametros["orcamento_segundos"],
+        verbose=4
+    )
+    log_pipeline = pipeline.Pipeline(
+        steps=[
+            ("Discretizar", tree_discretization),
+            ("OneHot", onehot),
+            ("Grid", log_grid)
+        ]
+    )
+    # Mesmo que log_pipeline.fit, em dois passos: a discretização (árvores
+    # com cv por feature) é medida separada da busca da regressão
+    X_train = preparacao["X_train"][best_features]
+    with intervalo("discretizacao", linhas=len(X_train)):
+        X_bins = log_pipeline[:-1].fit_transform(X_train, preparacao["y_train"])
+    with intervalo("busca", linhas=len(X_train), modelo="regressao_logistica"):
+        log_grid.fit(X_bins, preparacao["y_train"])
+
+    return {
+        "pipeline": sem_busca(log_pipeline),
+        "best_params": log_grid.best_params_,
+        "tempos": tempos_candidatos(log_grid),
+        "resultados": resultados_busca(log_grid),
+    }
+
+
+def _avaliar(modelo, preparacao, best_features):
+    from sklearn import metrics
+
+    conjuntos = {
+        "treino": (preparacao["X_train"], preparacao["y_train"]),
+        "teste": (preparacao["X_test"], preparacao["y_test"]),
+        "oot": (preparacao["df_oot"], preparacao["df_oot"][TARGET]),
+    }
+    avaliacao = {}
+    for nome, (X, y) in conjuntos.items():
+        with intervalo("predicao", linhas=len(X), conjunto=nome):
+            predict = modelo.predict(X[best_features])
+            proba = modelo.predict_proba(X[best_features])[:, 1]
+        avaliacao[nome] = {
+            "acuracia": metrics.accuracy_score(y, predict),
+            "auc": metrics.roc_auc_score(y, proba),
+            "roc": metrics.roc_curve(y, proba),
+        }
+    return avaliacao
+
+
+def etapa_avaliacao_rf(parametros, preparacao, importancias, busca_rf):
+    """Acurácia, AUC e curva ROC do Random Forest (etapa 21)."""
+    return _avaliar(busca_rf["pipeline"], preparacao, importancias["best_features"])
+
+
+def etapa_avaliacao_lr(parametros, preparacao, importancias, busca_lr):
+    """Acurácia, AUC e curva ROC da regressão logística (etapa 21)."""
+    return _avaliar(busca_lr["pipeline"], preparacao, importancias["best_features"])
+
+
+def etapa_exportacao(parametros, dados, divisao, preparacao, importancias, busca_lr):
+    """Pipeline completo e modelo compilado salvos para o app (etapa 23)."""
+    from sklearn import pipeline
+
+    from churn.compilado import FORMATO_PICKLE, ModeloCompilado, verificar_equivalencia
+    from churn.features import FeaturesDerivadas
+    from churn.scorecard import verificar_scorecard
+    from churn.preprocessamento import CodificarFeatures
+
+    df = dados["df"]
+    best_features = importancias["best_features"]
+    log_pipeline = busca_lr["pipeline"]
+
+    # Linhas cruas da planilha -> probabilidade: pré-processamento ajustado
+    # no treino + etapas já ajustadas do log_pipeline
+    codificar = CodificarFeatures(
+        features=best_features,
+        categorias=preparacao["categorias"]
+    ).fit()
+    pipeline_completo = pipeline.Pipeline(
+        steps=[
+            ("Features", FeaturesDerivadas()),
+            ("Imputar", preparacao["imputer"]),
+            ("Codificar", codificar),
+            *log_pipeline.steps
+        ]
+    )
+
+    # Validação: o pipeline completo reproduz o log_pipeline no OOT
+    df_oot_cru = df.loc[divisao["idx_oot"]]
+    assert np.allclose(
+        pipeline_completo.predict_proba(df_oot_cru)[:, 1],
+        log_pipeline.predict_proba(preparacao["df_oot"][best_features])[:, 1]
+    ), "Pipeline completo diverge do log_pipeline"
+
+    # Modelo compilado para pontuação rápida, validado em toda a base
+    modelo_compilado = ModeloCompilado.de_pipeline(pipeline_completo)
+    with intervalo("verificar_equivalencia", linhas=len(df)):
+        verificar_equivalencia(modelo_compilado, pipeline_completo, df)
+    # Scorecard (modelchurn.json) relido como os motores de pontuação o
+    # carregam, conferido contra o log_pipeline em toda a base
+    with intervalo("verificar_scorecard", linhas=len(df)):
+        verificar_scorecard(
+            ModeloCompilado.de_dict(json.loads(json.dumps(modelo_compilado.para_dict()))),
+            {"pipeline": pipeline_completo, "model": log_pipeline}, df,
+        )
+
+    return pd.Series({
+        "formato": FORMATO_PICKLE,
+        "model": log_pipeline,
+        "features": best_features,
+        "pipeline": pipeline_completo,
+        "compilado": modelo_compilado,
+        "categorias": preparacao["categorias"],
+    })
+
+
+# ------------------------------------------------------------
+# Declaração das etapas
+# ------------------------------------------------------------
+
+class Etapa:
+    """Etapa do treino: função, dependências e o que entra na sua chave.
+
+    `parametros`: chaves da configuração usadas pela etapa.
+    `arquivos`: parâmetros que são caminhos; o sha1 do conteúdo entra na chave.
+    `modulos`: módulos de churn/ usados pela etapa, inclusive os importados
+        por eles (ex.: churn.formulas, via churn.features); o código entra
+        na chave.
+    `auxiliares`: funções deste módulo chamadas pela etapa; o código entra
+        na chave junto com o da própria etapa.
+    """
+
+    def __init__(self, nome, funcao, dependencias=(), parametros=(), arquivos=(),
+                 modulos=(), auxiliares=()):
+        self.nome = nome
+        self.funcao = funcao
+        self.dependencias = list(dependencias)
+        self.parametros = list(parametros) + list(arquivos)
+        self.arquivos = list(arquivos)
+        self.modulos = list(modulos)
+        self.auxiliares = list(auxiliares)
+
+    def codigo(self):
+        import importlib
+
+        sha1 = hashlib.sha1(inspect.getsource(self.funcao).encode())
+        for funcao in self.auxiliares:
+            sha1.update(inspect.getsource(funcao).encode())
+        for nome in self.modulos:
+            sha1.update(inspect.getsource(importlib.import_module(nome)).encode())
+        return sha1.hexdigest()
+
+
+_BUSCA = ["modo_busca", "max_ajustes", "orcamento_segundos"]
+
+ETAPAS = [
+    Etapa("dados", etapa_dados, arquivos=["planilha"],
+          modulos=["churn.dados", "churn.features", "churn.formulas"]),
+    Etapa("divisao", etapa_divisao, ["dados"],
+          ["quantil_oot", "test_size", "random_state"]),
+    Etapa("preparacao", etapa_preparacao, ["dados", "divisao"],
+          modulos=["churn.preprocessamento"]),
+    Etapa("importancias", etapa_importancias, ["preparacao"],
+          ["random_state", "corte_importancia"]),
+    Etapa("busca_rf", etapa_busca_rf, ["preparacao", "importancias"],
+          ["params_rf", *_BUSCA], modulos=["churn.busca"]),
+    Etapa("busca_lr", etapa_busca_lr, ["preparacao", "importancias"],
+          ["params_lr", "max_bins_discretizacao", "cache_discretizacao", *_BUSCA],
+          modulos=["churn.busca", "churn.discretizacao"]),
+    Etapa("avaliacao_rf", etapa_avaliacao_rf, ["preparacao", "importancias", "busca_rf"],
+          auxiliares=[_avaliar]),
+    Etapa("avaliacao_lr", etapa_avaliacao_lr, ["preparacao", "importancias", "busca_lr"],
+          auxiliares=[_avaliar]),
+    Etapa("exportacao", etapa_exportacao,
+          ["dados", "divisao", "preparacao", "importancias", "busca_lr"],
+          modulos=["churn.compilado", "churn.scorecard", "churn.preprocessamento",
+                   "churn.features", "churn.formulas"]),
+]
+
+# Etapas executadas por padrão (as demais entram como dependências)
+ALVOS = ["avaliacao_rf", "avaliacao_lr", "exportacao"]
+
+
+# ------------------------------------------------------------
+# Execução com cache
+# ------------------------------------------------------------
+
+class RelatorioEtapas:
+    """Origem (executada/cache) e tempo de cada etapa resolvida."""
+
+    def __init__(self):
+        self.linhas = []
+
+    def registrar(self, etapa, origem, segundos, chave):
+        self.linhas.append({
+            "etapa": etapa, "origem": origem, "segundos": segundos, "chave": chave[:12],
+        })
+
+    def tabela(self):
+        return pd.DataFrame(self.linhas, columns=["etapa", "origem", "segundos", "chave"])
+
+    def __repr__(self):
+        tabela = self.tabela()
+        total = tabela["segundos"].sum()
+        return (tabela.to_string(index=False, float_format=lambda s: f"{s:.2f}")
+                + f"\nTotal: {total:.2f}s")
+
+
+class PipelineTreino:
+    """Resolve as etapas sob demanda, usando o cache quando a chave confere.
+
+    Uso:
+        treino = PipelineTreino(config).executar()
+        treino["busca_lr"]["pipeline"]
+        print(treino.relatorio)
+    """
+
+    def __init__(self, config=None, etapas=ETAPAS, diretorio_cache=DIRETORIO_CACHE,
+                 usar_cache=True, forcar=()):
+        self.config = {**CONFIG_PADRAO, **(config or {})}
+        self.etapas = {etapa.nome: etapa for etapa in etapas}
+        self.diretorio_cache = diretorio_cache
+        self.usar_cache = usar_cache
+        self.forcar = set(forcar)
+        invalidas = self.forcar - set(self.etapas)
+        if invalidas:
+            raise ValueError(f"Etapas desconhecidas: {sorted(invalidas)} "
+                             f"(opções: {list(self.etapas)})")
+        self.relatorio = RelatorioEtapas()
+        self._chaves = {}
+        self._resultados = {}
+
+    def parametros(self, nome):
+        return {p: self.config[p] for p in self.etapas[nome].parametros}
+
+    def chave(self, nome):
+        """Chave por conteúdo da etapa (não depende dos resultados)."""
+        if nome not in self._chaves:
+            from churn.dados import hash_arquivo
+
+            etapa = self.etapas[nome]
+            conteudo = {
+                "versao": VERSAO_CACHE,
+                "etapa": nome,
+                "codigo": etapa.codigo(),
+                "parametros": self.parametros(nome),
+                "arquivos": {p: hash_arquivo(self.config[p]) for p in etapa.arquivos},
+                "dependencias": {d: self.chave(d) for d in etapa.dependencias},
+            }
+            texto = json.dumps(conteudo, sort_keys=True, default=repr)
+            self._chaves[nome] = hashlib.sha1(texto.encode()).hexdigest()
+        return self._chaves[nome]
+
+    def caminho_cache(self, nome):
+        return os.path.join(self.diretorio_cache, f"{nome}-{self.chave(nome)}.pkl")
+
+    def __getitem__(self, nome):
+        if nome in self._resultados:
+            return self._resultados[nome]
+
+        etapa = self.etapas[nome]
+        caminho = self.caminho_cache(nome)
+        if self.usar_cache and nome not in self.forcar and os.path.exists(caminho):
+            inicio = time.perf_counter()
+            with intervalo(f"etapa:{nome}", categoria="treino", origem="cache"):
+                resultado = pd.read_pickle(caminho)
+            origem = "cache"
+        else:
+            entradas = {d: self[d] for d in etapa.dependencias}
+            # O tempo não inclui as dependências (registradas à parte)
+            inicio = time.perf_counter()
+            with intervalo(f"etapa:{nome}", categoria="treino", origem="executada"):
+                resultado = etapa.funcao(self.parametros(nome), **entradas)
+            origem = "executada"
+            if self.usar_cache:
+                self._salvar(resultado, caminho)
+
+        self.relatorio.registrar(nome, origem, time.perf_counter() - inicio, self.chave(nome))
+        self._resultados[nome] = resultado
+        return resultado
+
+    def _salvar(self, resultado, caminho):
+        os.makedirs(self.diretorio_cache, exist_ok=True)
+        # Escrita atômica: uma execução interrompida não deixa cache corrompido
+        temporario = caminho + ".tmp"
+        pd.to_pickle(resultado, temporario)
+        os.replace(temporario, caminho)
+
+    def executar(self, alvos=None):
+        # Etapas forçadas rodam mesmo se nenhum alvo precisar delas (os
+        # dependentes vêm do cache quando a chave confere)
+        for alvo in [*(alvos or ALVOS), *sorted(self.forcar)]:
+            self[alvo]
+        return self
+
+
+def caminho_buscas(caminho_modelo):
+    """Relatório das buscas de hiperparâmetros gravado ao lado do modelo."""
+    return os.path.splitext(caminho_modelo)[0] + "_buscas.json"
+
+
+def salvar_modelo(treino, destino=CAMINHO_MODELO):
+    """Grava os artefatos do treino ao lado de `destino`.
+
+    - modelchurn.pkl: pipelines (sem os objetos de busca) e modelo compilado;
+    - modelchurn.json: scorecard lido pelo app, score, serve e incremental;
+    - modelchurn_scorecard.csv: o mesmo scorecard em tabela (faixa/nível e peso);
+    - modelchurn_buscas.json: candidatos, scores e tempos das buscas RF e LR.
+    """
+    from churn.compilado import FORMATO_PICKLE, caminho_leve
+    from churn.scorecard import caminho_scorecard, gravar_tabela
+
+    model_df = treino["exportacao"]
+    model_df.to_pickle(destino)
+    model_df["compilado"].salvar(caminho_leve(destino))
+    gravar_tabela(model_df["compilado"], caminho_scorecard(destino))
+
+    buscas = {
+        "formato": FORMATO_PICKLE,
+        "busca_rf": treino["busca_rf"]["resultados"],
+        "busca_lr": treino["busca_lr"]["resultados"],
+    }
+    with open(caminho_buscas(destino), "w", encoding="utf-8") as f:
+        json.dump(buscas, f, ensure_ascii=False, indent=1)
+
+
+# ------------------------------------------------------------
+# Linha de comando
+# ------------------------------------------------------------
+
+def adicionar_argumentos(parser):
+    """Opções de treino (usadas por `python -m churn train` e churn_ecommerce.py)."""
+    from churn.busca import MODOS_BUSCA
+
+    parser.add_argument("--planilha", default=CONFIG_PADRAO["planilha"])
+    parser.add_argument("--destino", default=CAMINHO_MODELO,
+                        help="Arquivo do modelo treinado")
+    parser.add_argument("--modo-busca", choices=MODOS_BUSCA,
+                        default=CONFIG_PADRAO["modo_busca"],
+                        help="grid (todas as combinações), random ou halving")
+    parser.add_argument("--max-ajustes", type=int, default=None,
+                        help="Orçamento por busca: nº de ajustes (candidatos x folds)")
+    parser.add_argument("--orcamento-segundos", type=float, default=None,
+                        help="Orçamento por busca: tempo de parede")
+    parser.add_argument("--params-rf", type=json.loads, default=None,
+                        help="Grade do Random Forest em JSON")
+    parser.add_argument("--params-lr", type=json.loads, default=None,
+                        help="Grade da regressão logística em JSON")
+    parser.add_argument("--max-bins-discretizacao", type=int, default=None,
+                        help="Pré-agrupa cada variável em até N faixas de quantis antes "
+                             "das árvores da discretização (bases grandes)")
+    parser.add_argument("--cache-dir", default=DIRETORIO_CACHE)
+    parser.add_argument("--sem-cache", action="store_true",
+                        help="Executa todas as etapas sem ler nem gravar o cache")
+    parser.add_argument("--forcar", nargs="+", default=[], metavar="ETAPA",
+                        help=f"Reexecuta as etapas indicadas ({', '.join(e.nome for e in ETAPAS)})")
+    parser.add_argument("--relatorio", default=None, metavar="DIR",
+                        help="Grava a análise exploratória, gráficos e métricas em DIR "
+                             "(sem esta opção o treino não importa matplotlib/seaborn)")
+    parser.add_argument("--trace", default=None, metavar="ARQ",
+                        help="Grava os intervalos medidos (tempo, CPU, linhas, RSS) "
+                             "em ARQ: .jsonl (JSON por linha) ou .json (Chrome trace)")
+    parser.add_argument("--perfil", default=None, metavar="DIR",
+                        help="Grava um perfil cProfile (.prof) por etapa em DIR")
+    return parser
+
+
+def pipeline_dos_argumentos(args):
+    config = {
+        "planilha": args.planilha,
+        "modo_busca": args.modo_busca,
+        "max_ajustes": args.max_ajustes,
+        "orcamento_segundos": args.orcamento_segundos,
+        "max_bins_discretizacao": args.max_bins_discretizacao,
+        "cache_discretizacao": (None if args.sem_cache
+                                else os.path.join(args.cache_dir, "discretizacao")),
+    }
+    if args.params_rf is not None:
+        config["params_rf"] = args.params_rf
+    if args.params_lr is not None:
+        config["params_lr"] = args.params_lr
+    return PipelineTreino(
+        config,
+        diretorio_cache=args.cache_dir,
+        usar_cache=not args.sem_cache,
+        forcar=args.forcar,
+    )
+
+
+def treinar(args):
+    """Executa o treino a partir das opções da linha de comando.
+
+    Salva o modelo, gera o relatório (se pedido) e imprime as métricas e
+    o tempo de cada etapa.
+    """
+    from churn import instrumentacao
+
+    instrumentacao.configurar(diretorio_perfil=args.perfil)
+    treino = pipeline_dos_argumentos(args).executar()
+    with intervalo("salvar_modelo", categoria="treino"):
+        salvar_modelo(treino, args.destino)
+    print(resumo_avaliacao(treino).to_string(index=False))
+    print(f"\nModelo salvo em {args.destino}")
+
+    if args.relatorio:
+        # Import local: sem relatório, matplotlib/seaborn nem são carregados
+        from churn.relatorio import gerar_relatorio
+
+        inicio = time.perf_counter()
+        with intervalo("relatorio", categoria="relatorio"):
+            relatorio = gerar_relatorio(treino, args.relatorio)
+        treino.relatorio.registrar("relatorio", "executada",
+                                   time.perf_counter() - inicio, "-")
+        print(f"Relatório: {len(relatorio.arquivos)} arquivos em {args.relatorio}")
+
+    print(treino.relatorio)
+    trace = instrumentacao.gravar_trace(args.trace)
+    if trace:
+        print(f"Trace: {trace}")
+    return treino
+
+
+def resumo_avaliacao(treino):
+    """Acurácia e AUC de cada modelo em treino, teste e OOT."""
+    linhas = []
+    for modelo, etapa in (("Random Forest", "avaliacao_rf"), ("Regressão Logística", "avaliacao_lr")):
+        for conjunto, avaliacao in treino[etapa].items():
+            linhas.append({
+                "modelo": modelo, "conjunto": conjunto,
+                "acuracia": avaliacao["acuracia"], "auc": avaliacao["auc"],
+            })
+    return pd.DataFrame(linhas)
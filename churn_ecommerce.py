@@ -1,660 +1,29 @@
-
 # ------------------------------------------------------------
 # Leia o README.md para explicação do projeto
 # ------------------------------------------------------------
+# Treino do modelo de churn. As etapas ficam em churn/:
+#   treino.py     carregamento, features derivadas, corte OOT, imputação,
+#                 dummies, seleção de features, buscas RF/LR, avaliação e
+#                 exportação do modelo (etapas com cache por conteúdo)
+#   relatorio.py  análise exploratória, gráficos e métricas (seções 4,
+#                 9-12 e 17-22), gravados em arquivos
+#
+# Uso:
+#   python churn_ecommerce.py                      # treino + relatório em relatorio/
+#   python churn_ecommerce.py --relatorio outro/   # relatório em outro diretório
+#   python churn_ecommerce.py --sem-relatorio      # só o treino (CI/retreino)
+# Demais opções (grade, modo de busca, cache): python churn_ecommerce.py -h
 
-import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
-from sklearn.impute import SimpleImputer
-from feature_engine import discretisation,encoding
-from sklearn import pipeline
-from sklearn.tree import DecisionTreeClassifier
-from sklearn import linear_model
-from sklearn import naive_bayes
-from sklearn import ensemble
-import numpy as np
-from sklearn import model_selection 
-from sklearn import metrics
-
-
-
-# Configurações de visualização para análise exploratória
-pd.set_option("display.max_rows", False)
-pd.set_option("display.max_columns", False)
-
-# -----------------------------
-# Carregamento dos dados
-# -----------------------------
-df = pd.read_excel("dataset/E Commerce Dataset.xlsx", sheet_name="E Comm")
-
-# -----------------------------
-# Visualizando dados e tipos das colunas
-# -----------------------------
-
-df.head()
-df.dtypes
-
-# -----------------------------
-# Ajuste de tipos de dados
-# -----------------------------
-df['Reclamação'] = df['Reclamação'].astype(bool)
-df['Nível da Cidade'] = df['Nível da Cidade'].astype('category')
-# %%
-
-
-# %%
-# ============================================================
-# 4. Análise de Valores Ausentes
-# ============================================================
-# As variáveis apresentam baixo percentual de missing values
-# (máx. ~5,5%), concentrados em colunas numéricas.
-# O volume é considerado seguro para tratamento posterior
-# sem impacto relevante na amostra.
-
-missing_df = pd.DataFrame({
-    'qtd_vazios': df.isnull().sum(),
-    '%vazios': (df.isnull().mean() * 100).round(2)
-}).sort_values('%vazios', ascending=False)
-
-missing_df
-
-# ============================================================
-# 5. Feature Engineering
-# ============================================================
-# Criação de variáveis derivadas para capturar novas features
-# Pequeno offset é utilizado para evitar divisão por zero.
-
-df['pedidos_por_ano_rel'] = (
-    df['Quantidade de Pedidos'] / (df['Tempo de Relacionamento'] + 0.1)
-)
-
-df['rf_score'] = (
-    df['Quantidade de Pedidos'] / (df['Dias Desde Último Pedido'] + 0.1)
-)
-
-df['intensidade_uso'] = (
-    df['Horas no App'] / (df['Quantidade de Pedidos'] + 0.1)
-)
-
-df['insatisfacao_recente'] = (
-    df['Reclamação'] * (6 - df['Pontuação de Satisfação'])
-)
-
-df['distancia_por_pedido'] = (
-    df['Armazém até a Casa'] / (df['Quantidade de Pedidos'] + 0.1)
-)
-
-df['dispositivos_por_pedido'] = (
-    df['Número de Dispositivos Registrados'] / (df['Quantidade de Pedidos'] + 0.1)
-)
-
-
-# ============================================================
-# 6. Separação Out-of-Time (OOT)
-# ============================================================
-# Como o dataset não possui data, utilizamos 'Tempo de Relacionamento'
-# como proxy temporal. Clientes mais recentes simulam dados futuros,
-# permitindo avaliar acurácia do modelo fora do período de treino e teste.
-
-limite_oot = df['Tempo de Relacionamento'].quantile(0.25)
-
-df_oot = df[df['Tempo de Relacionamento'] <= limite_oot].copy()
-df_train = df[df['Tempo de Relacionamento'] > limite_oot].copy()
-
-y_oot = df_oot['Churn']
-
-
-# ============================================================
-# 7. Definição de Features e Target
-# ============================================================
-
-target = 'Churn'
-features = df_train.columns.drop(target)
-
-X = df_train[features]
-y = df_train[target]
-
-
-# ============================================================
-# 8. Split Treino / Teste
-# ============================================================
-# Divisão com estratificação para manter a taxa de churn
-# equivalente entre treino e teste.
-
-X_train, X_test, y_train, y_test = model_selection.train_test_split(
-                                                                    X, y,
-                                                                    random_state=42, 
-                                                                    test_size=0.2, 
-                                                                    stratify=y  
-                                                                )
-# ============================================================
-# 9. Verificação de Balanceamento
-# ============================================================
-
-print("Taxa de churn geral:", y.mean())
-print("Taxa de churn treino:", y_train.mean())
-print("Taxa de churn teste:", y_test.mean())
-
-# %%
-# ============================================================
-# 10. Estatísticas Descritivas por Classe — Variáveis Numéricas
-# ============================================================
-
-# Seleciona apenas variáveis numéricas
-numericas = X_train.select_dtypes(include=['int64', 'float64']).columns
-
-# DataFrame de análise
-df_analise_num = X_train[numericas].copy()
-df_analise_num[target] = y_train
-
-# Média e mediana por classe de churn
-summario_num = (
-    df_analise_num
-    .groupby(target)
-    .agg(['mean', 'median'])
-    .T
-)
-
-# Razão relativa entre não churn e churn
-summario_num['diff_rel'] = summario_num[0] / summario_num[1]
-
-# Ordena pelas mais discriminativas
-summario_num = summario_num.sort_values('diff_rel', ascending=False)
-
-# remove a mediana e mantém só a média como referência para o cálculo da diferença relativa
-diff_rel = summario_num.groupby(level=0)['diff_rel'].first()
-
-# Ordena valores
-sorted_diff = diff_rel.sort_values(ascending=False)
-
-# Gráfico de barras horizontal
-plt.figure(figsize=(12, 8))
-sns.barplot(x=sorted_diff.values, y=sorted_diff.index, palette='coolwarm_r')
-
-# Linha de referência em 1.0 (neutro)
-plt.axvline(1.0, color='black', linestyle='--', linewidth=1)
-
-plt.title('Diferença Relativa (Não Churn / Churn) por Variável Numérica', fontsize=14)
-plt.xlabel('diff_rel')
-plt.ylabel('Variável')
-plt.tight_layout()
-plt.show()
-
-# ============================================================
-# 11. Matriz de Correlação — Variáveis Numéricas
-# ============================================================
-
-corr_matrix = df_analise_num[numericas].corr()
-
-plt.figure(figsize=(14, 10))
-sns.heatmap(
-    corr_matrix,
-    cmap='coolwarm',
-    annot=False,        # evita poluição visual
-    linewidths=0.5
-)
-plt.title("Matriz de Correlação das Variáveis Numéricas", fontsize=14)
-plt.show()
-# %%
-
-# ============================================================
-# 12. Estatísticas Descritivas — Variáveis Categóricas
-# ============================================================
-
-# Seleciona variáveis categóricas e booleanas
-categoricas = X_train.select_dtypes(
-    include=['object', 'category', 'bool']
-).columns
-
-df_analise_cat = X_train[categoricas].copy()
-df_analise_cat[target] = y_train
-
-# Análise por variável categórica
-for col in categoricas:
-    
-    resumo_cat = (
-        pd.crosstab(
-            df_analise_cat[col],
-            df_analise_cat[target],
-            normalize='index'
-        ) * 100
-    )
-    
-    resumo_cat = resumo_cat.rename(
-        columns={0: '%Nao_Churn', 1: '%Churn'}
-    )
-    
-    # Poder discriminativo relativo
-    resumo_cat['diff_rel'] = resumo_cat['%Churn'] / resumo_cat['%Nao_Churn']
-    
-    resumo_cat = resumo_cat.sort_values('diff_rel', ascending=False)
-    
-    print(f"\nVariável: {col}")
-    print(resumo_cat.round(2))
-
-# %%
-# ============================================================
-# 13. Remoção de variáveis que não agregam pro modelo
-# ============================================================
-
-# ID do cliente é apenas identificador e não agrega poder preditivo
-X_train = X_train.drop(columns=["ID do Cliente"])
-X_test  = X_test.drop(columns=["ID do Cliente"])
-df_oot  = df_oot.drop(columns=["ID do Cliente"])
-
-# ============================================================
-# 14. Imputação de valores ausentes 
-# ============================================================
-
-
-# Identifica colunas com missing (apenas colunas numericas possui missing)
-numericas = X_train.select_dtypes(include=['int64', 'float64']).columns
-
-colunas_numericas_com_missing = (
-    X_train[numericas]
-    .columns[X_train[numericas].isna().sum() > 0]
-    .tolist()
-)
-
-# Imputação pela mediana (boa performance para lidar com outliers)
-imputer = SimpleImputer(strategy='median')
-
-# Ajuste apenas no treino (evita vazamento de informação)
-X_train[colunas_numericas_com_missing] = imputer.fit_transform(
-    X_train[colunas_numericas_com_missing]
-)
-
-# Aplicação nos demais conjuntos
-X_test[colunas_numericas_com_missing] = imputer.transform(
-    X_test[colunas_numericas_com_missing]
-)
-df_oot[colunas_numericas_com_missing] = imputer.transform(
-    df_oot[colunas_numericas_com_missing]
-)
-
-# ============================================================
-# 15. Dummies Encoding das variáveis categóricas
-# ============================================================
-
-X_train = pd.get_dummies(X_train, columns=categoricas, drop_first=False)
-X_test  = pd.get_dummies(X_test,  columns=categoricas, drop_first=False)
-df_oot  = pd.get_dummies(df_oot,  columns=categoricas, drop_first=False)
-
-# Alinha colunas entre treino, teste e OOT
-X_test = X_test.reindex(columns=X_train.columns, fill_value=0)
-df_oot = df_oot.reindex(columns=X_train.columns, fill_value=0)
-
-# ============================================================
-# 16. Inclusão da variável alvo no conjunto OOT
-# ============================================================
-
-df_oot['Churn'] = y_oot
-
-# ============================================================
-# 17. Seleção de features com Árvore de Decisão
-# ============================================================
-
-# Modelo de arvore de decisão para avaliar importância das variáveis
-arvore = DecisionTreeClassifier(random_state=42)
-arvore.fit(X_train, y_train)
-
-# ============================================================
-# 18. Importância das features
-# ============================================================
-
-features_importances = (
-    pd.Series(arvore.feature_importances_, index=X_train.columns)
-      .sort_values(ascending=False)
-      .reset_index()
-)
-
-features_importances.columns = ['feature', 'importance']
-features_importances['importance_acumulada'] = features_importances['importance'].cumsum()
-
-features_importances
-
-# Seleciona features responsáveis por 95% da importância total
-best_features = features_importances[
-    features_importances['importance_acumulada'] < 0.96
-]['feature'].tolist()
-
-#Grafico de Pareto - 95% variaveis mais importantes
-# Ordena as features pela importância (decrescente)
-features_importances = features_importances.sort_values(by='importance', ascending=False)
-
-# Dados
-features = features_importances['feature']
-importances = features_importances['importance']
-importances_acumuladas = features_importances['importance_acumulada']
-
-# Cria a figura
-fig, ax1 = plt.subplots(figsize=(12,6))
-
-# Gráfico de barras (importância individual)
-ax1.bar(features, importances, color='steelblue')
-ax1.set_ylabel('Importância (%)')
-ax1.set_xticklabels(features, rotation=90)
-
-# Cria eixo secundário para a linha acumulada
-ax2 = ax1.twinx()
-ax2.plot(features, importances_acumuladas, color='red', marker='o', linestyle='-')
-ax2.set_ylabel('Importância Acumulada')
-
-# Linha de corte em 95%
-ax2.axhline(0.95, color='green', linestyle='--', label='Corte 95%')
-ax2.legend(loc='lower right')
-
-plt.title('Gráfico de Pareto - Importância das Features')
-plt.tight_layout()
-plt.show()
-
-# %%
-# ============================================================
-# ETAPA 19 —  RANDOM FOREST
-# ============================================================
-
-# ------------------------------------------------------------
-# Definição do modelo Random Forest e Hiperparametros
-# ------------------------------------------------------------
-
-model = ensemble.RandomForestClassifier(
-            random_state=42,
-            min_samples_leaf=20,
-            n_jobs=2,
-            n_estimators=500
-)
-
-params = {
-    "min_samples_leaf": [15, 20, 25, 30, 50],
-    "n_estimators": [100, 200, 500, 1000],
-    "criterion": ['gini', 'entropy', 'log_loss']
-}
-
-grid = model_selection.GridSearchCV(
-            model,
-            params,
-            cv=3,
-            scoring='roc_auc',
-            verbose=4
-)
-# %%
-
-
-# ------------------------------------------------------------
-# Pipeline do modelo
-# ------------------------------------------------------------
-
-model_pipeline = pipeline.Pipeline(
-    steps=[
-        ("Grid", grid)
-    ]
-)
-
-# ------------------------------------------------------------
-#Treinamento do Pipeline com Random Forest  +  GridSearchCV
-# ------------------------------------------------------------
-
-model_pipeline.fit(X_train[best_features], y_train)
-
-# ------------------------------------------------------------
-# Visualizar os melhores hiperparâmetros
-# ------------------------------------------------------------
-
-print(grid.best_params_)
-
-# %%
-# ============================================================
-# ETAPA 20 — MODELO: REGRESSÃO LOGÍSTICA
-# ============================================================
-# Modelo linear para classificação binária, usado como baseline
-# e comparação com modelos não lineares.
-
-
-# Discretização supervisionada + OneHot
-# ------------------------------------------------------------
-# Aqui tratamos variáveis numéricas relevantes usando árvore de decisão
-# para discretização (faixa de valores), reduzindo sensibilidade a outliers e capturando
-# padrões não lineares.
-# ------------------------------------------------------------
-
-# ------------------------------------------------------------
-# Seleção das variáveis numéricas mais relevantes
-# ------------------------------------------------------------
-
-best_features_numericas = [
-    col for col in best_features if col in numericas
-]
-
-# ------------------------------------------------------------
-# Discretização supervisionada
-# ------------------------------------------------------------
-
-tree_discretization = discretisation.DecisionTreeDiscretiser(
-                        variables=best_features_numericas,
-                        regression=False,
-                        bin_output='bin_number',
-                        cv=3
-)
-
-
-# ------------------------------------------------------------
-# One-Hot Encoding dos bins
-# ------------------------------------------------------------
-
-onehot = encoding.OneHotEncoder(
-            variables=best_features_numericas,
-            ignore_format=True
-)
-# %%
-
-
-# ------------------------------------------------------------
-# Definição do modelo regressão logistica
-# ------------------------------------------------------------
-
-log_model = linear_model.LogisticRegression(
-    solver='liblinear',
-    max_iter=500,
-    random_state=42
-)
-
-
-# ------------------------------------------------------------
-# Grid de hiperparâmetros
-# ------------------------------------------------------------
-
-log_params = {
-    "penalty": ["l1", "l2"],
-    "C": [0.01, 0.1, 1, 10, 100]
-}
-
-log_grid = model_selection.GridSearchCV(
-    estimator=log_model,
-    param_grid=log_params,
-    cv=3,
-    scoring="roc_auc",
-    n_jobs=-1,
-    verbose=4
-)
-# %%
-
-
-# ------------------------------------------------------------
-# Pipeline completo
-# ------------------------------------------------------------
-
-log_pipeline = pipeline.Pipeline(
-    steps=[
-        ("Discretizar", tree_discretization),
-        ("OneHot", onehot),
-        ("Grid", log_grid)
-    ]
-)
-
-log_pipeline.fit(X_train[best_features], y_train)
-
-
-# ------------------------------------------------------------
-# Melhores hiperparâmetros
-# ------------------------------------------------------------
-
-print("Melhores parâmetros da regressão logística:")
-print(log_grid.best_params_)
-
-
-# %%
-# ============================================================
-# ETAPA 21 — AVALIAÇÃO DOS MODELOS
-# ============================================================
-
-
-# ------------------------------------------------------------
-# Avaliação — Random Forest (Pipeline principal)
-# ------------------------------------------------------------
-
-# Treino
-y_train_predict = model_pipeline.predict(X_train[best_features])
-y_train_proba   = model_pipeline.predict_proba(X_train[best_features])[:,1]
-
-acc_train = metrics.accuracy_score(y_train, y_train_predict)
-auc_train = metrics.roc_auc_score(y_train, y_train_proba)
-roc_train = metrics.roc_curve(y_train, y_train_proba)
-
-# Teste
-y_test_predict = model_pipeline.predict(X_test[best_features])
-y_test_proba   = model_pipeline.predict_proba(X_test[best_features])[:,1]
-
-acc_test = metrics.accuracy_score(y_test, y_test_predict)
-auc_test = metrics.roc_auc_score(y_test, y_test_proba)
-roc_test = metrics.roc_curve(y_test, y_test_proba)
-
-
-# OOT (base futura)
-y_oot_predict = model_pipeline.predict(df_oot[best_features])
-y_oot_proba   = model_pipeline.predict_proba(df_oot[best_features])[:,1]
-
-acc_oot = metrics.accuracy_score(df_oot[target], y_oot_predict)
-auc_oot = metrics.roc_auc_score(df_oot[target], y_oot_proba)
-roc_oot = metrics.roc_curve(df_oot[target], y_oot_proba)
-print("Acurácia treino:", acc_train)
-print("AUC treino:", auc_train)
-print("Acurácia teste:", acc_test)
-print("AUC teste:", auc_test)
-
-print("Acurácia OOT:", acc_oot)
-print("AUC OOT:", auc_oot)
-
-# %%
-# ------------------------------------------------------------
-# Avaliação — Regressão Logística
-# ------------------------------------------------------------
-
-# Treino
-y_train_predict = log_pipeline.predict(X_train[best_features])
-y_train_proba   = log_pipeline.predict_proba(X_train[best_features])[:,1]
-
-acc_train = metrics.accuracy_score(y_train, y_train_predict)
-auc_train = metrics.roc_auc_score(y_train, y_train_proba)
-roc_train = metrics.roc_curve(y_train, y_train_proba)
-
-# Teste
-y_test_predict = log_pipeline.predict(X_test[best_features])
-y_test_proba   = log_pipeline.predict_proba(X_test[best_features])[:,1]
-
-acc_test = metrics.accuracy_score(y_test, y_test_predict)
-auc_test = metrics.roc_auc_score(y_test, y_test_proba)
-roc_test = metrics.roc_curve(y_test, y_test_proba)
-
-# OOT
-y_oot_predict = log_pipeline.predict(df_oot[best_features])
-y_oot_proba   = log_pipeline.predict_proba(df_oot[best_features])[:,1]
-
-acc_oot = metrics.accuracy_score(df_oot[target], y_oot_predict)
-auc_oot = metrics.roc_auc_score(df_oot[target], y_oot_proba)
-roc_oot = metrics.roc_curve(df_oot[target], y_oot_proba)
-
-print("Acurácia treino:", acc_train)
-print("AUC treino:", auc_train)
-print("Acurácia teste:", acc_test)
-print("AUC teste:", auc_test)
-print("Acurácia OOT:", acc_oot)
-print("AUC OOT:", auc_oot)
-
-# %%
-# ------------------------------------------------------------
-# Importância das features — Regressão Logística
-# ------------------------------------------------------------
-
-#  Extração do melhor modelo e coeficientes
-best_log_model = log_pipeline.named_steps["Grid"].best_estimator_
-coef = best_log_model.coef_[0]
-
-# Transformação dos dados para alinhar com o modelo (bins + dummies)
-X_transformado = log_pipeline[:-1].transform(X_train[best_features])
-feature_names = X_transformado.columns
-
-#  Validação de integridade
-assert len(feature_names) == len(coef), "Mismatch entre features e coeficientes"
-
-# Organização das importâncias em DataFrame
-importancia_features = pd.DataFrame({
-    "feature": feature_names,
-    "coeficiente": coef,
-    "importancia_absoluta": np.abs(coef)
-}).sort_values("importancia_absoluta", ascending=False)
-
-#  Seleção das top 20 para visualização
-top_features = importancia_features.head(20)
-
-# Configuração e plotagem do gráfico
-plt.figure(figsize=(8, 6))
-
-# Cores condicionais: Verde para impacto positivo, Vermelho para negativo
-colors = ["seagreen" if c > 0 else "tomato" for c in top_features["coeficiente"]]
-
-plt.barh(top_features["feature"], top_features["coeficiente"], color=colors)
-plt.axvline(0, color='black', linewidth=1)
-
-plt.xlabel("Coeficiente")
-plt.title("Importância das Features - Regressão Logística")
-plt.gca().invert_yaxis()  # Garante que a mais importante fique no topo
-# Legenda para cores 
-plt.legend(handles=[ plt.Rectangle((0,0),1,1,color="seagreen", label="Aumenta prob. Churn"), 
-plt.Rectangle((0,0),1,1,color="tomato", label="Reduz prob. chunr") ], 
-loc="lower right")
-plt.show()
-
-# %%
-# ============================================================
-# ETAPA 22 — Plotando curva ROC
-# ============================================================
-
-plt.plot(roc_train[0], roc_train[1]) 
-plt.plot(roc_test[0], roc_test[1]) 
-plt.plot(roc_oot[0], roc_oot[1]) 
-plt.plot([0,1] , [0,1], "--", color ='black')
-plt.title("Curva ROC")
-plt.ylabel("Sensibilidade")
-plt.xlabel("1- Especificidade")
-plt.legend([ 
-            f"Treino = {100*auc_train:.2f}",
-            f"Teste = {100*auc_test:.2f}",
-            f"Out of Time = {100*auc_oot:.2f}",
-            ])
-plt.grid(True)
-plt.show()
-# %%
-# ============================================================
-# ETAPA 23 — Salvando modelo e features serializados
-# ============================================================
+import argparse
 
-#
+from churn import treino
 
-model_df = pd.Series( {
-    "model": log_pipeline,
-    "features": best_features,
+DIRETORIO_RELATORIO = "relatorio"
 
-})
-model_df.to_pickle("modelchurn.pkl")
+parser = treino.adicionar_argumentos(argparse.ArgumentParser(prog="churn_ecommerce.py"))
+parser.set_defaults(relatorio=DIRETORIO_RELATORIO)
+parser.add_argument("--sem-relatorio", dest="relatorio", action="store_const", const=None,
+                    help="Não gera o relatório (não importa matplotlib/seaborn)")
 
+if __name__ == "__main__":
+    treino.treinar(parser.parse_args())
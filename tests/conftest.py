@@ -0,0 +1,58 @@
+# ============================================================
+# Fixtures compartilhadas dos testes
+# ============================================================
+# Os testes usam os artefatos versionados (modelchurn.pkl/.json e o
+# scorecard em CSV) e a planilha de clientes em dataset/.
+#
+# Uso: python -m pytest -q
+
+import os
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+if RAIZ not in sys.path:
+    sys.path.insert(0, RAIZ)
+
+CAMINHO_PICKLE = os.path.join(RAIZ, "modelchurn.pkl")
+CAMINHO_LEVE = os.path.join(RAIZ, "modelchurn.json")
+CAMINHO_SCORECARD = os.path.join(RAIZ, "modelchurn_scorecard.csv")
+CAMINHO_PLANILHA = os.path.join(RAIZ, "dataset", "E Commerce Dataset.xlsx")
+
+# Treino completo em segundos: grades de um candidato, sem cache de discretização
+CONFIG_TREINO_PEQUENO = {
+    "planilha": CAMINHO_PLANILHA,
+    "params_rf": {"min_samples_leaf": [20], "n_estimators": [20], "criterion": ["gini"]},
+    "params_lr": {"l1_ratio": [0], "C": [1]},
+    "cache_discretizacao": None,
+}
+
+
+@pytest.fixture(scope="session")
+def model_df():
+    import pandas as pd
+
+    return pd.read_pickle(CAMINHO_PICKLE)
+
+
+@pytest.fixture(scope="session")
+def compilado():
+    from churn.compilado import ModeloCompilado
+
+    return ModeloCompilado.carregar(CAMINHO_LEVE)
+
+
+@pytest.fixture(scope="session")
+def base():
+    """Base inteira da planilha (clientes ativos e churn), com a coluna alvo."""
+    from churn.dados import carregar_dataset
+
+    return carregar_dataset(CAMINHO_PLANILHA)
+
+
+@pytest.fixture(scope="session")
+def dataset(base):
+    """A base sem a coluna alvo (entrada dos modelos)."""
+    return base.drop(columns="Churn")
@@ -0,0 +1,132 @@
+# Micro-lotes (churn.agrupador): política da FilaLotes e as frentes com thread e asyncio
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+import pytest
+
+from churn.agrupador import AgrupadorPontuacao, FilaLotes
+from churn.servico import AgrupadorLotes
+
+
+def _dobro(lote):
+    return np.asarray(lote, dtype=np.float64)[:, 0] * 2
+
+
+class PontuacaoTravada:
+    """pontuar(lote) que segura o primeiro lote até `liberar` e guarda o tamanho de cada lote."""
+
+    def __init__(self):
+        self.lotes = []
+        self.iniciou = threading.Event()
+        self.liberar = threading.Event()
+
+    def __call__(self, lote):
+        self.lotes.append(len(lote))
+        self.iniciou.set()
+        self.liberar.wait(5)
+        return _dobro(lote)
+
+
+def _matriz(*valores):
+    return np.array(valores, dtype=np.float64).reshape(-1, 1)
+
+
+def test_fila_corta_em_max_lote_na_ordem_de_chegada():
+    fila = FilaLotes(_dobro, max_lote=3)
+    futuros = [Future() for _ in range(4)]
+    for i, futuro in enumerate(futuros):
+        fila.adicionar(_matriz(i, 10 + i) if i == 1 else _matriz(i), futuro)
+
+    pedidos = []
+    assert fila.drenar(pedidos) == 3
+    # Lote cheio: não espera mais nada
+    assert not fila.esperar_mais(pedidos, 3)
+    fila.pontuar(pedidos)
+    assert [f.done() for f in futuros] == [True, True, False, False]
+    np.testing.assert_array_equal(futuros[1].result(), [2, 22])
+    np.testing.assert_array_equal(futuros[0].result(), [0])
+
+    restantes = []
+    assert fila.drenar(restantes) == 2
+    assert fila.esperar_mais(restantes, 2)
+    fila.pontuar(restantes)
+    assert fila.estatisticas() == {"lotes": 2, "linhas_por_lote": 2.5, "maior_lote": 3}
+
+
+def test_fila_pedido_isolado_nao_espera_e_cancelado_fica_fora():
+    fila = FilaLotes(_dobro, max_espera_ms=1000)
+    isolado = Future()
+    fila.adicionar(_matriz(1), isolado)
+    pedidos = []
+    assert not fila.esperar_mais(pedidos, fila.drenar(pedidos))
+
+    cancelado = Future()
+    cancelado.cancel()
+    fila.adicionar(_matriz(2), cancelado)
+    fila.pontuar(pedidos + [fila.pendentes.popleft()])
+    np.testing.assert_array_equal(isolado.result(), [2])
+    assert fila.estatisticas()["maior_lote"] == 1
+
+
+def test_thread_junta_pedidos_simultaneos():
+    pontuar = PontuacaoTravada()
+    agrupador = AgrupadorPontuacao(pontuar, max_lote=4, max_espera_ms=0)
+    primeiro = agrupador.submeter(_matriz(0))
+    assert pontuar.iniciou.wait(5)
+    # Chegam enquanto o primeiro lote é pontuado: formam os próximos lotes
+    seguintes = [agrupador.submeter(_matriz(i)) for i in range(1, 7)]
+    pontuar.liberar.set()
+
+    assert primeiro.result(5)[0] == 0
+    assert [futuro.result(5)[0] for futuro in seguintes] == [2, 4, 6, 8, 10, 12]
+    assert pontuar.lotes == [1, 4, 2]
+    agrupador.encerrar()
+
+
+def test_thread_espera_ate_o_prazo_com_pedidos_simultaneos():
+    pontuar = PontuacaoTravada()
+    agrupador = AgrupadorPontuacao(pontuar, max_lote=100, max_espera_ms=100)
+    agrupador.submeter(_matriz(0))
+    assert pontuar.iniciou.wait(5)
+    a, b = agrupador.submeter(_matriz(1)), agrupador.submeter(_matriz(2))
+    inicio = time.perf_counter()
+    pontuar.liberar.set()
+    assert a.result(5)[0] == 2 and b.result(5)[0] == 4
+    # Dois pedidos pendentes: o lote espera max_espera_ms por mais pedidos
+    assert time.perf_counter() - inicio >= 0.09
+    assert pontuar.lotes == [1, 2]
+    agrupador.encerrar()
+
+
+def test_thread_erro_vai_para_todos_os_pedidos_do_lote():
+    def falha(lote):
+        raise ValueError("falhou")
+
+    agrupador = AgrupadorPontuacao(falha)
+    with pytest.raises(ValueError, match="falhou"):
+        agrupador.pontuar(_matriz(1), timeout=5)
+    agrupador.encerrar()
+    with pytest.raises(RuntimeError, match="encerrado"):
+        agrupador.submeter(_matriz(1))
+
+
+class CompiladoFalso:
+    def pontuar_matriz(self, matriz):
+        return _dobro(matriz)
+
+
+def test_asyncio_usa_a_mesma_politica():
+    async def principal():
+        agrupador = AgrupadorLotes(CompiladoFalso(), max_lote=3, max_espera_ms=0)
+        tarefa = asyncio.create_task(agrupador.executar())
+        resultados = await asyncio.gather(*(agrupador.pontuar(_matriz(i)) for i in range(5)))
+        tarefa.cancel()
+        return [r[0] for r in resultados], agrupador.estatisticas()
+
+    resultados, estatisticas = asyncio.run(principal())
+    assert resultados == [0, 2, 4, 6, 8]
+    assert estatisticas == {"lotes": 2, "linhas_por_lote": 2.5, "maior_lote": 3}
@@ -0,0 +1,79 @@
+# Busca com orçamento (churn.busca) contra o GridSearchCV do sklearn
+
+import numpy as np
+import pytest
+from sklearn.datasets import make_classification
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.model_selection import GridSearchCV
+
+from churn.busca import BuscaComOrcamento, criar_busca, resultados_busca
+
+GRADE = {"l1_ratio": [1, 0], "C": [0.01, 0.1, 1]}
+
+
+@pytest.fixture(scope="module")
+def dados():
+    return make_classification(n_samples=300, n_features=6, random_state=0)
+
+
+def _modelo():
+    return LogisticRegression(solver="liblinear", random_state=42)
+
+
+def test_sem_orcamento_igual_ao_grid(dados):
+    X, y = dados
+    grid = GridSearchCV(_modelo(), GRADE, cv=3, scoring="roc_auc").fit(X, y)
+    busca = BuscaComOrcamento(_modelo(), GRADE, cv=3, scoring="roc_auc", lote=2).fit(X, y)
+
+    assert busca.candidatos_avaliados_ == 6 and not busca.orcamento_esgotado_
+    assert busca.best_params_ == grid.best_params_
+    assert list(busca.cv_results_["params"]) == list(grid.cv_results_["params"])
+    np.testing.assert_array_equal(busca.cv_results_["mean_test_score"],
+                                  grid.cv_results_["mean_test_score"])
+    np.testing.assert_array_equal(busca.predict_proba(X), grid.predict_proba(X))
+
+
+def test_max_ajustes_limita_os_candidatos(dados):
+    X, y = dados
+    busca = criar_busca(_modelo(), GRADE, modo="random", cv=3, max_ajustes=6, n_jobs=1)
+    busca.fit(X, y)
+
+    assert isinstance(busca, BuscaComOrcamento)
+    assert busca.candidatos_avaliados_ == 2 and busca.orcamento_esgotado_
+    resumo = resultados_busca(busca)
+    assert resumo["busca"] == "BuscaComOrcamento" and len(resumo["candidatos"]) == 2
+
+
+def test_orcamento_de_tempo_para_cedo(dados):
+    X, y = dados
+    busca = BuscaComOrcamento(_modelo(), GRADE, cv=3, scoring="roc_auc", n_jobs=1,
+                              orcamento_segundos=1e-9).fit(X, y)
+    # Só o primeiro lote (uma rodada de ajustes) roda antes de o orçamento ser conferido
+    assert busca.candidatos_avaliados_ == 1 and busca.orcamento_esgotado_
+    assert len(busca.cv_results_["params"]) == 1
+
+
+def test_max_ajustes_menor_que_os_folds(dados):
+    X, y = dados
+    busca = BuscaComOrcamento(_modelo(), GRADE, cv=3, max_ajustes=2)
+    with pytest.raises(ValueError, match="pelo menos 3"):
+        busca.fit(X, y)
+
+
+def test_halving_nao_aceita_orcamento():
+    with pytest.raises(ValueError, match="halving"):
+        criar_busca(_modelo(), GRADE, modo="halving", max_ajustes=6)
+    with pytest.raises(ValueError, match="halving"):
+        criar_busca(_modelo(), GRADE, modo="halving", orcamento_segundos=10)
+
+
+def test_n_jobs_so_nos_ensembles():
+    floresta = RandomForestClassifier(n_jobs=4)
+    busca = criar_busca(floresta, {"min_samples_leaf": [1, 5]})
+    assert busca.estimator.n_jobs == 1
+    # O estimador de quem chamou não é alterado
+    assert floresta.n_jobs == 4
+
+    busca = criar_busca(_modelo(), GRADE)
+    assert busca.estimator.get_params()["n_jobs"] is None
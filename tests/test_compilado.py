@@ -0,0 +1,69 @@
+# Modelo compilado e scorecard contra o pipeline sklearn do modelchurn.pkl
+
+import json
+
+import numpy as np
+import pandas as pd
+
+from churn.compilado import FORMATO_LEVE, ModeloCompilado, verificar_equivalencia
+from churn.formulas import calcular_derivadas
+from churn.scorecard import verificar_scorecard
+from conftest import CAMINHO_SCORECARD
+
+TOLERANCIA = 1e-9
+
+
+def test_compilado_igual_ao_predict_proba(model_df, compilado, dataset):
+    pipeline = model_df["pipeline"]
+    assert verificar_equivalencia(compilado, pipeline, dataset, TOLERANCIA) <= TOLERANCIA
+    # Compilar de novo o pipeline do pickle dá o mesmo scorecard do JSON
+    recompilado = ModeloCompilado.de_pipeline(pipeline)
+    assert recompilado.versao() == compilado.versao()
+    assert verificar_scorecard(compilado, model_df, dataset, TOLERANCIA) <= TOLERANCIA
+
+
+def test_salvar_carregar_formato_2(compilado, dataset, tmp_path):
+    destino = str(tmp_path / "modelo.json")
+    compilado.salvar(destino)
+    with open(destino, encoding="utf-8") as f:
+        assert json.load(f)["formato"] == FORMATO_LEVE == 2
+
+    carregado = ModeloCompilado.carregar(destino)
+    assert carregado.versao() == compilado.versao()
+    np.testing.assert_array_equal(carregado.pontuar(dataset), compilado.pontuar(dataset))
+
+
+def _limites_das_faixas(faixas):
+    """Limites (x <= limite) a partir dos rótulos '<= a', 'a < x <= b', '> b'."""
+    return [float(faixa.rsplit("<= ", 1)[1]) for faixa in faixas if "<=" in faixa]
+
+
+def pontuar_pela_tabela(tabela, compilado, df):
+    """Probabilidade calculada só com a tabela do scorecard (como descrita no CSV)."""
+    colunas = {c: df[c].to_numpy(dtype=np.float64, na_value=np.nan) for c in compilado.entradas}
+    calcular_derivadas(colunas.__getitem__,
+                       lambda nome: colunas.setdefault(nome, np.empty(len(df))))
+    for coluna, mediana in compilado.medianas.items():
+        if coluna in colunas:
+            colunas[coluna] = np.where(np.isnan(colunas[coluna]), mediana, colunas[coluna])
+
+    z = np.full(len(df), float(tabela.loc[tabela["Tipo"] == "intercepto", "Peso"].iloc[0]))
+    for (var, tipo), linhas in tabela[tabela["Tipo"] != "intercepto"].groupby(
+            ["Variável", "Tipo"], sort=False):
+        pesos = linhas["Peso"].to_numpy(dtype=np.float64)
+        if tipo == "faixa":
+            limites = _limites_das_faixas(linhas["Faixa/Nível"])
+            z += pesos[np.searchsorted(limites, colunas[var], side="left")]
+        elif tipo == "nível":
+            por_nivel = dict(zip(linhas["Faixa/Nível"], pesos))
+            desconhecido = por_nivel.pop("(desconhecido)")
+            z += df[var].astype(str).map(por_nivel).fillna(desconhecido).to_numpy(np.float64)
+        else:
+            z += pesos[0] * colunas[var]
+    return 1 / (1 + np.exp(-z))
+
+
+def test_scorecard_csv_reproduz_o_modelo(compilado, dataset):
+    tabela = pd.read_csv(CAMINHO_SCORECARD, dtype={"Faixa/Nível": str}, keep_default_na=False)
+    obtido = pontuar_pela_tabela(tabela, compilado, dataset)
+    np.testing.assert_allclose(obtido, compilado.pontuar(dataset), rtol=0, atol=TOLERANCIA)
@@ -0,0 +1,91 @@
+# DiscretizadorArvore (churn.discretizacao) contra o DecisionTreeDiscretiser do feature_engine
+
+import numpy as np
+import pytest
+from feature_engine.discretisation import DecisionTreeDiscretiser
+from sklearn.base import clone
+
+from churn.discretizacao import DiscretizadorArvore
+
+PARAMETROS = {"regression": False, "bin_output": "bin_number", "cv": 3}
+
+
+@pytest.fixture(scope="module")
+def dados(model_df, base):
+    """Entrada do passo Discretizar do modelo (colunas pré-processadas) e o alvo."""
+    pipeline = model_df["pipeline"]
+    variaveis = list(pipeline.named_steps["Discretizar"].variables_)
+    return pipeline[:3].transform(base), base["Churn"], variaveis
+
+
+@pytest.fixture(scope="module")
+def referencia(dados):
+    X, y, variaveis = dados
+    return DecisionTreeDiscretiser(variables=variaveis, **PARAMETROS).fit(X, y)
+
+
+def _limites(discretizador):
+    return {var: [float(x) for x in limites]
+            for var, limites in discretizador.binner_dict_.items()}
+
+
+def test_sem_max_bins_igual_ao_feature_engine(dados, referencia):
+    X, y, variaveis = dados
+    discretizador = DiscretizadorArvore(variables=variaveis, **PARAMETROS).fit(X, y)
+    assert _limites(discretizador) == _limites(referencia)
+    assert discretizador.scores_dict_ == referencia.scores_dict_
+    assert discretizador.transform(X).equals(referencia.transform(X))
+
+
+def test_histograma_sem_perda_igual_ao_feature_engine(dados, referencia):
+    # Com max_bins acima do número de valores distintos o histograma não agrupa nada
+    X, y, variaveis = dados
+    max_bins = int(X[variaveis].nunique().max())
+    discretizador = DiscretizadorArvore(variables=variaveis, max_bins=max_bins,
+                                        **PARAMETROS).fit(X, y)
+    assert _limites(discretizador) == _limites(referencia)
+
+
+def test_histograma_proximo_do_feature_engine(dados, referencia):
+    X, y, variaveis = dados
+    discretizador = DiscretizadorArvore(variables=variaveis, max_bins=32,
+                                        **PARAMETROS).fit(X, y)
+    limites, limites_referencia = _limites(discretizador), _limites(referencia)
+    distintos = X[variaveis].nunique()
+    for var in variaveis:
+        # O score de validação cruzada da árvore escolhida fica próximo do exato
+        assert discretizador.scores_dict_[var] == pytest.approx(
+            referencia.scores_dict_[var], abs=0.01)
+        # Sem agrupamento (poucos valores distintos) os limites são os mesmos
+        if distintos[var] <= 32:
+            assert limites[var] == limites_referencia[var]
+
+
+def test_cache_de_limites(dados, referencia, tmp_path):
+    X, y, variaveis = dados
+    parametros = {"variables": variaveis, "diretorio_cache": str(tmp_path), **PARAMETROS}
+    primeiro = DiscretizadorArvore(**parametros).fit(X, y)
+    assert primeiro.variaveis_do_cache_ == []
+
+    segundo = DiscretizadorArvore(**parametros).fit(X, y)
+    assert segundo.variaveis_do_cache_ == variaveis
+    assert _limites(segundo) == _limites(referencia)
+
+    # Outro alvo é outra chave: nada vem do cache
+    outro = DiscretizadorArvore(**parametros).fit(X, 1 - y)
+    assert outro.variaveis_do_cache_ == []
+
+
+def test_parametros_conferidos_no_fit(dados):
+    X, y, variaveis = dados
+    discretizador = DiscretizadorArvore(variables=variaveis, max_bins=1, **PARAMETROS)
+    # __init__, clone e set_params só guardam os parâmetros
+    copia = clone(discretizador).set_params(bin_output="prediction")
+    assert copia.get_params()["max_bins"] == 1
+    with pytest.raises(ValueError, match="pelo menos 2"):
+        discretizador.fit(X, y)
+    with pytest.raises(ValueError, match="bin_output"):
+        copia.fit(X, y)
+    with pytest.raises(ValueError, match="regression=False"):
+        DiscretizadorArvore(variables=variaveis, max_bins=8, regression=True).fit(
+            X, np.arange(len(X), dtype=float))
@@ -0,0 +1,100 @@
+# Pontuação incremental (churn.incremental): deltas de novos, alterados e removidos
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn.incremental import (
+    COLUNA_PROBA_ANTERIOR,
+    COLUNA_SITUACAO,
+    _loja_vazia,
+    atualizar_pontuacao,
+    carregar_loja,
+    pontuar_incremental,
+)
+from churn.lote import COLUNA_ACAO, COLUNA_ID, COLUNA_PROBA, pontuar_base
+
+DIAS = "Dias Desde Último Pedido"
+
+
+def _confere_loja(compilado, loja, base):
+    esperado, _ = pontuar_base(compilado, base)
+    pd.testing.assert_frame_equal(loja[[COLUNA_ID, COLUNA_PROBA, COLUNA_ACAO]], esperado,
+                                  check_dtype=False, check_categorical=False)
+
+
+@pytest.fixture(scope="module")
+def primeira(compilado, base):
+    return pontuar_incremental(compilado, base, _loja_vazia(), tamanho_bloco=1500)
+
+
+def test_loja_vazia_pontua_todos_como_novos(compilado, base, primeira):
+    loja, delta, estatisticas = primeira
+    _confere_loja(compilado, loja, base)
+    assert estatisticas.completa and estatisticas.repontuadas == estatisticas.linhas == len(loja)
+    assert (delta[COLUNA_SITUACAO] == "novo").all()
+    assert delta[COLUNA_ID].tolist() == loja[COLUNA_ID].tolist()
+    assert delta[COLUNA_PROBA_ANTERIOR].isna().all()
+
+
+def test_sem_mudancas_delta_vazio(compilado, base, primeira):
+    loja, _, _ = primeira
+    nova, delta, estatisticas = pontuar_incremental(compilado, base, loja, compilado.versao())
+    assert delta.empty and estatisticas.repontuadas == 0
+    pd.testing.assert_frame_equal(nova, loja)
+
+    # Versão do modelo diferente: repontua tudo, mas o delta continua vazio
+    _, delta, estatisticas = pontuar_incremental(compilado, base, loja, "outra versão")
+    assert delta.empty and estatisticas.completa
+    assert estatisticas.repontuadas == estatisticas.linhas
+
+
+def test_novos_alterados_e_removidos(compilado, base, primeira):
+    loja, _, _ = primeira
+    ativos = base[base["Churn"] == 0]
+    ids = ativos[COLUNA_ID].to_numpy()
+    alterados, churnados, excluidos = ids[:300], ids[300:320], ids[320:330]
+
+    nova_base = base[~base[COLUNA_ID].isin(excluidos)].copy()
+    nova_base.loc[nova_base[COLUNA_ID].isin(alterados), DIAS] = 30.0
+    nova_base.loc[nova_base[COLUNA_ID].isin(churnados), "Churn"] = 1
+    novos = ativos.iloc[:5].assign(**{COLUNA_ID: np.arange(1, 6)})
+    nova_base = pd.concat([nova_base, novos], ignore_index=True)
+
+    nova, delta, estatisticas = pontuar_incremental(compilado, nova_base, loja,
+                                                    compilado.versao(), tamanho_bloco=1000)
+    _confere_loja(compilado, nova, nova_base)
+    # Só os de entradas alteradas e os novos são repontuados
+    realmente_alterados = (ativos.set_index(COLUNA_ID).loc[alterados, DIAS] != 30.0).sum()
+    assert estatisticas.alterados == realmente_alterados
+    assert estatisticas.novos == 5 and estatisticas.removidos == 30
+    assert estatisticas.repontuadas == realmente_alterados + 5
+
+    situacao = dict(zip(delta[COLUNA_ID], delta[COLUNA_SITUACAO]))
+    assert {i for i, s in situacao.items() if s == "novo"} == set(range(1, 6))
+    assert {i for i, s in situacao.items() if s == "removido"} == {*churnados, *excluidos}
+    # Alterados entram no delta só se a probabilidade ou a ação mudou
+    mudaram = delta[delta[COLUNA_SITUACAO] == "alterado"]
+    assert set(mudaram[COLUNA_ID]) <= set(alterados)
+    assert (mudaram[COLUNA_PROBA] != mudaram[COLUNA_PROBA_ANTERIOR]).all()
+    antes = loja.set_index(COLUNA_ID)[COLUNA_PROBA]
+    depois = nova.set_index(COLUNA_ID)[COLUNA_PROBA]
+    comuns = antes.index.intersection(depois.index)
+    assert set(comuns[antes[comuns] != depois[comuns]]) == set(mudaram[COLUNA_ID])
+
+
+def test_csv_e_parquet_tem_o_mesmo_hash(compilado, base, tmp_path):
+    caminho_loja = str(tmp_path / "loja.parquet")
+    base.to_parquet(tmp_path / "clientes.parquet", index=False)
+    base.to_csv(tmp_path / "clientes.csv", index=False)
+
+    primeira = atualizar_pontuacao(compilado, str(tmp_path / "clientes.parquet"),
+                                   str(tmp_path / "delta1.parquet"), caminho_loja)
+    loja, versao = carregar_loja(caminho_loja)
+    assert versao == compilado.versao() and len(loja) == primeira.linhas
+
+    # Mesmos clientes lidos do CSV: nada repontuado, delta vazio
+    segunda = atualizar_pontuacao(compilado, str(tmp_path / "clientes.csv"),
+                                  str(tmp_path / "delta2.parquet"), caminho_loja)
+    assert segunda.repontuadas == 0 and segunda.delta == 0
+    assert pd.read_parquet(tmp_path / "delta2.parquet").empty
@@ -0,0 +1,119 @@
+# Índice de pontuação (churn.indice): consultas contra filtros do pandas, blocos e mmap
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn.indice import MANIFESTO, ConstrutorIndice, IndicePontuacao
+from churn.lote import COLUNA_ACAO, COLUNA_ID, COLUNA_PROBA
+from churn.regras import acao_recomendada
+
+PAGAMENTO = "Método de Pagamento Preferido"
+CIDADE = "Nível da Cidade"
+
+
+@pytest.fixture(scope="module")
+def pontuados():
+    rng = np.random.default_rng(11)
+    n = 5000
+    proba = rng.integers(0, 101, n)
+    pagamento = rng.choice(["COD", "UPI", "Debit Card", "E wallet"], n).astype(object)
+    pagamento[rng.random(n) < 0.05] = None
+    return pd.DataFrame({
+        COLUNA_ID: rng.permutation(np.arange(10_000, 10_000 + n)),
+        COLUNA_PROBA: proba,
+        COLUNA_ACAO: acao_recomendada(proba),
+        PAGAMENTO: pagamento,
+        CIDADE: rng.choice([1, 2, 3], n),
+    })
+
+
+@pytest.fixture(scope="module")
+def indice(pontuados):
+    return IndicePontuacao.construir(
+        pontuados[COLUNA_ID], pontuados[COLUNA_PROBA],
+        {PAGAMENTO: pontuados[PAGAMENTO], CIDADE: pontuados[CIDADE]},
+    )
+
+
+def _esperado(pontuados, minimo=0, maximo=100, acoes=None, segmentos=None, ids=None,
+              limite=None):
+    mascara = pontuados[COLUNA_PROBA].between(minimo, maximo)
+    if acoes is not None:
+        mascara &= pontuados[COLUNA_ACAO].isin(acoes)
+    for coluna, niveis in (segmentos or {}).items():
+        mascara &= pontuados[coluna].astype(str).isin([str(n) for n in niveis])
+        mascara &= pontuados[coluna].notna()
+    if ids is not None:
+        mascara &= pontuados[COLUNA_ID].isin(ids)
+    # Maior risco primeiro, empates pelo menor ID
+    filtrado = pontuados[mascara].sort_values([COLUNA_PROBA, COLUNA_ID], ascending=[False, True])
+    return filtrado[COLUNA_ID].tolist()[:limite]
+
+
+CONSULTAS = [
+    {},
+    {"minimo": 85},
+    {"minimo": 30, "maximo": 60, "limite": 40},
+    {"acoes": ["Monitorar", "Oferecer cashback+"]},
+    {"minimo": 50, "acoes": ["Monitorar"]},
+    {"segmentos": {PAGAMENTO: ["COD", "UPI"]}, "limite": 500},
+    {"segmentos": {PAGAMENTO: ["COD"], CIDADE: ["3"]}, "minimo": 20},
+    {"ids": list(range(10_000, 12_000, 3)), "maximo": 70, "segmentos": {CIDADE: [1, 2]}},
+    {"ids": [10_001, 99_999], "limite": 5},
+    {"minimo": 90, "maximo": 10},
+]
+
+
+@pytest.mark.parametrize("filtros", CONSULTAS)
+def test_consultar_igual_ao_pandas(pontuados, indice, filtros):
+    resultado = indice.resultado(indice.consultar(**filtros))
+    assert resultado[COLUNA_ID].tolist() == _esperado(pontuados, **filtros)
+    # Probabilidade e ação devolvidas são as do cliente
+    original = pontuados.set_index(COLUNA_ID).loc[resultado[COLUNA_ID]]
+    np.testing.assert_array_equal(resultado[COLUNA_PROBA], original[COLUNA_PROBA])
+    np.testing.assert_array_equal(resultado[COLUNA_ACAO].astype(str),
+                                  original[COLUNA_ACAO].astype(str))
+
+
+def test_construtor_em_blocos_igual_ao_indice_inteiro(pontuados, indice):
+    construtor = ConstrutorIndice(colunas=[PAGAMENTO, CIDADE])
+    for inicio in range(0, len(pontuados), 1300):
+        construtor.adicionar(pontuados.iloc[inicio:inicio + 1300])
+    em_blocos = construtor.construir()
+    for filtros in CONSULTAS:
+        pd.testing.assert_frame_equal(em_blocos.resultado(em_blocos.consultar(**filtros)),
+                                      indice.resultado(indice.consultar(**filtros)))
+
+
+def test_salvar_e_carregar_com_mmap(pontuados, indice, tmp_path):
+    diretorio = str(tmp_path / "indice")
+    indice.salvar(diretorio)
+    # Salvar de novo substitui o diretório inteiro
+    indice.salvar(diretorio)
+    assert not os.path.exists(diretorio + ".tmp") and not os.path.exists(diretorio + ".antigo")
+
+    carregado = IndicePontuacao.carregar(diretorio)
+    assert isinstance(carregado.ids, np.memmap) and len(carregado) == len(pontuados)
+    assert carregado.versao_modelo is None
+    for filtros in CONSULTAS:
+        pd.testing.assert_frame_equal(carregado.resultado(carregado.consultar(**filtros)),
+                                      indice.resultado(indice.consultar(**filtros)))
+
+    caminho = os.path.join(diretorio, MANIFESTO)
+    with open(caminho, encoding="utf-8") as f:
+        manifesto = json.load(f)
+    manifesto["formato"] = 0
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f)
+    with pytest.raises(ValueError, match="Formato de índice não suportado"):
+        IndicePontuacao.carregar(diretorio)
+
+
+def test_indice_vazio():
+    vazio = ConstrutorIndice().construir()
+    assert len(vazio) == 0
+    assert vazio.resultado(vazio.consultar(minimo=50, limite=10)).empty
@@ -0,0 +1,71 @@
+# Intervalos medidos (churn.instrumentacao): memória por intervalo, perfis e trace
+
+import cProfile
+import json
+import sys
+
+import numpy as np
+import pytest
+
+from churn.instrumentacao import Rastreador
+
+linux = pytest.mark.skipif(not sys.platform.startswith("linux"),
+                           reason="RSS atual vem de /proc/self/statm")
+
+
+@linux
+def test_rss_por_intervalo_e_nao_o_pico_do_processo():
+    rastreador = Rastreador()
+    with rastreador.intervalo("pesado"):
+        retido = np.ones(64 * 1024 * 1024 // 8)
+    with rastreador.intervalo("leve"):
+        pass
+    del retido
+    pesado, leve = rastreador.registros()
+
+    assert pesado["rss_delta_mb"] > 50
+    assert abs(leve["rss_delta_mb"]) < 5
+    # O pico do processo é acumulado: o intervalo leve herda o do pesado
+    assert leve["rss_pico_processo_mb"] >= pesado["rss_pico_processo_mb"]
+
+    resumo = {total["nome"]: total for total in rastreador.resumo()}
+    assert resumo["pesado"]["rss_delta_mb"] > 50 > resumo["leve"]["rss_delta_mb"]
+
+
+def test_perfil_volta_a_funcionar_depois_de_falha_na_gravacao(tmp_path, monkeypatch):
+    rastreador = Rastreador(diretorio_perfil=str(tmp_path))
+    original = cProfile.Profile.dump_stats
+
+    def falha(self, arquivo):
+        raise OSError("disco cheio")
+
+    monkeypatch.setattr(cProfile.Profile, "dump_stats", falha)
+    with pytest.raises(OSError, match="disco cheio"):
+        with rastreador.intervalo("primeiro"):
+            pass
+    assert not rastreador._perfilando
+
+    monkeypatch.setattr(cProfile.Profile, "dump_stats", original)
+    with rastreador.intervalo("segundo"):
+        with rastreador.intervalo("interno"):
+            pass
+    # Um perfil por intervalo de primeiro nível
+    assert [arquivo.name.rsplit("-", 1)[1] for arquivo in tmp_path.iterdir()] == ["segundo.prof"]
+
+
+def test_trace_jsonl_anexa_so_os_novos(tmp_path):
+    rastreador = Rastreador()
+    caminho = str(tmp_path / "trace.jsonl")
+    with rastreador.intervalo("a", linhas=3):
+        with rastreador.intervalo("b"):
+            pass
+    rastreador.gravar(caminho)
+    with rastreador.intervalo("c"):
+        pass
+    rastreador.gravar(caminho)
+
+    with open(caminho, encoding="utf-8") as f:
+        registros = [json.loads(linha) for linha in f]
+    assert [r["nome"] for r in registros] == ["b", "a", "c"]
+    assert registros[0]["pai"] == "a" and registros[0]["profundidade"] == 1
+    assert registros[1]["linhas"] == 3
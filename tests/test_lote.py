@@ -0,0 +1,104 @@
+# Pontuação em lote (churn.lote): blocos, formatos de entrada e a pontuação inteira
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn.__main__ import main
+from churn.lote import (
+    COLUNA_ACAO,
+    COLUNA_ID,
+    COLUNA_PROBA,
+    COLUNAS_SAIDA,
+    ler_em_blocos,
+    pontuar_base,
+)
+from churn.regras import acao_recomendada, probabilidade_percentual
+from conftest import CAMINHO_LEVE
+
+
+@pytest.fixture(scope="module")
+def esperado(base, model_df):
+    """Saída esperada para os clientes ativos, pelo pipeline sklearn inteiro."""
+    ativos = base[base["Churn"] == 0]
+    percentual = probabilidade_percentual(model_df["pipeline"].predict_proba(ativos)[:, 1])
+    return pd.DataFrame({
+        COLUNA_ID: ativos[COLUNA_ID].to_numpy(),
+        COLUNA_PROBA: percentual,
+        COLUNA_ACAO: acao_recomendada(percentual),
+    })
+
+
+@pytest.mark.parametrize("tamanho_bloco", [700, 100_000])
+def test_blocos_iguais_ao_pipeline(compilado, base, esperado, tamanho_bloco):
+    resultado, estatisticas = pontuar_base(compilado, base, tamanho_bloco)
+    pd.testing.assert_frame_equal(resultado, esperado)
+    assert estatisticas.linhas == len(esperado)
+    # Um bloco pontuado por bloco lido (os já churnados saem de cada bloco)
+    assert estatisticas.blocos == -(-len(base) // tamanho_bloco)
+
+
+@pytest.mark.parametrize("formato", [".parquet", ".csv"])
+def test_arquivos_iguais_ao_dataframe(compilado, base, esperado, tmp_path, formato):
+    caminho = tmp_path / f"clientes{formato}"
+    if formato == ".csv":
+        base.to_csv(caminho, index=False)
+    else:
+        base.to_parquet(caminho, index=False)
+
+    resultado, _ = pontuar_base(compilado, str(caminho), tamanho_bloco=1000)
+    pd.testing.assert_frame_equal(resultado, esperado)
+
+
+def test_leitura_em_blocos_e_colunas(base, tmp_path):
+    caminho = tmp_path / "clientes.parquet"
+    base.to_parquet(caminho, index=False)
+    blocos = list(ler_em_blocos(str(caminho), 2000, colunas=[COLUNA_ID, "Churn", "inexistente"]))
+    assert [len(bloco) for bloco in blocos] == [2000, 2000, len(base) - 4000]
+    assert all(list(bloco.columns) == [COLUNA_ID, "Churn"] for bloco in blocos)
+    with pytest.raises(ValueError, match="não suportado"):
+        next(ler_em_blocos(str(tmp_path / "clientes.json")))
+
+
+def test_todos_e_base_vazia(compilado, base):
+    resultado, _ = pontuar_base(compilado, base, apenas_ativos=False)
+    np.testing.assert_array_equal(resultado[COLUNA_ID], base[COLUNA_ID])
+
+    vazio, estatisticas = pontuar_base(compilado, base.iloc[:0])
+    assert list(vazio.columns) == COLUNAS_SAIDA and vazio.empty
+    assert estatisticas.linhas == 0
+
+
+def test_comando_score_csv_igual_ao_parquet(base, esperado, tmp_path, capsys):
+    entrada = tmp_path / "clientes.parquet"
+    base.to_parquet(entrada, index=False)
+    modelo = str(CAMINHO_LEVE)
+
+    main(["score", str(entrada), str(tmp_path / "saida.parquet"), "--modelo", modelo,
+          "--chunk-size", "1500"])
+    main(["score", str(entrada), str(tmp_path / "saida.csv"), "--modelo", modelo])
+    parquet = pd.read_parquet(tmp_path / "saida.parquet")
+    csv = pd.read_csv(tmp_path / "saida.csv")
+    assert "4682 linhas" in capsys.readouterr().out
+
+    pd.testing.assert_frame_equal(parquet.astype({COLUNA_ACAO: str}),
+                                  esperado.astype({COLUNA_ACAO: str}))
+    pd.testing.assert_frame_equal(csv, parquet.astype({COLUNA_ACAO: str}), check_dtype=False)
+
+
+def test_comando_score_colunas_e_todos(base, tmp_path):
+    entrada = tmp_path / "clientes.csv"
+    base.to_csv(entrada, index=False)
+    saida = tmp_path / "saida.csv"
+
+    main(["score", str(entrada), str(saida), "--modelo", str(CAMINHO_LEVE),
+          "--colunas", COLUNA_ID, COLUNA_PROBA, "--todos"])
+    resultado = pd.read_csv(saida)
+    assert list(resultado.columns) == [COLUNA_ID, COLUNA_PROBA]
+    assert resultado[COLUNA_ID].tolist() == base[COLUNA_ID].tolist()
+
+    with pytest.raises(ValueError, match="Colunas de saída inválidas"):
+        main(["score", str(entrada), str(saida), "--modelo", str(CAMINHO_LEVE),
+              "--colunas", "Churn"])
+    with pytest.raises(ValueError, match="Formato de saída não suportado"):
+        main(["score", str(entrada), str(tmp_path / "saida.json"), "--modelo", str(CAMINHO_LEVE)])
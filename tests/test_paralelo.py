@@ -0,0 +1,56 @@
+# Pool de pontuação em memória compartilhada (churn.paralelo) contra a pontuação serial
+
+import os
+
+import pandas as pd
+import pytest
+
+from churn.compilado import ModeloCompilado
+from churn.lote import pontuar_em_blocos
+from churn.paralelo import PoolPontuacao
+
+DIRETORIO_SHM = "/dev/shm"
+
+
+class CompiladoComErro(ModeloCompilado):
+    """Falha ao pontuar: o erro acontece dentro do processo do pool."""
+
+    def pontuar_matriz(self, matriz):
+        raise RuntimeError("falha no trabalhador")
+
+
+def _segmentos():
+    """Segmentos de multiprocessing.shared_memory abertos (nomes psm_*)."""
+    return {nome for nome in os.listdir(DIRETORIO_SHM) if nome.startswith("psm_")}
+
+
+def _pontuar(compilado, dataset, workers):
+    # Blocos de tamanhos diferentes do pedaço: o último pedaço fica incompleto
+    blocos = [dataset.iloc[:2000], dataset.iloc[2000:]]
+    return pd.concat(list(pontuar_em_blocos(compilado, blocos, tamanho_bloco=700,
+                                            workers=workers)), ignore_index=True)
+
+
+def test_paralelo_igual_ao_serial(compilado, dataset):
+    serial = _pontuar(compilado, dataset, workers=1)
+    paralelo = _pontuar(compilado, dataset, workers=2)
+    assert len(serial) == len(dataset)
+    pd.testing.assert_frame_equal(paralelo, serial)
+
+
+@pytest.mark.skipif(not os.path.isdir(DIRETORIO_SHM), reason="segmentos listados em /dev/shm")
+def test_erro_no_trabalhador_libera_memoria(compilado, dataset):
+    com_erro = CompiladoComErro.de_dict(compilado.para_dict())
+    antes = _segmentos()
+    with pytest.raises(RuntimeError, match="falha no trabalhador"):
+        _pontuar(com_erro, dataset, workers=2)
+    assert _segmentos() == antes
+
+
+@pytest.mark.skipif(not os.path.isdir(DIRETORIO_SHM), reason="segmentos listados em /dev/shm")
+def test_pool_libera_memoria_ao_sair(compilado, dataset):
+    antes = _segmentos()
+    with PoolPontuacao(compilado, tamanho_bloco=500, processos=2) as pool:
+        assert _segmentos() > antes
+        next(pool.pontuar([dataset.iloc[:500]]))
+    assert _segmentos() == antes
@@ -0,0 +1,59 @@
+# Treino sem gráficos e relatório em arquivos (churn.relatorio)
+
+import json
+import os
+import subprocess
+import sys
+
+import pandas as pd
+import pytest
+
+from churn.treino import PipelineTreino
+from conftest import CONFIG_TREINO_PEQUENO, RAIZ
+
+GRAFICOS = ("matplotlib", "seaborn")
+
+
+def test_treino_sem_relatorio_nao_importa_graficos(tmp_path):
+    # Processo novo: o sys.modules dos testes não interfere
+    script = (
+        "import sys\n"
+        "from churn.__main__ import main\n"
+        f"main(['train', '--destino', {str(tmp_path / 'modelo.pkl')!r},"
+        f" '--cache-dir', {str(tmp_path / 'cache')!r},"
+        f" '--params-rf', {json.dumps(CONFIG_TREINO_PEQUENO['params_rf'])!r},"
+        f" '--params-lr', {json.dumps(CONFIG_TREINO_PEQUENO['params_lr'])!r}])\n"
+        f"print('GRAFICOS', [m for m in {GRAFICOS!r} if m in sys.modules])\n"
+    )
+    saida = subprocess.run([sys.executable, "-c", script], cwd=RAIZ, capture_output=True,
+                           text=True, check=True).stdout
+    assert "GRAFICOS []" in saida
+    for arquivo in ("modelo.pkl", "modelo.json", "modelo_scorecard.csv", "modelo_buscas.json"):
+        assert (tmp_path / arquivo).exists()
+
+
+@pytest.fixture(scope="module")
+def relatorio(tmp_path_factory):
+    from churn.relatorio import gerar_relatorio
+
+    diretorio = tmp_path_factory.mktemp("treino")
+    treino = PipelineTreino(CONFIG_TREINO_PEQUENO, diretorio_cache=str(diretorio / "cache"))
+    return gerar_relatorio(treino, str(diretorio / "relatorio"))
+
+
+def test_relatorio_grava_tabelas_e_figuras(relatorio):
+    extensoes = {os.path.splitext(arquivo)[1] for arquivo in relatorio.arquivos}
+    assert extensoes == {".csv", ".png"}
+    for arquivo in relatorio.arquivos:
+        assert os.path.getsize(arquivo) > 0
+        if arquivo.endswith(".csv"):
+            assert not pd.read_csv(arquivo).empty
+
+
+def test_relatorio_avaliacao_dos_dois_modelos(relatorio):
+    avaliacao = next(arquivo for arquivo in relatorio.arquivos
+                     if os.path.basename(arquivo) == "21_avaliacao.csv")
+    tabela = pd.read_csv(avaliacao)
+    assert set(tabela["modelo"]) == {"Random Forest", "Regressão Logística"}
+    assert set(tabela["conjunto"]) == {"treino", "teste", "oot"}
+    assert tabela["auc"].between(0.5, 1).all()
@@ -0,0 +1,79 @@
+# Scorecard (churn.scorecard): tabela de pesos, artefatos antigos e o comando scorecard
+
+import pickle
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn.__main__ import main
+from churn.compilado import ModeloCompilado
+from churn.scorecard import COLUNAS_TABELA, gravar_tabela, tabela_scorecard, verificar_scorecard
+from conftest import CAMINHO_LEVE, CAMINHO_PICKLE, CAMINHO_PLANILHA, CAMINHO_SCORECARD
+
+
+def _ler(caminho):
+    return pd.read_csv(caminho, dtype={"Faixa/Nível": str}, keep_default_na=False)
+
+
+def test_tabela_igual_a_gravada_no_treino(compilado, tmp_path):
+    destino = tmp_path / "scorecard.csv"
+    gravar_tabela(compilado, destino)
+    tabela = _ler(destino)
+    pd.testing.assert_frame_equal(tabela, _ler(CAMINHO_SCORECARD))
+
+    assert list(tabela.columns) == COLUNAS_TABELA
+    assert tabela.iloc[0]["Tipo"] == "intercepto"
+    # Uma linha por bin e por nível, mais o nível desconhecido de cada categórica
+    faixas = tabela[tabela["Tipo"] == "faixa"].groupby("Variável").size()
+    assert faixas.to_dict() == {var: len(limites) + 1
+                                for var, (limites, _) in compilado.discretizadas.items()}
+    niveis = tabela[tabela["Tipo"] == "nível"].groupby("Variável").size()
+    assert niveis.to_dict() == {var: len(n) + 1 for var, n in compilado.categorias.items()}
+
+
+def test_artefato_formato_1_e_pickle_antigo(compilado, dataset):
+    # Formato 1: posições no vetor de coeficientes em vez de pesos
+    formato_1 = {
+        "formato": 1,
+        "entradas": compilado.entradas,
+        "categorias": compilado.categorias,
+        "medianas": compilado.medianas,
+        "discretizadas": {var: {"limites": limites.tolist(), "indices": indices.tolist()}
+                          for var, (limites, indices) in compilado.discretizadas.items()},
+        "dummies": {var: indices.tolist() for var, indices in compilado.dummies.items()},
+        "lineares": compilado.lineares,
+        "coef": compilado.coef[:-1].tolist(),
+        "intercepto": compilado.intercepto,
+    }
+    antigo = ModeloCompilado.de_dict(formato_1)
+    np.testing.assert_array_equal(antigo.pontuar(dataset), compilado.pontuar(dataset))
+    pd.testing.assert_frame_equal(tabela_scorecard(antigo), tabela_scorecard(compilado))
+
+    # Objeto gravado sem as tabelas de peso: __setstate__ as reconstrói
+    estado = {k: v for k, v in compilado.__dict__.items() if not k.startswith("_")}
+    objeto = ModeloCompilado.__new__(ModeloCompilado)
+    objeto.__setstate__(estado)
+    recarregado = pickle.loads(pickle.dumps(objeto))
+    np.testing.assert_array_equal(recarregado.pontuar(dataset), compilado.pontuar(dataset))
+
+    with pytest.raises(ValueError, match="Formato de modelo não suportado"):
+        ModeloCompilado.de_dict({**formato_1, "formato": 99})
+
+
+def test_verificar_acusa_divergencia(compilado, model_df, dataset):
+    alterado = ModeloCompilado.de_dict({**compilado.para_dict(),
+                                        "intercepto": compilado.intercepto + 0.01})
+    with pytest.raises(AssertionError, match="Scorecard diverge"):
+        verificar_scorecard(alterado, model_df, dataset)
+    assert verificar_scorecard(compilado, model_df, dataset.iloc[:0]) == 0.0
+
+
+def test_comando_scorecard(tmp_path, capsys):
+    destino = tmp_path / "scorecard.csv"
+    main(["scorecard", "--modelo", str(CAMINHO_LEVE), "--csv", str(destino), "--verificar",
+          "--pickle", str(CAMINHO_PICKLE), "--planilha", str(CAMINHO_PLANILHA)])
+    saida = capsys.readouterr().out
+    assert f"{len(_ler(CAMINHO_SCORECARD))} linhas" in saida
+    assert "Scorecard = log_pipeline.predict_proba em 5630 linhas" in saida
+    pd.testing.assert_frame_equal(_ler(destino), _ler(CAMINHO_SCORECARD))
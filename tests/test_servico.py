@@ -0,0 +1,97 @@
+# Validação das entradas do serviço HTTP (churn.servico) e do modelo compilado
+
+import asyncio
+import json
+
+import numpy as np
+import pytest
+
+from churn.servico import ServicoPontuacao
+
+CIDADE = "Nível da Cidade"
+TEMPO = "Tempo de Relacionamento"
+
+
+async def _pedidos(compilado, corpos):
+    """(status, resposta) de cada POST (rota, corpo JSON em texto), na mesma conexão."""
+    servico = ServicoPontuacao(compilado)
+    servidor = await servico.iniciar("127.0.0.1", 0)
+    porta = servidor.sockets[0].getsockname()[1]
+    reader, writer = await asyncio.open_connection("127.0.0.1", porta)
+    respostas = []
+    for rota, corpo in corpos:
+        conteudo = corpo.encode()
+        writer.write((f"POST {rota} HTTP/1.1\r\nHost: teste\r\n"
+                      f"Content-Length: {len(conteudo)}\r\n\r\n").encode() + conteudo)
+        cabecalho = (await reader.readuntil(b"\r\n\r\n")).decode("latin-1").split("\r\n")
+        tamanho = next(int(linha.split(":", 1)[1]) for linha in cabecalho
+                       if linha.lower().startswith("content-length:"))
+        respostas.append((int(cabecalho[0].split()[1]),
+                          json.loads(await reader.readexactly(tamanho))))
+    writer.close()
+    servidor.close()
+    await servidor.wait_closed()
+    return respostas
+
+
+def _score(compilado, *clientes):
+    corpos = [("/score", c if isinstance(c, str) else json.dumps(c)) for c in clientes]
+    return asyncio.run(_pedidos(compilado, corpos))
+
+
+def test_nivel_numerico_em_texto(compilado):
+    (status_texto, texto), (status_numero, numero) = _score(
+        compilado, {CIDADE: "3", TEMPO: "2"}, {CIDADE: 3, TEMPO: 2})
+    assert status_texto == status_numero == 200
+    assert texto["Probabilidade Churn"] == numero["Probabilidade Churn"]
+    assert numero["Probabilidade Churn"] == compilado.pontuar_linha({CIDADE: 3, TEMPO: 2})
+    # O nível 3 tem peso próprio: não é pontuado como desconhecido
+    assert numero["Probabilidade Churn"] != compilado.pontuar_linha({TEMPO: 2})
+
+
+@pytest.mark.parametrize("corpo, trecho", [
+    (json.dumps({CIDADE: "7"}), "nível desconhecido"),
+    (json.dumps({CIDADE: True}), "nível desconhecido"),
+    (json.dumps({"Método de Pagamento Preferido": "Bitcoin"}), "nível desconhecido"),
+    (f'{{"{TEMPO}": NaN}}', "finito"),
+    (f'{{"{TEMPO}": 1e400}}', "finito"),
+    (f'{{"{TEMPO}": {"9" * 400}}}', "finito"),
+    (json.dumps({TEMPO: True}), "número"),
+    (json.dumps({TEMPO: "abc"}), "finito"),
+    (json.dumps({TEMPO: [1]}), "número"),
+    (json.dumps({"Tempo Relacionamento": 2}), "colunas desconhecidas: Tempo Relacionamento"),
+    (json.dumps({TEMPO: 2, "Cupons Usados": 1}), "colunas válidas:"),
+])
+def test_entrada_invalida_responde_400(compilado, corpo, trecho):
+    (status, resposta), = _score(compilado, corpo)
+    assert status == 400
+    assert trecho in resposta["erro"]
+
+
+def test_lote_com_cliente_invalido_responde_400(compilado):
+    corpo = json.dumps([{CIDADE: 1}, {CIDADE: "7"}])
+    (status, resposta), = asyncio.run(_pedidos(compilado, [("/score/batch", corpo)]))
+    assert status == 400 and "nível desconhecido" in resposta["erro"]
+
+
+def test_id_do_cliente_volta_na_resposta(compilado):
+    (status, resposta), = _score(compilado, {"ID do Cliente": 50001, TEMPO: 2})
+    assert status == 200 and resposta["ID do Cliente"] == 50001
+
+
+def test_booleano_na_coluna_booleana(compilado):
+    (status, resposta), = _score(compilado, {"Reclamação": True, TEMPO: 2})
+    assert status == 200
+    assert resposta["Probabilidade Churn"] == compilado.pontuar_linha({"Reclamação": 1, TEMPO: 2})
+
+
+def test_ausentes_continuam_aceitos(compilado):
+    (status, resposta), = _score(compilado, {CIDADE: None, TEMPO: None})
+    assert status == 200
+    assert resposta["Probabilidade Churn"] == compilado.pontuar_linha({})
+
+
+def test_codificacao_sem_estrito_mantem_desconhecido(compilado):
+    j = compilado.posicao[CIDADE]
+    matriz = compilado.codificar_linhas([{CIDADE: "7"}, {CIDADE: "3"}, {CIDADE: 3.0}])
+    np.testing.assert_array_equal(matriz[:, j], [-1, 2, 2])
@@ -0,0 +1,74 @@
+# Simulador do app (churn.simulacao): memo das entradas e das chaves de bins, curva de sensibilidade
+
+import numpy as np
+import pytest
+
+from churn.simulacao import SimuladorMemo, curva_sensibilidade
+
+LINHA = {
+    'Tempo de Relacionamento': 4.0, 'Reclamação': 1, 'Quantidade de Pedidos': 2.0,
+    'Dias Desde Último Pedido': 7.0, 'Horas no App': 3.0, 'Armazém até a Casa': 15.0,
+    'Número de Dispositivos Registrados': 4.0, 'Pontuação de Satisfação': 3.0,
+    'Número de Endereços': 3.0, 'Valor de Cashback': 150.0,
+    'Aumento do Valor de Pedido vs Ano Anterior': 15.0,
+    'Dispositivo de Login Preferido': 'Mobile Phone', 'Nível da Cidade': 1,
+    'Método de Pagamento Preferido': 'Debit Card',
+    'Categoria de Pedido Preferida': 'Laptop & Accessory',
+}
+
+
+class Contador:
+    def __init__(self, funcao):
+        self.funcao = funcao
+        self.chamadas = 0
+
+    def __call__(self, *args):
+        self.chamadas += 1
+        return self.funcao(*args)
+
+
+@pytest.fixture
+def contadores(compilado, monkeypatch):
+    codificar = Contador(compilado.codificar_linha)
+    pontuar = Contador(compilado.pontuar_chaves)
+    monkeypatch.setattr(compilado, "codificar_linha", codificar)
+    return codificar, pontuar
+
+
+def test_acerto_nas_entradas_nao_codifica(compilado, contadores):
+    codificar, pontuar = contadores
+    simulador = SimuladorMemo(compilado, pontuar)
+    proba = simulador.pontuar_linha(LINHA)
+    assert proba == pytest.approx(compilado.pontuar_linha(LINHA), abs=1e-12)
+    codificar.chamadas = 0
+
+    # Rerun do app com as mesmas entradas: nem codificação nem pontuação
+    assert simulador.pontuar_linha(dict(LINHA)) == proba
+    assert codificar.chamadas == 0 and pontuar.chamadas == 1
+    assert simulador.info()["entradas"].hits == 1
+
+
+def test_entradas_novas_com_os_mesmos_bins_nao_pontuam(compilado, contadores):
+    codificar, pontuar = contadores
+    simulador = SimuladorMemo(compilado, pontuar)
+    simulador.pontuar_linha(LINHA)
+    vizinha = {**LINHA, "Valor de Cashback": 150.5}
+    assert simulador.chave(vizinha) == simulador.chave(LINHA)
+
+    simulador.pontuar_linha(vizinha)
+    assert pontuar.chamadas == 1
+    assert simulador.info()["chaves"].hits == 1
+
+
+def test_curva_igual_a_pontuar_cada_valor(compilado):
+    valores = list(range(0, 31))
+    proba, distintas = curva_sensibilidade(compilado, LINHA, "Tempo de Relacionamento", valores)
+    esperado = [compilado.pontuar_linha({**LINHA, "Tempo de Relacionamento": v}) for v in valores]
+    np.testing.assert_allclose(proba, esperado, atol=1e-12)
+    assert 1 < distintas < len(valores)
+
+    niveis = ["Debit Card", "Credit Card", "UPI"]
+    proba, _ = curva_sensibilidade(compilado, LINHA, "Método de Pagamento Preferido", niveis)
+    esperado = [compilado.pontuar_linha({**LINHA, "Método de Pagamento Preferido": v})
+                for v in niveis]
+    np.testing.assert_allclose(proba, esperado, atol=1e-12)
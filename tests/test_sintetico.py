@@ -0,0 +1,74 @@
+# Clientes sintéticos (churn.sintetico): esquema da planilha, blocos e reprodutibilidade
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn.sintetico import (
+    COLUNA_ID,
+    COLUNA_ROTULO,
+    PerfilClientes,
+    gerar_clientes,
+    gerar_em_blocos,
+    gravar_clientes,
+)
+
+
+@pytest.fixture(scope="module")
+def perfil(base):
+    return PerfilClientes.ajustar(base)
+
+
+@pytest.fixture(scope="module")
+def sinteticos(base, compilado):
+    return gerar_clientes(20_000, base=base, compilado=compilado)
+
+
+def test_mesmo_esquema_da_planilha(base, sinteticos):
+    assert list(sinteticos.columns) == list(base.columns)
+    pd.testing.assert_series_equal(sinteticos.dtypes, base.dtypes)
+
+    # IDs novos e consecutivos, depois do último da planilha
+    ids = sinteticos[COLUNA_ID].to_numpy()
+    np.testing.assert_array_equal(ids, np.arange(base[COLUNA_ID].max() + 1,
+                                                 base[COLUNA_ID].max() + 1 + len(sinteticos)))
+
+    for nome in base.columns.drop(COLUNA_ID):
+        original, gerada = base[nome], sinteticos[nome]
+        # Só níveis/valores vistos na planilha (contínuas: dentro do intervalo)
+        if gerada.nunique() <= original.nunique():
+            assert set(gerada.dropna().unique()) <= set(original.dropna().unique()), nome
+        else:
+            assert original.min() <= gerada.min() and gerada.max() <= original.max(), nome
+        assert gerada.isna().mean() == pytest.approx(original.isna().mean(), abs=0.01), nome
+
+
+def test_rotulo_segue_o_modelo(compilado, sinteticos):
+    esperada = compilado.pontuar(sinteticos).mean()
+    assert sinteticos[COLUNA_ROTULO].mean() == pytest.approx(esperada, abs=0.01)
+
+
+def test_blocos_reprodutiveis(base, perfil, tmp_path):
+    blocos = list(gerar_em_blocos(2000, perfil, tamanho_bloco=700, random_state=3))
+    assert [len(bloco) for bloco in blocos] == [700, 700, 600]
+    juntos = pd.concat(blocos, ignore_index=True)
+    assert juntos[COLUNA_ID].is_monotonic_increasing and juntos[COLUNA_ID].is_unique
+
+    # Mesma semente, mesma saída; o arquivo é a concatenação dos blocos
+    caminho = tmp_path / "sinteticos.parquet"
+    estatisticas = gravar_clientes(str(caminho), 2000, base=base, tamanho_bloco=700,
+                                   random_state=3)
+    assert estatisticas.linhas == 2000 and estatisticas.blocos == 3
+    # 'Nível da Cidade' volta do Parquet como inteiro, sem o dtype category
+    gravado = pd.read_parquet(caminho).astype(juntos.dtypes.to_dict())
+    pd.testing.assert_frame_equal(gravado, juntos)
+    assert estatisticas.churn == int(juntos[COLUNA_ROTULO].sum())
+
+    outra = pd.concat(gerar_em_blocos(2000, perfil, tamanho_bloco=700, random_state=4),
+                      ignore_index=True)
+    assert not outra.drop(columns=COLUNA_ID).equals(juntos.drop(columns=COLUNA_ID))
+
+
+def test_gerar_zero_clientes(base):
+    vazio = gerar_clientes(0, base=base)
+    assert vazio.empty and list(vazio.columns) == list(base.columns)
@@ -0,0 +1,94 @@
+# Tabela de risco paginada (churn.tabela) contra filtros e ordenações do pandas
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from churn.__main__ import main
+from churn.lote import COLUNA_ACAO, COLUNA_ID, COLUNA_PROBA
+from churn.regras import acao_recomendada
+from churn.tabela import TabelaRisco, ids_da_busca
+
+PAGAMENTO = "Método de Pagamento Preferido"
+CIDADE = "Nível da Cidade"
+
+
+@pytest.fixture(scope="module")
+def pontuados():
+    rng = np.random.default_rng(7)
+    n = 2000
+    proba = rng.integers(0, 101, n)
+    return pd.DataFrame({
+        COLUNA_ID: rng.permutation(np.arange(50_000, 50_000 + n)),
+        COLUNA_PROBA: proba,
+        COLUNA_ACAO: acao_recomendada(proba),
+        PAGAMENTO: rng.choice(["COD", "UPI", "Debit Card"], n),
+        CIDADE: rng.choice([1, 2, 3], n),
+    })
+
+
+@pytest.fixture(scope="module")
+def tabela(pontuados):
+    return TabelaRisco.de_pontuados(pontuados, [PAGAMENTO, CIDADE])
+
+
+def _esperado(pontuados, mascara, ordem):
+    filtrado = pontuados[mascara]
+    if ordem == "maior_risco":
+        filtrado = filtrado.sort_values([COLUNA_PROBA, COLUNA_ID], ascending=[False, True])
+    elif ordem == "menor_risco":
+        filtrado = filtrado.sort_values([COLUNA_PROBA, COLUNA_ID])
+    else:
+        filtrado = filtrado.sort_values(COLUNA_ID)
+    return filtrado[COLUNA_ID].tolist()
+
+
+@pytest.mark.parametrize("ordem", ["maior_risco", "menor_risco", "id"])
+@pytest.mark.parametrize("filtros", [
+    {},
+    {"faixa": (40, 90)},
+    {"acoes": ["Monitorar", "Oferecer cashback+"]},
+    {"segmentos": {PAGAMENTO: ["COD", "UPI"], CIDADE: ["3"]}},
+    {"faixa": (20, 100), "segmentos": {CIDADE: [1]}, "ids": list(range(50_000, 50_500))},
+])
+def test_filtros_e_ordenacoes_iguais_ao_pandas(pontuados, tabela, filtros, ordem):
+    mascara = pd.Series(True, index=pontuados.index)
+    minimo, maximo = filtros.get("faixa", (0, 100))
+    mascara &= pontuados[COLUNA_PROBA].between(minimo, maximo)
+    if "acoes" in filtros:
+        mascara &= pontuados[COLUNA_ACAO].isin(filtros["acoes"])
+    for coluna, niveis in filtros.get("segmentos", {}).items():
+        mascara &= pontuados[coluna].astype(str).isin([str(n) for n in niveis])
+    if "ids" in filtros:
+        mascara &= pontuados[COLUNA_ID].isin(filtros["ids"])
+
+    posicoes = tabela.selecionar(tabela.filtrar(**filtros), ordem)
+    esperado = _esperado(pontuados, mascara, ordem)
+    assert tabela.pagina(posicoes, 1, len(tabela))[COLUNA_ID].tolist() == esperado
+
+
+def test_paginas_e_top_n(pontuados, tabela):
+    posicoes = tabela.selecionar(tabela.filtrar(faixa=(50, 100)), "id")
+    esperado = _esperado(pontuados, pontuados[COLUNA_PROBA] >= 50, "id")
+    n_paginas = -(-len(esperado) // 100)
+    paginas = [tabela.pagina(posicoes, numero, 100) for numero in range(1, n_paginas + 2)]
+    assert sum((p[COLUNA_ID].tolist() for p in paginas), []) == esperado
+    assert len(paginas[0]) == 100 and 0 < len(paginas[-2]) <= 100 and paginas[-1].empty
+
+    # Top N ignora a ordenação: os N de maior risco
+    top = tabela.pagina(tabela.selecionar(None, "id", top_n=30), 1, 100)
+    assert top[COLUNA_ID].tolist() == _esperado(pontuados, slice(None), "maior_risco")[:30]
+
+
+def test_ids_da_busca():
+    assert ids_da_busca("  ") == (None, [])
+    assert ids_da_busca("55001, 55002;55003") == ([55001, 55002, 55003], [])
+    assert ids_da_busca("55001, abc ²") == ([55001], ["abc", "²"])
+    # Só trechos inválidos: nenhum cliente, não a base inteira
+    assert ids_da_busca("abc") == ([], ["abc"])
+
+
+def test_query_recusa_ids_invalidos(tmp_path, pontuados, tabela):
+    tabela.indice.salvar(str(tmp_path / "indice"))
+    with pytest.raises(SystemExit, match="IDs inválidos em --ids: abc"):
+        main(["query", str(tmp_path / "indice"), "--ids", "50001", "abc"])
@@ -0,0 +1,99 @@
+# Chaves do cache de etapas do treino (churn.treino): o que invalida cada etapa
+
+import inspect
+
+import pytest
+
+import churn.formulas
+from churn import treino
+from conftest import CAMINHO_PLANILHA, CONFIG_TREINO_PEQUENO
+
+FORMULA_ORIGINAL = "np.subtract(6, coluna(INSATISFACAO[2]), out=saida)"
+FORMULA_EDITADA = "np.subtract(5, coluna(INSATISFACAO[2]), out=saida)"
+
+
+def _editar_codigo(monkeypatch, objeto, antes, depois):
+    """Simula a edição do código-fonte de `objeto` (módulo ou função)."""
+    original = inspect.getsource
+    assert antes in original(objeto)
+
+    def getsource(alvo):
+        fonte = original(alvo)
+        return fonte.replace(antes, depois) if alvo is objeto else fonte
+
+    monkeypatch.setattr(inspect, "getsource", getsource)
+
+
+def _chaves():
+    pipeline = treino.PipelineTreino({"planilha": CAMINHO_PLANILHA}, usar_cache=False)
+    return {nome: pipeline.chave(nome) for nome in pipeline.etapas}
+
+
+def _codigos():
+    return {etapa.nome: etapa.codigo() for etapa in treino.ETAPAS}
+
+
+@pytest.fixture(scope="module")
+def chaves_originais():
+    return _chaves()
+
+
+def test_formula_invalida_dados_e_exportacao(monkeypatch, chaves_originais):
+    codigos = _codigos()
+    _editar_codigo(monkeypatch, churn.formulas, FORMULA_ORIGINAL, FORMULA_EDITADA)
+    editados = _codigos()
+
+    mudaram = {nome for nome in codigos if codigos[nome] != editados[nome]}
+    assert mudaram == {"dados", "exportacao"}
+    # Todas as etapas dependem de dados: nenhuma chave é reaproveitada
+    chaves = _chaves()
+    assert all(chaves[nome] != chaves_originais[nome] for nome in chaves)
+
+
+def test_avaliar_invalida_as_avaliacoes(monkeypatch, chaves_originais):
+    _editar_codigo(monkeypatch, treino._avaliar, '"acuracia"', '"acuracia_editada"')
+    chaves = _chaves()
+
+    mudaram = {nome for nome in chaves if chaves[nome] != chaves_originais[nome]}
+    assert mudaram == {"avaliacao_rf", "avaliacao_lr"}
+
+
+
+# ------------------------------------------------------------
+# Execução com cache: o que é reexecutado
+# ------------------------------------------------------------
+
+def _executar(diretorio, config=CONFIG_TREINO_PEQUENO, **opcoes):
+    """(pipeline executado, {etapa: "executada" | "cache"})."""
+    pipeline = treino.PipelineTreino(config, diretorio_cache=str(diretorio), **opcoes).executar()
+    tabela = pipeline.relatorio.tabela()
+    return pipeline, dict(zip(tabela["etapa"], tabela["origem"]))
+
+
+def test_cache_reaproveita_e_invalida_so_os_dependentes(tmp_path):
+    primeiro, origens = _executar(tmp_path)
+    assert set(origens.values()) == {"executada"} and len(origens) == len(treino.ETAPAS)
+
+    segundo, origens = _executar(tmp_path)
+    assert set(origens.values()) == {"cache"}
+    assert (segundo["exportacao"]["compilado"].versao()
+            == primeiro["exportacao"]["compilado"].versao())
+
+    # Outra grade da regressão logística: só a sua busca e o que depende dela
+    _, origens = _executar(tmp_path, {**CONFIG_TREINO_PEQUENO, "params_lr": {"l1_ratio": [0], "C": [0.1]}})
+    executadas = {nome for nome, origem in origens.items() if origem == "executada"}
+    assert executadas == {"busca_lr", "avaliacao_lr", "exportacao"}
+
+    # --forcar reexecuta a etapa pedida; as chaves (por conteúdo) não mudam
+    _, origens = _executar(tmp_path, forcar=["importancias"])
+    executadas = {nome for nome, origem in origens.items() if origem == "executada"}
+    assert executadas == {"importancias"}
+
+    with pytest.raises(ValueError, match="Etapas desconhecidas"):
+        treino.PipelineTreino(CONFIG_TREINO_PEQUENO, forcar=["inexistente"])
+
+
+def test_sem_cache_nao_grava(tmp_path):
+    _, origens = _executar(tmp_path / "cache", usar_cache=False)
+    assert set(origens.values()) == {"executada"}
+    assert not (tmp_path / "cache").exists()